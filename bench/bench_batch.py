@@ -0,0 +1,77 @@
+"""
+Deal N tables and fetch every hand: one request per operation vs batches.
+
+Reports HTTP round trips and total time for sequential requests, pipelined
+concurrent requests and ``execute_batch``.
+
+    python -m bench.bench_batch --local --latency 0.002 --tables 500
+    python -m bench.bench_batch --url http://localhost:3000/graphql --tables 500
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from src.client import GraphQLClient
+from src.fake_server import FakePokerServer
+from src.metrics import MetricsRegistry
+
+PLAYERS = ["player_one", "player_two", "player_three"]
+
+
+async def sequential(client, deals):
+    hand_ids = [await client.deal(players, stacks, table_id) for players, stacks, table_id in deals]
+    for hand_id in hand_ids:
+        await client.hand(hand_id)
+
+
+async def pipelined(client, deals):
+    hand_ids = await asyncio.gather(*(client.deal(players, stacks, table_id) for players, stacks, table_id in deals))
+    await asyncio.gather(*(client.hand(hand_id) for hand_id in hand_ids))
+
+
+async def batched(client, deals):
+    hand_ids = await client.deal_many(deals)
+    await client.hands(hand_ids)
+
+
+async def run(url, tables, concurrency):
+    results = []
+    for name, mode, batching in (
+        ("sequential requests", sequential, False),
+        ("pipelined requests", pipelined, False),
+        ("execute_batch", batched, True),
+    ):
+        registry = MetricsRegistry()
+        deals = [(PLAYERS, None, f"bench-batch-{uuid.uuid4().hex[:8]}-{i}") for i in range(tables)]
+        async with GraphQLClient(url, max_connections=concurrency, batching=batching, metrics=registry) as client:
+            started = time.perf_counter()
+            await mode(client, deals)
+            elapsed = time.perf_counter() - started
+        results.append((name, registry.counter("graphql_requests_total").value, elapsed))
+    return results
+
+
+async def run_local(args):
+    async with FakePokerServer(latency=args.latency, auto_deal=False) as server:
+        return await run(server.graphql_url, args.tables, args.concurrency)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:3000/graphql")
+    parser.add_argument("--tables", type=int, default=500)
+    parser.add_argument("-c", "--concurrency", type=int, default=64)
+    parser.add_argument("--local", action="store_true", help="benchmark against an in-process stand-in server")
+    parser.add_argument("--latency", type=float, default=0.0, help="stand-in server latency per request")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_local(args) if args.local else run(args.url, args.tables, args.concurrency))
+    baseline = results[0][2]
+    for name, requests, elapsed in results:
+        print(f"{name:<20} {requests:6d} round trips  {elapsed * 1000:9.1f} ms  ({baseline / elapsed:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
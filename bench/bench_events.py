@@ -0,0 +1,47 @@
+"""
+Memory and decode cost per retained handEvent: parsed dicts vs src.events.
+
+    python -m bench.bench_events -n 100000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from src.events import decode_frame
+from test.test_data import hand_event_2
+
+
+def measure(decode, raw_frames):
+    started = time.perf_counter()
+    kept = [decode(raw) for raw in raw_frames]
+    elapsed = time.perf_counter() - started
+    del kept
+    tracemalloc.start()
+    kept = [decode(raw) for raw in raw_frames]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return kept, elapsed, retained
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--count", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    raw_frames = [json.dumps(hand_event_2(f"hand-{i}")) for i in range(args.count)]
+    baseline = None
+    for name, decode in (("json.loads", json.loads), ("events.decode_frame", decode_frame)):
+        kept, elapsed, retained = measure(decode, raw_frames)
+        per_event = retained / len(kept)
+        baseline = baseline or per_event
+        print(
+            f"{name:<20} {per_event:7.0f} bytes/event ({per_event / baseline:6.1%})  "
+            f"{elapsed / len(kept) * 1e6:6.2f} us/event"
+        )
+        del kept
+
+
+if __name__ == "__main__":
+    main()
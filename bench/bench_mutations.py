@@ -0,0 +1,77 @@
+"""
+Deal-mutation throughput: blocking ``requests.post`` vs the pooled async client.
+
+    python -m bench.bench_mutations --url http://localhost:3000/graphql -n 500 -c 32
+    python -m bench.bench_mutations --local --latency 0.002
+"""
+
+import argparse
+import asyncio
+import time
+
+import requests
+
+from src.client import GraphQLClient
+from src.deal import deal_mutation_headers, deal_mutation_params, deal_mutation_query
+from src.fake_server import FakePokerServer
+
+PLAYERS = ["player_one", "player_two", "player_three"]
+
+
+def bench_blocking(url, count, table_id):
+    # Mirrors execute_deal_mutation: one blocking request (and connection) per mutation.
+    started = time.perf_counter()
+    for _ in range(count):
+        requests.post(
+            url,
+            json={"query": deal_mutation_query, "variables": deal_mutation_params(PLAYERS, table_id=table_id)},
+            headers=deal_mutation_headers,
+            timeout=5,
+        ).json()
+    return count / (time.perf_counter() - started)
+
+
+async def bench_async(url, count, concurrency, table_id):
+    limit = asyncio.Semaphore(concurrency)
+
+    async with GraphQLClient(url, table_id=table_id, max_connections=concurrency) as client:
+
+        async def one():
+            async with limit:
+                await client.deal(PLAYERS)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(count)))
+        return count / (time.perf_counter() - started)
+
+
+async def bench_local(args):
+    async with FakePokerServer(latency=args.latency, auto_deal=False) as server:
+        # The blocking client must run off-loop here or it would stall the server it talks to.
+        before = await asyncio.to_thread(bench_blocking, server.graphql_url, args.count, args.table_id)
+        after = await bench_async(server.graphql_url, args.count, args.concurrency, args.table_id)
+    return before, after
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:3000/graphql")
+    parser.add_argument("-n", "--count", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("--table-id", default="bench-mutations")
+    parser.add_argument("--local", action="store_true", help="benchmark against an in-process stand-in server")
+    parser.add_argument("--latency", type=float, default=0.0, help="stand-in server latency per request")
+    args = parser.parse_args(argv)
+
+    if args.local:
+        before, after = asyncio.run(bench_local(args))
+    else:
+        before = bench_blocking(args.url, args.count, args.table_id)
+        after = asyncio.run(bench_async(args.url, args.count, args.concurrency, args.table_id))
+    print(f"blocking requests.post : {before:10.1f} mutations/sec")
+    print(f"pooled async client    : {after:10.1f} mutations/sec (concurrency {args.concurrency})")
+    print(f"speedup                : {after / before:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
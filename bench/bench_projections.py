@@ -0,0 +1,92 @@
+"""
+Bytes per frame and decode cost of each subscription projection profile.
+
+Plays the same scripted hands on a local stand-in server (projecting both
+``deal`` and ``handEvent`` frames) once per profile, with one observer
+subscribed to every table through that profile, plus once with the suites'
+own documents (``full``). Reports per profile and field the frames seen,
+mean bytes per frame, bytes per hand per table, and the time to parse and
+decode a frame with :func:`src.events.decode_frame`.
+
+    python -m bench.bench_projections --tables 20 --hands 10
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from src.client import GraphQLClient
+from src.events import decode_frame
+from src.fake_server import FakePokerServer
+from src.load import SCRIPTS, run_load
+from src.metrics import MetricsRegistry
+from src.projections import PROFILES
+from src.recorder import frame_identity
+from src.subscriptions import GraphQLWSConnection
+
+
+class FrameSizes:
+    """Recorder keeping every raw frame by field."""
+
+    def __init__(self):
+        self.frames = {}
+
+    def record(self, subscriber_id, frame, raw=None, received_ns=None):
+        field, _ = frame_identity(frame)
+        self.frames.setdefault(field, []).append(raw if raw is not None else json.dumps(frame))
+
+
+async def measure(server, profile, tables, hands, script):
+    sizes = FrameSizes()
+    projection = None if profile == "full" else profile
+    async with GraphQLClient(server.graphql_url) as client:
+        async with GraphQLWSConnection(server.ws_url, recorder=sizes, metrics=MetricsRegistry()) as observer:
+            report = await run_load(
+                client, tables, hands, script, observer=observer, prefix=f"bench-{profile}", projection=projection
+            )
+    return report.hands, sizes.frames
+
+
+def decode_seconds(raw_frames, rounds=3):
+    """Best of ``rounds`` timings of parsing and decoding every frame."""
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for raw in raw_frames:
+            decode_frame(raw)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+async def _main(args):
+    script = SCRIPTS[args.script]
+    async with FakePokerServer(auto_deal=False, project_subscriptions=True) as server:
+        results = [(p, *await measure(server, p, args.tables, args.hands, script)) for p in ("full",) + PROFILES]
+    baseline = None
+    print(f"{'profile':<9} {'field':<10} {'frames':>7} {'bytes/frame':>12} {'bytes/hand':>11} {'decode':>13}")
+    for profile, hands, frames in results:
+        total = 0
+        for field, raw_frames in sorted(frames.items()):
+            size = sum(map(len, raw_frames))
+            total += size
+            per_frame = decode_seconds(raw_frames) / len(raw_frames)
+            print(
+                f"{profile:<9} {field:<10} {len(raw_frames):>7} {size / len(raw_frames):>12.0f} "
+                f"{size / hands:>11.0f} {per_frame * 1e6:>8.2f} us/fr"
+            )
+        baseline = baseline or total
+        print(f"{profile:<9} {'total':<10} {'':>7} {'':>12} {total / hands:>11.0f}   ({total / baseline:.1%} of full)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=20)
+    parser.add_argument("--hands", type=int, default=10, help="hands per table")
+    parser.add_argument("--script", choices=sorted(SCRIPTS), default="showdown")
+    asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+playTurn request size and client encode time: dict payload vs the query registry.
+
+    python -m bench.bench_queries -n 200000
+"""
+
+import argparse
+import json
+import timeit
+
+from src.play import play_turn_payload
+from src.queries import PLAY_TURN_MUTATION
+
+HAND_ID = "6f1c1d2e-8a41-4d43-9d0e-52f0a2c3b7aa"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--count", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    variables = play_turn_payload(HAND_ID, "player_three", "BET", 20.0)["variables"]
+    cases = {
+        "json.dumps(play_turn_payload)": lambda: json.dumps(
+            play_turn_payload(HAND_ID, "player_three", "BET", 20.0)
+        ).encode(),
+        "registry, full text": lambda: PLAY_TURN_MUTATION.encode(variables),
+        "registry, persisted hash only": lambda: PLAY_TURN_MUTATION.encode(
+            variables, persisted=True, include_text=False
+        ),
+    }
+    baseline_bytes = baseline_time = None
+    for name, encode in cases.items():
+        size = len(encode())
+        seconds = timeit.timeit(encode, number=args.count) / args.count
+        baseline_bytes = baseline_bytes or size
+        baseline_time = baseline_time or seconds
+        print(
+            f"{name:<32} {size:5d} bytes ({size / baseline_bytes:6.1%})  "
+            f"{seconds * 1e6:6.2f} us/request ({seconds / baseline_time:6.1%})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Throughput of the streaming validator on recorded-style handEvent frames.
+
+Plays random legal hands straight through the stand-in's engine (no
+network), keeps each hand's ``deal`` frame and every ``handEvent`` frame as
+the server would send them to a table observer, then times ``json.loads``
+alone and ``json.loads`` plus :meth:`HandValidator.record` per frame.
+
+    python -m bench.bench_validator --hands 5000
+"""
+
+import argparse
+import json
+import random
+import time
+
+from src.fake_server import PokerEngine
+from src.fuzzer import choose_action, random_table
+from src.metrics import MetricsRegistry
+from src.validator import HandValidator
+
+
+def play_frames(hands, seed=0):
+    """Server-shaped ``deal`` and ``handEvent`` frames of ``hands`` random hands, interleaved."""
+    rng = random.Random(seed)
+    engine = PokerEngine(seed)
+    streams = []
+    for i in range(hands):
+        players, stacks = random_table(rng, f"bench-{i}")
+        hand = engine.deal(f"bench-{i}", [{"id": p, "stack": stacks[p]} for p in players])
+        deal = {"data": {"deal": {"mutationType": "CREATED", "id": hand.id, "deal": hand.to_dict()}}}
+        frames = [json.dumps({"type": "data", "id": "deal", "payload": deal})]
+        while not hand.is_complete:
+            actor = hand.next_actor()
+            top = max(s.bet for s in hand.seats)
+            action, amount = choose_action(rng, actor.bet, actor.stack, top)
+            hand.play(actor.id, action, amount)
+            payload = {"data": {"handEvent": hand.hand_event()}}
+            frames.append(json.dumps({"type": "data", "id": hand.id, "payload": payload}))
+        streams.append(frames)
+    # Round-robin across hands, as frames from many tables arrive on a load run.
+    interleaved = []
+    for step in range(max(len(f) for f in streams)):
+        interleaved.extend(f[step] for f in streams if step < len(f))
+    return interleaved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hands", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    frames = play_frames(args.hands)
+    loads = json.loads
+    started = time.perf_counter()
+    for raw in frames:
+        loads(raw)
+    parse = time.perf_counter() - started
+    # Parse inside the timed loop, as a connection does per frame it receives.
+    validator = HandValidator(metrics=MetricsRegistry())
+    started = time.perf_counter()
+    for raw in frames:
+        validator.record("bench", loads(raw))
+    total = time.perf_counter() - started
+
+    print(validator.report.summary())
+    print(f"json.loads       {parse / len(frames) * 1e6:6.2f} us/frame")
+    print(f"validator.record {(total - parse) / len(frames) * 1e6:6.2f} us/frame")
+    print(f"together         {len(frames) / total:10,.0f} frames/sec")
+
+
+if __name__ == "__main__":
+    main()
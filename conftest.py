@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--local-server",
+        action="store_true",
+        help="serve the in-process stand-in API on localhost:3000 for the live suites",
+    )
+    parser.addoption(
+        "--metrics-out",
+        help="write test timings and client metrics (Prometheus text, or JSON for a .json path)",
+    )
+
+
+def pytest_runtest_logreport(report):
+    if report.when == "call":
+        from src.metrics import METRICS
+
+        METRICS.histogram("test_duration_seconds", module=report.nodeid.split("::")[0], outcome=report.outcome).record(
+            report.duration
+        )
+
+
+def pytest_sessionfinish(session):
+    path = session.config.getoption("--metrics-out")
+    if path:
+        from src.metrics import METRICS
+
+        METRICS.write(path)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def local_server(request):
+    if not request.config.getoption("--local-server"):
+        yield None
+        return
+
+    from src.fake_server import FakePokerServer
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = asyncio.run_coroutine_threadsafe(FakePokerServer(port=3000).start(), loop).result()
+    try:
+        yield server
+    finally:
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
@@ -0,0 +1,316 @@
+"""
+Slow consumers on subscription fan-out: does one bad link hurt the table?
+
+Seats healthy and slow subscribers at the same tables, each on its own
+graphql-ws socket subscribed to the table's ``handEvent`` stream, and plays
+check-down hands at the pace of the healthy ones. Slow subscribers read
+their socket in one of the :data:`MODES`: throttled to a fixed delay per
+frame, stalling for seconds at a time, throttled on a shrunken receive
+buffer, or not at all after the first frame. Because they stop reading, TCP
+pushes back on the server, which then has to buffer, drop or disconnect.
+aiohttp itself buffers up to 512 KiB per socket before it stops reading, so
+a backlog must outgrow that (and the kernel's buffers) to reach the server;
+``--send-buffer`` shrinks the stand-in's socket send buffers to get there
+sooner.
+
+Latency is per subscriber from the ``playTurn`` POST to the frame being
+read (as in :mod:`src.fanout`) and reported per mode. A baseline run with
+only fast subscribers shows whether the slow ones degrade everybody else.
+For each slow mode the report gives frames delivered and missing, sockets
+the server closed, and how long the backlog took to drain after the last
+hand (frames that all arrive late mean they were buffered server-side).
+
+    python -m src.backpressure --local --tables 4 --hands 40 --mix fast,fast,throttled
+    python -m src.backpressure --local --send-buffer 4096 --max-queue 100 --slow-policy close --mix fast,frozen
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import aiohttp
+
+from .client import GRAPHQL_URL, GraphQLClient
+from .fanout import FanOutTracker
+from .load import PERCENTILES, check_down_script, percentile, table_players
+from .metrics import METRICS, MetricsRegistry
+from .play import hand_event_subscription
+from .subscriptions import WS_URL, GraphQLWSConnection, wait_ready
+
+DRAIN_SECONDS = 10.0
+DRAIN_POLL_SECONDS = 0.05
+
+
+@dataclass(frozen=True)
+class ConsumerMode:
+    """How a subscriber reads its socket."""
+
+    name: str
+    read_delay: float = 0.0
+    stall_every: float = 0.0
+    stall_for: float = 0.0
+    receive_buffer: int = 0
+
+    @property
+    def slow(self):
+        return bool(self.read_delay or self.stall_for or self.receive_buffer)
+
+    def throttle(self):
+        """A fresh ``throttle`` for :class:`~src.subscriptions.GraphQLWSConnection`, or ``None``."""
+        if not (self.read_delay or self.stall_for):
+            return None
+        next_stall = time.monotonic() + self.stall_every
+
+        async def throttle():
+            nonlocal next_stall
+            if self.read_delay:
+                await asyncio.sleep(self.read_delay)
+            if self.stall_for and time.monotonic() >= next_stall:
+                await asyncio.sleep(self.stall_for)
+                next_stall = time.monotonic() + self.stall_every
+
+        return throttle
+
+
+MODES = {
+    mode.name: mode
+    for mode in (
+        ConsumerMode("fast"),
+        ConsumerMode("throttled", read_delay=0.02),
+        ConsumerMode("stalling", stall_every=0.5, stall_for=2.0),
+        ConsumerMode("tiny-buffer", read_delay=0.005, receive_buffer=4096),
+        ConsumerMode("frozen", stall_for=3600.0),
+    )
+}
+
+
+@dataclass
+class ModeReport:
+    mode: str
+    subscribers: int = 0
+    expected: int = 0
+    delivered: int = 0
+    closed: int = 0
+    drain: float = None
+    latencies: list = field(default_factory=list)
+
+    @property
+    def missing(self):
+        return self.expected - self.delivered
+
+    def percentiles(self):
+        values = sorted(self.latencies)
+        return {f"p{pct:g}": percentile(values, pct) for pct in PERCENTILES}
+
+
+@dataclass
+class BackpressureReport:
+    tables: int
+    hands: int = 0
+    elapsed: float = 0.0
+    modes: dict = field(default_factory=dict)
+    server: dict = field(default_factory=dict)
+
+    def summary(self):
+        lines = [f"tables={self.tables} hands={self.hands} elapsed={self.elapsed:.2f}s"]
+        for name, mode in self.modes.items():
+            cols = " ".join(f"{k}={v * 1000:9.2f}ms" for k, v in mode.percentiles().items())
+            drain = "-" if not MODES[name].slow else "never" if mode.drain is None else f"{mode.drain:.2f}s"
+            lines.append(
+                f"  {name:<12} subscribers={mode.subscribers:<4} delivered={mode.delivered}/{mode.expected} "
+                f"missing={mode.missing} closed={mode.closed} drain={drain}"
+            )
+            lines.append(f"  {'':<12} {cols}")
+        if self.server:
+            lines.append("  server " + " ".join(f"{k}={v}" for k, v in self.server.items()))
+        return "\n".join(lines)
+
+
+def degradation(baseline, mixed, mode="fast"):
+    """Ratio of ``mode``'s latency percentiles in ``mixed`` to those in ``baseline``."""
+    before = baseline.modes[mode].percentiles()
+    after = mixed.modes[mode].percentiles()
+    return {k: after[k] / before[k] if before[k] else float("inf") for k in before}
+
+
+def small_buffer_session(size):
+    """A ``ClientSession`` whose sockets get a ``size``-byte receive buffer before they connect."""
+
+    def socket_factory(addr_info):
+        family, type_, proto, _, _ = addr_info
+        sock = socket.socket(family=family, type=type_, proto=proto)
+        # Set before connect so the small window is what the server sees from the start.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+        return sock
+
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(socket_factory=socket_factory))
+
+
+async def _seat(sessions, ws_url, table_id, player, mode, tracker):
+    session = sessions.get(mode.receive_buffer)
+    if session is None:
+        session = sessions[mode.receive_buffer] = small_buffer_session(mode.receive_buffer)
+    connection = GraphQLWSConnection(
+        ws_url, user_token=player, table_token=table_id, session=session, recorder=tracker, throttle=mode.throttle()
+    )
+    await connection.connect()
+    subscription = await connection.subscribe(
+        hand_event_subscription, "OnHandEvent", extra_payload={"x-table-token": table_id}
+    )
+    return connection, subscription
+
+
+async def play_table(client, sessions, ws_url, trackers, seats, table_id, mix, hands, report):
+    """Play ``hands`` check-down hands, waiting on the fast subscribers after every action."""
+    players = table_players(table_id, len(mix))
+    opened = await asyncio.gather(
+        *(_seat(sessions, ws_url, table_id, p, MODES[m], trackers[m]) for p, m in zip(players, mix))
+    )
+    seats += [(MODES[m], connection) for m, (connection, _) in zip(mix, opened)]
+    await wait_ready([subscription for _, subscription in opened])
+    fast = [subscription for m, (_, subscription) in zip(mix, opened) if not MODES[m].slow]
+    by_mode = {m: [p for p, pm in zip(players, mix) if pm == m] for m in set(mix)}
+    script = check_down_script(len(mix))
+    for _ in range(hands):
+        hand_id = await client.deal(players, table_id=table_id)
+        for m, subscribers in by_mode.items():
+            trackers[m].expect(hand_id, subscribers)
+        for index, action, amount in script:
+            for m in by_mode:
+                trackers[m].mutation_sent(hand_id, players[index])
+            await client.play_turn(hand_id, players[index], action, amount, table_id=table_id)
+            await asyncio.gather(*(s.next() for s in fast))
+        report.hands += 1
+
+
+def _delivered(tracker):
+    return sum(sum(hand.received.values()) for hand in tracker.hands.values())
+
+
+def _expected(tracker):
+    return sum(len(hand.sent) * len(hand.subscribers) for hand in tracker.hands.values())
+
+
+async def _drain(trackers, seats, report, timeout):
+    """Wait for every open slow subscriber to catch up; note how long each mode took."""
+    started = time.perf_counter()
+    pending = {name for name, mode in report.modes.items() if MODES[name].slow}
+    while pending and time.perf_counter() - started < timeout:
+        for name in list(pending):
+            open_behind = _delivered(trackers[name]) < _expected(trackers[name]) and any(
+                mode.name == name and not connection.closed for mode, connection in seats
+            )
+            if not open_behind:
+                report.modes[name].drain = time.perf_counter() - started
+                pending.discard(name)
+        if pending:
+            await asyncio.sleep(DRAIN_POLL_SECONDS)
+
+
+async def run_backpressure(
+    client, ws_url=WS_URL, tables=4, hands=20, mix=("fast", "fast", "throttled"), drain=DRAIN_SECONDS, prefix="bp"
+):
+    """Play ``hands`` hands on ``tables`` tables seated with subscribers reading as ``mix`` says."""
+    run_id = uuid.uuid4().hex[:8]
+    report = BackpressureReport(tables=tables)
+    trackers = {m: FanOutTracker(metrics=MetricsRegistry()) for m in mix}
+    seats = []
+    for m in mix:
+        report.modes[m] = ModeReport(m)
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        # Sessions by receive buffer size; 0 is the default-buffer one.
+        sessions = {0: session}
+        try:
+            await asyncio.gather(
+                *(
+                    play_table(client, sessions, ws_url, trackers, seats, f"{prefix}-{run_id}-{i}", mix, hands, report)
+                    for i in range(tables)
+                )
+            )
+            report.elapsed = time.perf_counter() - started
+            await _drain(trackers, seats, report, drain)
+            for mode, connection in seats:
+                report.modes[mode.name].subscribers += 1
+                report.modes[mode.name].closed += connection.closed
+        finally:
+            await asyncio.gather(*(connection.close() for _, connection in seats))
+            await asyncio.gather(*(s.close() for size, s in sessions.items() if size))
+    for name, tracker in trackers.items():
+        mode = report.modes[name]
+        mode.expected = _expected(tracker)
+        mode.delivered = _delivered(tracker)
+        for samples in tracker.report().per_subscriber.values():
+            mode.latencies += samples
+        for value in mode.latencies:
+            METRICS.histogram("backpressure_seconds", mode=name).record(value)
+    return report
+
+
+async def _main(args):
+    server = None
+    url, ws_url = args.url, args.ws_url
+    if args.local:
+        from .fake_server import FakePokerServer
+
+        server = FakePokerServer(
+            auto_deal=False, max_queue=args.max_queue, slow_policy=args.slow_policy, send_buffer=args.send_buffer
+        )
+        await server.start()
+        url, ws_url = server.graphql_url, server.ws_url
+    try:
+        async with GraphQLClient(url) as client:
+            fast_only = tuple("fast" for _ in args.mix)
+            baseline = await run_backpressure(client, ws_url, args.tables, args.hands, fast_only, args.drain)
+            if server is not None:
+                server.dropped_frames = server.slow_closes = server.max_queue_depth = 0
+            mixed = await run_backpressure(client, ws_url, args.tables, args.hands, args.mix, args.drain)
+        if server is not None:
+            mixed.server = {
+                "dropped_frames": server.dropped_frames,
+                "slow_closes": server.slow_closes,
+                "max_queue_depth": server.max_queue_depth,
+            }
+    finally:
+        if server is not None:
+            await server.stop()
+    print("baseline (all fast)")
+    print(baseline.summary())
+    print(f"with {','.join(args.mix)}")
+    print(mixed.summary())
+    if "fast" in args.mix:
+        ratios = " ".join(f"{k}={v:.2f}x" for k, v in degradation(baseline, mixed).items())
+        print(f"fast subscriber latency vs baseline: {ratios}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=GRAPHQL_URL)
+    parser.add_argument("--ws-url", default=WS_URL)
+    parser.add_argument("--local", action="store_true", help="run against an in-process stand-in server")
+    parser.add_argument("--max-queue", type=int, help="with --local, frames a subscriber may fall behind")
+    parser.add_argument(
+        "--slow-policy", choices=("drop", "close"), default="drop", help="with --local, what happens past --max-queue"
+    )
+    parser.add_argument("--send-buffer", type=int, help="with --local, SO_SNDBUF bytes for each subscriber socket")
+    parser.add_argument("--tables", type=int, default=4)
+    parser.add_argument("--hands", type=int, default=20)
+    parser.add_argument(
+        "--mix",
+        type=lambda s: tuple(s.split(",")),
+        default=("fast", "fast", "throttled"),
+        help=f"one mode per seat, from {', '.join(MODES)}",
+    )
+    parser.add_argument("--drain", type=float, default=DRAIN_SECONDS, help="seconds to wait for slow subscribers")
+    args = parser.parse_args(argv)
+    unknown = set(args.mix) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+
+from .deal import deal_mutation_headers, deal_mutation_params
+from .metrics import METRICS
+from .play import play_turn_headers, play_turn_payload
+from .queries import DEAL_MUTATION, HAND_QUERY, PLAY_TURN_MUTATION, Query
+
+GRAPHQL_URL = "http://localhost:3000/graphql"
+HTTP_TIMEOUT_SECONDS = 5
+MAX_CONNECTIONS = 64
+KEEPALIVE_SECONDS = 30
+JSON_HEADERS = {"Content-Type": "application/json"}
+MAX_BATCH_SIZE = 100
+# Statuses a server without batch support answers a JSON array with.
+_BATCH_REFUSED_STATUSES = (400, 404, 405, 415, 422)
+# A batch over the server's body limit: it is split and retried, not a refusal of batching.
+_BATCH_TOO_LARGE_STATUS = 413
+
+# Errors meaning a hash-only request was rejected before execution.
+PERSISTED_QUERY_NOT_FOUND = "PersistedQueryNotFound"
+PERSISTED_QUERY_NOT_SUPPORTED = "PersistedQueryNotSupported"
+_MISSING_DOCUMENT_MESSAGES = ("no operation provided", "must provide query", "missing query")
+
+
+def _persisted_query_rejection(response):
+    """Return NOT_FOUND/NOT_SUPPORTED when a hash-only request was refused, else None."""
+    for error in response.get("errors") or ():
+        code = (error.get("extensions") or {}).get("code", "")
+        message = error.get("message", "")
+        if message == PERSISTED_QUERY_NOT_FOUND or code == "PERSISTED_QUERY_NOT_FOUND":
+            return PERSISTED_QUERY_NOT_FOUND
+        if (
+            message == PERSISTED_QUERY_NOT_SUPPORTED
+            or code == "PERSISTED_QUERY_NOT_SUPPORTED"
+            or any(m in message.lower() for m in _MISSING_DOCUMENT_MESSAGES)
+        ):
+            return PERSISTED_QUERY_NOT_SUPPORTED
+    return None
+
+
+class GraphQLError(Exception):
+    """Raised when a GraphQL response carries an ``errors`` list."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class GraphQLClient:
+    """Asyncio GraphQL client sharing one keep-alive connection pool.
+
+    All requests go through a single ``aiohttp.ClientSession`` whose connector
+    is bounded by ``max_connections``, so many ``deal``/``play_turn``/``hand``
+    coroutines can be gathered without blocking the event loop or opening a
+    new TCP connection per mutation.
+
+    Registered :class:`~src.queries.Query` documents are sent as automatic
+    persisted queries: the first request carries text and hash, later ones the
+    hash only. A server that does not support them is detected from the
+    refused hash-only request, which is then resent with the full text.
+
+    :meth:`execute_batch` sends many operations as JSON-array batches and
+    falls back to one request per operation once a server refuses a batch.
+
+    Every :meth:`execute` is timed into ``metrics`` as
+    ``graphql_request_seconds{operation=...}``, with request bytes and
+    errors counted alongside.
+    """
+
+    def __init__(
+        self,
+        url=GRAPHQL_URL,
+        table_id="123",
+        max_connections=MAX_CONNECTIONS,
+        timeout=HTTP_TIMEOUT_SECONDS,
+        persisted_queries=True,
+        batching=True,
+        metrics=METRICS,
+    ):
+        self.url = url
+        self.table_id = table_id
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.persisted_queries = persisted_queries
+        self.batching = batching
+        self._batching_confirmed = False
+        self.metrics = metrics
+        self._registered = set()
+        self._session = None
+        self._timers = {}
+        self._requests = metrics.counter("graphql_requests_total")
+        self._request_bytes = metrics.counter("graphql_request_bytes_total")
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections,
+                keepalive_timeout=KEEPALIVE_SECONDS,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            raise RuntimeError("GraphQLClient is not open; use 'async with GraphQLClient()'")
+        return self._session
+
+    async def post(self, payload, headers=None):
+        """POST a raw GraphQL payload and return the decoded JSON response."""
+        return await self.post_body(json.dumps(payload).encode(), headers)
+
+    async def post_body(self, body, headers=None):
+        """POST an already encoded JSON body and return the decoded response."""
+        self._requests.inc()
+        self._request_bytes.inc(len(body))
+        async with self.session.post(self.url, data=body, headers={**JSON_HEADERS, **(headers or {})}) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    async def execute(self, query, variables=None, headers=None, operation_name=None):
+        """Run a :class:`Query` from the registry or an ad-hoc document string."""
+        name = query.name if isinstance(query, Query) else operation_name or "adhoc"
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = self.metrics.histogram("graphql_request_seconds", operation=name)
+        started = time.perf_counter_ns()
+        try:
+            if isinstance(query, Query):
+                return self._data(await self.send_registered(query, variables, headers))
+            payload = {"query": query, "variables": variables or {}}
+            if operation_name is not None:
+                payload["operationName"] = operation_name
+            return self._data(await self.post(payload, headers))
+        except Exception as exc:
+            self.metrics.counter("graphql_errors_total", operation=name, error=type(exc).__name__).inc()
+            raise
+        finally:
+            timer.record_ns(time.perf_counter_ns() - started)
+
+    async def send_registered(self, query, variables=None, headers=None):
+        if not self.persisted_queries:
+            return await self.post_body(query.encode(variables), headers)
+        if query.sha256 in self._registered:
+            response = await self.post_body(query.encode(variables, persisted=True, include_text=False), headers)
+            rejection = _persisted_query_rejection(response)
+            if rejection is None:
+                return response
+            self._registered.discard(query.sha256)
+            if rejection == PERSISTED_QUERY_NOT_SUPPORTED:
+                self.persisted_queries = False
+                return await self.post_body(query.encode(variables), headers)
+        response = await self.post_body(query.encode(variables, persisted=True), headers)
+        self._registered.add(query.sha256)
+        return response
+
+    def _encode_operation(self, query, variables=None, operation_name=None):
+        """Encode one batch entry; also return whether it registers a persisted hash."""
+        if not isinstance(query, Query):
+            payload = {"query": query, "variables": variables or {}}
+            if operation_name is not None:
+                payload["operationName"] = operation_name
+            return json.dumps(payload, separators=(",", ":")).encode(), False
+        if not self.persisted_queries:
+            return query.encode(variables), False
+        registers = query.sha256 not in self._registered
+        return query.encode(variables, persisted=True, include_text=registers), registers
+
+    async def _send_batch(self, operations, headers):
+        """POST ``operations`` as one array; ``None`` when the server refuses batches.
+
+        Only a refusal status counts as one, as the server has run nothing
+        then. A batch too large for the server is sent again in halves.
+        """
+        encoded = [self._encode_operation(*operation) for operation in operations]
+        body = b"[" + b",".join(body for body, _ in encoded) + b"]"
+        started = time.perf_counter_ns()
+        try:
+            responses = await self.post_body(body, headers)
+        except aiohttp.ClientResponseError as exc:
+            if exc.status in _BATCH_REFUSED_STATUSES:
+                return None
+            if exc.status == _BATCH_TOO_LARGE_STATUS and len(operations) > 1:
+                return await self._send_halves(operations, headers)
+            raise
+        finally:
+            self.metrics.histogram("graphql_request_seconds", operation="batch").record_ns(
+                time.perf_counter_ns() - started
+            )
+        if not isinstance(responses, list) or len(responses) != len(operations):
+            # The server may have run some of the batch: resending it could apply mutations twice.
+            got = f"{len(responses)} responses" if isinstance(responses, list) else "no array"
+            raise GraphQLError([{"message": f"batch of {len(operations)} operations answered with {got}"}])
+        self._batching_confirmed = True
+        self.metrics.counter("graphql_batched_operations_total").inc(len(operations))
+
+        results = []
+        for operation, (_, registers), response in zip(operations, encoded, responses):
+            query, variables = operation[0], operation[1]
+            if isinstance(query, Query) and _persisted_query_rejection(response) is not None:
+                self._registered.discard(query.sha256)
+                response = await self.send_registered(query, variables, headers)
+            elif registers:
+                self._registered.add(query.sha256)
+            try:
+                results.append(self._data(response))
+            except GraphQLError as exc:
+                name = query.name if isinstance(query, Query) else "adhoc"
+                self.metrics.counter("graphql_errors_total", operation=name, error="GraphQLError").inc()
+                results.append(exc)
+        return results
+
+    async def _send_halves(self, operations, headers):
+        """Send ``operations`` as two batches, one after the other to keep their order."""
+        middle = len(operations) // 2
+        first = await self._send_batch(operations[:middle], headers)
+        if first is None:
+            return None
+        second = await self._send_batch(operations[middle:], headers)
+        if second is None:
+            second = await self._execute_each(operations[middle:], headers, ordered=True)
+        return first + second
+
+    async def _execute_each(self, operations, headers, ordered):
+        if ordered:
+            results = []
+            for query, variables, *rest in operations:
+                try:
+                    results.append(await self.execute(query, variables, headers, *rest))
+                except GraphQLError as exc:
+                    results.append(exc)
+            return results
+        return await asyncio.gather(
+            *(self.execute(query, variables, headers, *rest) for query, variables, *rest in operations),
+            return_exceptions=True,
+        )
+
+    async def execute_batch(
+        self, operations, headers=None, ordered=False, batch_size=MAX_BATCH_SIZE, return_exceptions=False
+    ):
+        """Run ``(query, variables[, operation_name])`` entries; return their data in order.
+
+        With batching, entries go out ``batch_size`` per request, the
+        requests in flight together unless ``ordered``. Servers run a batch's
+        entries in order; ``ordered`` also keeps whole batches (and the
+        fallback's single requests) strictly one after another. A refused
+        batch turns batching off for this client and its entries are sent
+        as individual requests pipelined over the connection pool; one the
+        server finds too large (413) is split instead.
+
+        A failed entry raises its :class:`GraphQLError`, or is returned in
+        its place with ``return_exceptions``.
+        """
+        operations = [tuple(operation) for operation in operations]
+        chunks = [operations[i : i + batch_size] for i in range(0, len(operations), batch_size)]
+        if not self.batching:
+            results = await self._execute_each(operations, headers, ordered)
+        else:
+            if ordered:
+                chunk_results = []
+                for chunk in chunks:
+                    result = await self._send_batch(chunk, headers) if self.batching else None
+                    if result is None:
+                        self.batching = False
+                    chunk_results.append(result)
+            else:
+                chunk_results = []
+                if not self._batching_confirmed and chunks:
+                    # Probe with one batch before fanning out the rest.
+                    chunk_results.append(await self._send_batch(chunks[0], headers))
+                    if chunk_results[0] is None:
+                        self.batching = False
+                rest = chunks[len(chunk_results) :]
+                if self.batching:
+                    chunk_results += await asyncio.gather(*(self._send_batch(chunk, headers) for chunk in rest))
+                else:
+                    chunk_results += [None] * len(rest)
+            refused = [op for chunk, result in zip(chunks, chunk_results) if result is None for op in chunk]
+            fallback = iter(await self._execute_each(refused, headers, ordered) if refused else ())
+            results = []
+            for chunk, result in zip(chunks, chunk_results):
+                results.extend(result if result is not None else [next(fallback) for _ in chunk])
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        return results
+
+    async def deal_many(self, deals):
+        """Deal ``(players, stacks, table_id)`` entries as a batch; return the hand ids."""
+        operations = [
+            (DEAL_MUTATION, deal_mutation_params(players, stacks, table_id or self.table_id))
+            for players, stacks, table_id in deals
+        ]
+        return [data["deal"] for data in await self.execute_batch(operations, headers=deal_mutation_headers)]
+
+    async def hands(self, hand_ids, query=HAND_QUERY):
+        """Fetch many hands as a batch, in ``hand_ids`` order."""
+        return [data["hand"] for data in await self.execute_batch([(query, {"id": h}) for h in hand_ids])]
+
+    async def deal(self, players, stacks=None, table_id=None):
+        """Deal a hand and return its id."""
+        data = await self.execute(
+            DEAL_MUTATION,
+            deal_mutation_params(players, stacks, table_id or self.table_id),
+            headers=deal_mutation_headers,
+        )
+        return data["deal"]
+
+    async def play_turn(self, hand_id, player, action, amount, table_id=None):
+        """Play one action and return the hand id echoed by the server."""
+        data = await self.execute(
+            PLAY_TURN_MUTATION,
+            play_turn_payload(hand_id, player, action, amount)["variables"],
+            headers=play_turn_headers(player, hand_id, table_id or self.table_id),
+        )
+        return data["playTurn"]
+
+    async def hand(self, hand_id, query=HAND_QUERY):
+        return (await self.execute(query, {"id": hand_id}))["hand"]
+
+    @staticmethod
+    def _data(response):
+        if response.get("errors"):
+            raise GraphQLError(response["errors"])
+        return response["data"]
@@ -54,13 +54,13 @@ mutation DealHand($dealInput: DealInput!) {
 """
 
 
-def deal_mutation_params(players, stacks=None):
+def deal_mutation_params(players, stacks=None, table_id="123"):
     if stacks is None:
         stacks = {p: 1000.0 for p in players}
     return {
         "dealInput": {
             "players": [{"id": p, "stack": stacks.get(p, 1000.0)} for p in players],
-            "tableId": "123",
+            "tableId": table_id,
         }
     }
 
@@ -68,12 +68,12 @@ def deal_mutation_params(players, stacks=None):
 deal_mutation_headers = {"X-User-Token": "", "X-Table-Token": ""}
 
 
-def execute_deal_mutation(players, stacks=None):
+def execute_deal_mutation(players, stacks=None, table_id="123"):
     deal = requests.post(
         "http://localhost:3000/graphql",
         json={
             "query": deal_mutation_query,
-            "variables": deal_mutation_params(players, stacks),
+            "variables": deal_mutation_params(players, stacks, table_id),
         },
         headers=deal_mutation_headers,
         timeout=HTTP_TIMEOUT_SECONDS,
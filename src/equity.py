@@ -0,0 +1,259 @@
+"""
+Monte Carlo equity of dealt hands per street, across a process pool.
+
+Every ``deal`` frame carries each player's hole cards and the whole board,
+so each hand's equity can be estimated on every street: the unseen board
+cards are resampled ``trials`` times and each player's share of the pot is
+averaged. Streets with at most ``trials`` possible run-outs (the turn and
+the river) are enumerated exactly instead. Hands are grouped by table size,
+cut into ``chunk_size`` chunks and spread over ``workers`` processes. Each
+chunk gets its own child of one ``SeedSequence``, so results depend only on
+``seed`` and ``chunk_size``, never on the number of workers.
+
+Over many hands the per-seat averages double as deal-fairness statistics:
+card frequencies should be uniform, every seat's preflop equity should be
+``1/n``, and what each seat actually won should track its equity.
+
+    python -m src.equity session.jsonl --workers 8 --trials 1000
+    python -m src.equity --random 100000 --players 6 --workers 8
+"""
+
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from . import evaluator
+from .events import DealEvent, decode_frame
+
+STREETS = ("Preflop", "Flop", "Turn", "River")
+BOARD_CARDS = (0, 3, 4, 5)
+DEFAULT_TRIALS = 1000
+DEFAULT_CHUNK_SIZE = 256
+
+
+def deal_arrays(deals):
+    """Group decoded ``Deal`` objects by table size.
+
+    Returns ``{players: (hand_ids, hole, board)}`` with ``hole`` shaped
+    ``(hands, players, 2)`` and ``board`` ``(hands, 5)`` as card indices.
+    """
+    groups = {}
+    for deal in deals:
+        board = (*deal.cards.flop, deal.cards.turn, deal.cards.river)
+        group = groups.setdefault(len(deal.players), ([], []))
+        group[0].append(deal.id)
+        group[1].append([c for p in deal.players for c in p.cards] + list(board))
+    arrays = {}
+    for players, (hand_ids, rows) in groups.items():
+        cards = evaluator.encode(rows)
+        arrays[players] = (hand_ids, cards[:, : 2 * players].reshape(-1, players, 2), cards[:, 2 * players :])
+    return arrays
+
+
+def random_deals(rng, hands, players):
+    """Uniformly shuffled ``(hole, board)`` arrays, for benchmarks and baselines."""
+    deck = np.argsort(rng.random((hands, 52)), axis=1)[:, : 2 * players + 5]
+    return deck[:, : 2 * players].reshape(hands, players, 2), deck[:, 2 * players :]
+
+
+def street_equity(hole, board, trials, rng, evaluate=evaluator.evaluate):
+    """Equity per hand, street and seat as a ``(hands, 4, players)`` array."""
+    hands, players, _ = hole.shape
+    known = np.zeros((hands, 52), dtype=bool)
+    rows = np.arange(hands)[:, None]
+    known[rows, hole.reshape(hands, -1)] = True
+    known[rows, board] = True
+
+    unseen = 52 - 2 * players
+    equity = np.empty((hands, len(STREETS), players))
+    for street, shown in enumerate(BOARD_CARDS):
+        draws = 5 - shown
+        # Cards in a hand or on this street's board; the rest can still come.
+        visible = known.copy()
+        visible[rows, board[:, shown:]] = False
+        if math.comb(unseen - shown, draws) <= trials:
+            remaining = np.argsort(visible, axis=1, kind="stable")[:, : unseen - shown]
+            run_outs = np.array(list(itertools.combinations(range(unseen - shown), draws)), dtype=np.int64)
+            drawn = remaining[:, run_outs.reshape(-1)].reshape(hands, len(run_outs), draws)
+        else:
+            keys = rng.random((hands, trials, 52), dtype=np.float32)
+            keys[np.broadcast_to(visible[:, None, :], keys.shape)] = 2.0
+            drawn = np.argpartition(keys, draws - 1, axis=2)[..., :draws]
+        samples = drawn.shape[1]
+        boards = np.concatenate([np.broadcast_to(board[:, None, :shown], (hands, samples, shown)), drawn], axis=2)
+        cards = np.concatenate(
+            [
+                np.broadcast_to(hole[:, None, :, :], (hands, samples, players, 2)),
+                np.broadcast_to(boards[:, :, None, :], (hands, samples, players, 5)),
+            ],
+            axis=3,
+        )
+        scores = evaluate(cards.reshape(-1, 7)).reshape(hands, samples, players)
+        winners = scores == scores.max(axis=2, keepdims=True)
+        equity[:, street] = (winners / winners.sum(axis=2, keepdims=True)).mean(axis=1)
+    return equity
+
+
+_TABLE = {}
+
+
+def _chunk_equity(hole, board, trials, seed, rank_table=None):
+    evaluate = evaluator.evaluate
+    if rank_table is not None:
+        if rank_table not in _TABLE:
+            from .rank_table import load
+
+            _TABLE[rank_table] = load(rank_table)
+        evaluate = _TABLE[rank_table].evaluate
+    return street_equity(hole, board, trials, np.random.default_rng(seed), evaluate)
+
+
+@dataclass
+class FairnessReport:
+    hands: int = 0
+    card_counts: np.ndarray = field(default_factory=lambda: np.zeros(52, dtype=np.int64))
+    seat_equity: dict = field(default_factory=dict)
+    seat_luck: dict = field(default_factory=dict)
+
+    @property
+    def card_chi2(self):
+        """Chi-squared statistic of dealt-card frequencies against uniform (51 dof)."""
+        expected = self.card_counts.sum() / 52
+        return float(((self.card_counts - expected) ** 2 / expected).sum()) if expected else 0.0
+
+    @property
+    def card_z(self):
+        """Normal approximation of :attr:`card_chi2`; |z| above ~3 is suspicious."""
+        return (self.card_chi2 - 51) / math.sqrt(2 * 51)
+
+    def summary(self):
+        lines = [f"hands={self.hands} card chi2={self.card_chi2:.1f} (51 dof, z={self.card_z:+.2f})"]
+        for players in sorted(self.seat_equity):
+            lines.append(f"  {players} players, mean equity per seat (expected {1 / players:.3f}):")
+            for street, means in zip(STREETS, self.seat_equity[players]):
+                lines.append(f"    {street:<8} " + " ".join(f"{m:.3f}" for m in means))
+            lines.append("    luck z   " + " ".join(f"{z:+.2f}" for z in self.seat_luck[players]))
+        return "\n".join(lines)
+
+
+def fairness(hole, board, equity, report=None):
+    """Fold one table size's hands into a :class:`FairnessReport`.
+
+    Seat luck compares each seat's realized share (the river equity) with its
+    preflop equity, as a z-score over all hands.
+    """
+    report = report if report is not None else FairnessReport()
+    players = hole.shape[1]
+    report.hands += len(hole)
+    report.card_counts += np.bincount(np.concatenate([hole.ravel(), board.ravel()]), minlength=52)
+    report.seat_equity[players] = equity.mean(axis=0)
+    preflop, river = equity[:, 0], equity[:, -1]
+    spread = np.sqrt((preflop * (1 - preflop)).sum(axis=0))
+    report.seat_luck[players] = np.divide((river - preflop).sum(axis=0), spread, out=np.zeros(players), where=spread > 0)
+    return report
+
+
+@dataclass
+class EquityResult:
+    equity: dict
+    fairness: FairnessReport
+    elapsed: float
+
+    def for_hand(self, hand_id):
+        """``(4, players)`` equity array of one hand."""
+        for hand_ids, equity in self.equity.values():
+            if hand_id in hand_ids:
+                return equity[hand_ids.index(hand_id)]
+        raise KeyError(hand_id)
+
+
+def run_equity(
+    groups,
+    trials=DEFAULT_TRIALS,
+    workers=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    seed=0,
+    rank_table=None,
+):
+    """Estimate equity for every hand in ``groups`` (see :func:`deal_arrays`).
+
+    ``workers=0`` computes in this process; ``rank_table`` is a directory of
+    :mod:`src.rank_table` tables each worker maps instead of evaluating.
+    """
+    workers = os.cpu_count() if workers is None else workers
+    jobs = []
+    for players in sorted(groups):
+        _, hole, board = groups[players]
+        for start in range(0, len(hole), chunk_size):
+            jobs.append((players, hole[start : start + chunk_size], board[start : start + chunk_size]))
+    seeds = np.random.SeedSequence(seed).spawn(len(jobs))
+
+    started = time.perf_counter()
+    if workers:
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [
+                pool.submit(_chunk_equity, hole, board, trials, s, rank_table) for (_, hole, board), s in zip(jobs, seeds)
+            ]
+            chunks = [f.result() for f in futures]
+    else:
+        chunks = [_chunk_equity(hole, board, trials, s, rank_table) for (_, hole, board), s in zip(jobs, seeds)]
+    elapsed = time.perf_counter() - started
+
+    equity, report = {}, FairnessReport()
+    for players in sorted(groups):
+        hand_ids, hole, board = groups[players]
+        combined = np.concatenate([c for (n, _, _), c in zip(jobs, chunks) if n == players])
+        equity[players] = (hand_ids, combined)
+        fairness(hole, board, combined, report)
+    return EquityResult(equity, report, elapsed)
+
+
+def read_deals(path):
+    """Decoded ``Deal`` objects from a :class:`~src.recorder.HandRecorder` file, one per hand."""
+    deals = {}
+    with open(path, "rb") as f:
+        for line in f:
+            row = json.loads(line)
+            if row.get("k") != "deal":
+                continue
+            event = decode_frame(row["f"])
+            if isinstance(event, DealEvent) and event.deal is not None and event.deal.cards is not None:
+                deals.setdefault(event.deal.id, event.deal)
+    return list(deals.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", nargs="?", help="HandRecorder JSON-lines file")
+    parser.add_argument("--random", type=int, metavar="HANDS", help="analyse uniformly shuffled deals instead")
+    parser.add_argument("--players", type=int, default=3, help="table size for --random")
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes; 0 runs in this process")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rank-table", help="score from the rank tables in this directory")
+    args = parser.parse_args(argv)
+    if (args.recording is None) == (args.random is None):
+        parser.error("give a recording or --random HANDS")
+
+    if args.random:
+        hole, board = random_deals(np.random.default_rng(args.seed), args.random, args.players)
+        groups = {args.players: ([str(i) for i in range(args.random)], hole, board)}
+    else:
+        groups = deal_arrays(read_deals(args.recording))
+    result = run_equity(groups, args.trials, args.workers, args.chunk_size, args.seed, args.rank_table)
+    hands = result.fairness.hands
+    print(f"{hands} hands x {args.trials} trials in {result.elapsed:.2f}s ({hands / result.elapsed:,.0f} hands/sec)")
+    print(result.fairness.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Vectorized seven-card hand evaluator used as a showdown oracle.
+
+:func:`evaluate` scores a whole ``(hands, cards)`` array of card indices at
+once with NumPy (category in bits 20+, then five tie-break ranks of four
+bits each; higher wins). A server's own ``score`` encoding need not match
+it, so :func:`score_mismatches` checks what any encoding must agree on: the
+category its ``description`` names and how the players of a hand place.
+
+:class:`ShowdownChecker` plugs into
+:class:`~src.subscriptions.GraphQLWSConnection` as its ``recorder``: it pairs
+each hand's ``deal`` frame with its completing ``handEvent`` and, on
+:meth:`~ShowdownChecker.check`, re-scores every showdown seen so far in one
+batch and reports any category, placing or ``winnerId`` the server got wrong.
+
+    python -m src.evaluator --hands 1000000
+"""
+
+import argparse
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .events import DealEvent, HandEvent, decode_frame
+from .metrics import METRICS
+
+RANKS = "23456789TJQKA"
+SUITS = "shdc"
+CATEGORY_NAMES = (
+    "High Card",
+    "Pair",
+    "Two Pair",
+    "Three of a Kind",
+    "Straight",
+    "Flush",
+    "Full House",
+    "Four of a Kind",
+    "Straight Flush",
+)
+
+# Card index = rank * 4 + suit; the lookups map the ASCII bytes of "Ah" etc.
+_RANK_OF_BYTE = np.full(256, -1, dtype=np.int64)
+_SUIT_OF_BYTE = np.full(256, -1, dtype=np.int64)
+_RANK_OF_BYTE[np.frombuffer(RANKS.encode(), dtype=np.uint8)] = np.arange(13)
+_SUIT_OF_BYTE[np.frombuffer(SUITS.encode(), dtype=np.uint8)] = np.arange(4)
+
+_RANK_BITS = 1 << np.arange(13, dtype=np.int64)
+# Highest set bit of a 14-bit mask (-1 for 0), and the top five ranks of a
+# 13-bit rank mask packed into the five kicker slots.
+_HIGH_BIT = np.array([m.bit_length() - 1 for m in range(1 << 14)], dtype=np.int64)
+_TOP5 = np.zeros(1 << 13, dtype=np.int64)
+for _mask in range(1 << 13):
+    _ranks = [r for r in range(12, -1, -1) if _mask >> r & 1][:5]
+    _TOP5[_mask] = sum(r << (16 - 4 * i) for i, r in enumerate(_ranks))
+del _mask, _ranks
+
+
+def encode(hands):
+    """Card-index array of shape ``(len(hands), k)`` for equal-length card lists."""
+    hands = list(hands)
+    if not hands:
+        return np.empty((0, 0), dtype=np.int64)
+    width = len(hands[0])
+    text = np.frombuffer("".join("".join(h) for h in hands).encode(), dtype=np.uint8)
+    if text.size != 2 * width * len(hands):
+        raise ValueError("every hand must have the same number of two-character cards")
+    ranks, suits = _RANK_OF_BYTE[text[0::2]], _SUIT_OF_BYTE[text[1::2]]
+    if (ranks < 0).any() or (suits < 0).any():
+        raise ValueError("unknown card in hands")
+    return (ranks * 4 + suits).reshape(len(hands), width)
+
+
+def _counts(values, size):
+    rows = values.shape[0]
+    offsets = (np.arange(rows, dtype=np.int64) * size)[:, None]
+    return np.bincount((values + offsets).ravel(), minlength=rows * size).reshape(rows, size)
+
+
+def _straight_high(masks):
+    extended = (masks << 1) | (masks >> 12 & 1)  # bit 0 is the ace played low
+    runs = extended & extended >> 1 & extended >> 2 & extended >> 3 & extended >> 4
+    return np.where(runs > 0, _HIGH_BIT[runs] + 3, -1)
+
+
+def evaluate(cards):
+    """Scores for a ``(hands, cards)`` array of card indices (5 to 7 cards each)."""
+    cards = np.asarray(cards, dtype=np.int64)
+    ranks, suits = cards >> 2, cards & 3
+    counts = _counts(ranks, 13)
+    suit_counts = _counts(suits, 4)
+    rank_mask = (counts > 0) @ _RANK_BITS
+
+    flush_suit = suit_counts.argmax(axis=1)
+    has_flush = suit_counts.max(axis=1) >= 5
+    flush_mask = np.where(suits == flush_suit[:, None], _RANK_BITS[ranks], 0).sum(axis=1)
+    flush_high = _straight_high(flush_mask)
+    straight_high = _straight_high(rank_mask)
+
+    # Ranks ordered by (count, rank), like Counter.most_common with rank ties broken high.
+    groups = np.sort(counts * 16 + np.arange(13), axis=1)
+    first, second = groups[:, -1], groups[:, -2]
+    count1, rank1 = first >> 4, first & 15
+    count2, rank2 = second >> 4, second & 15
+    rest1 = rank_mask & ~(1 << rank1)
+    rest2 = rest1 & ~(1 << rank2)
+    kickers1 = _TOP5[rest1] >> 4
+
+    return np.select(
+        [
+            has_flush & (flush_high >= 0),
+            count1 == 4,
+            (count1 == 3) & (count2 >= 2),
+            has_flush,
+            straight_high >= 0,
+            count1 == 3,
+            (count1 == 2) & (count2 == 2),
+            count1 == 2,
+        ],
+        [
+            8 << 20 | flush_high << 16,
+            7 << 20 | rank1 << 16 | _HIGH_BIT[rest1] << 12,
+            6 << 20 | rank1 << 16 | rank2 << 12,
+            5 << 20 | _TOP5[flush_mask],
+            4 << 20 | straight_high << 16,
+            3 << 20 | rank1 << 16 | kickers1 & 0xFF00,
+            2 << 20 | rank1 << 16 | rank2 << 12 | _HIGH_BIT[rest2] << 8,
+            1 << 20 | rank1 << 16 | kickers1 & 0xFFF0,
+        ],
+        _TOP5[rank_mask],
+    )
+
+
+def score_hands(hands):
+    """:func:`evaluate` for card-string lists such as ``["Ah", "Kd", ...]``."""
+    return evaluate(encode(hands))
+
+
+def describe(score):
+    return CATEGORY_NAMES[int(score) >> 20]
+
+
+def category_of(description):
+    """Index in ``CATEGORY_NAMES`` of the hand a description such as "Pair of Aces" names, or ``None``."""
+    text = (description or "").lower()
+    named = [i for i, name in enumerate(CATEGORY_NAMES) if text.startswith(name.lower())]
+    # "Straight Flush" also starts with "Straight".
+    return max(named, key=lambda i: len(CATEGORY_NAMES[i]), default=None)
+
+
+def places(scores):
+    """Each score's place among ``scores``: 0 for the best, ties sharing one."""
+    distinct = sorted(set(scores), reverse=True)
+    return [distinct.index(score) for score in scores]
+
+
+def score_mismatches(hand_id, players, scores):
+    """What a server got wrong about one hand's decoded ``deal`` ``players``, given our ``scores``.
+
+    Returns ``(hand_id, player_id, server, expected)`` tuples: the server's
+    ``description`` and our category name where the category differs,
+    otherwise both places (see :func:`places`) where the server's ``score``
+    ranks the player differently. Fields the server did not send are not
+    checked.
+    """
+    server_scores = [p.score for p in players]
+    server_places = places(server_scores) if None not in server_scores else None
+    our_places = places(scores)
+    mismatches = []
+    for i, player in enumerate(players):
+        category = category_of(player.description)
+        if category is not None and category != int(scores[i]) >> 20:
+            mismatches.append((hand_id, player.id, player.description, describe(scores[i])))
+        elif server_places is not None and server_places[i] != our_places[i]:
+            mismatches.append((hand_id, player.id, server_places[i], our_places[i]))
+    return mismatches
+
+
+@dataclass
+class ShowdownReport:
+    showdowns: int = 0
+    players: int = 0
+    seconds: float = 0.0
+    score_mismatches: list = field(default_factory=list)
+    winner_mismatches: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return not self.score_mismatches and not self.winner_mismatches
+
+    def summary(self):
+        rate = self.players / self.seconds if self.seconds else 0.0
+        return (
+            f"showdowns={self.showdowns} players={self.players} "
+            f"score_mismatches={len(self.score_mismatches)} winner_mismatches={len(self.winner_mismatches)} "
+            f"evaluated {rate:,.0f} hands/sec"
+        )
+
+
+class ShowdownChecker:
+    """Recorder that re-scores every showdown it observes.
+
+    A hand is checked once both its ``deal`` frame (hole cards, board and
+    server scores) and its completing ``handEvent`` (``winnerId`` and who is
+    still in) have been recorded, whichever arrives first and however many
+    subscribers deliver them. Hands that end before showdown are dropped.
+    ``evaluate`` scores a card-index array; pass
+    :meth:`src.rank_table.RankTable.evaluate` for the table-driven path.
+    """
+
+    def __init__(self, metrics=METRICS, evaluate=evaluate):
+        self.evaluate = evaluate
+        self.report = ShowdownReport()
+        self._deals = {}
+        self._finals = {}
+        self._ready = []
+        self._checked = metrics.counter("showdowns_checked_total")
+        self.metrics = metrics
+
+    def record(self, subscriber_id, frame, raw=None, received_ns=None):
+        event = decode_frame(frame)
+        if isinstance(event, DealEvent) and event.deal is not None and event.deal.cards is not None:
+            hand_id = event.deal.id
+            if hand_id not in self._deals:
+                self._deals[hand_id] = event.deal
+                self._pair(hand_id)
+        elif isinstance(event, HandEvent) and event.isComplete:
+            if event.handId not in self._finals:
+                self._finals[event.handId] = event
+                self._pair(event.handId)
+
+    def _pair(self, hand_id):
+        deal, final = self._deals.get(hand_id), self._finals.get(hand_id)
+        if deal is None or final is None:
+            return
+        # Keep both entries as tombstones so repeated frames are ignored.
+        self._deals[hand_id] = self._finals[hand_id] = False
+        if final.streetEvent is not None:
+            live = [p.id for p in final.streetEvent.currentActivePlayers if not p.isInactive]
+        else:
+            live = [p.id for p in deal.players]
+        if len(live) > 1:
+            self._ready.append((deal, final.winnerId, live))
+
+    def check(self):
+        """Score all showdowns paired since the last call; returns the running report."""
+        ready, self._ready = self._ready, []
+        if not ready:
+            return self.report
+        rows = []
+        for deal, _, _ in ready:
+            board = (*deal.cards.flop, deal.cards.turn, deal.cards.river)
+            rows.extend((*player.cards, *board) for player in deal.players)
+        started = time.perf_counter()
+        scores = self.evaluate(encode(rows))
+        self.report.seconds += time.perf_counter() - started
+
+        report = self.report
+        row = 0
+        for deal, winner_id, live in ready:
+            ours = [int(score) for score in scores[row : row + len(deal.players)]]
+            row += len(deal.players)
+            for mismatch in score_mismatches(deal.id, deal.players, ours):
+                report.score_mismatches.append(mismatch)
+                self.metrics.counter("showdown_mismatches_total", kind="score").inc()
+            by_player = dict(zip((player.id for player in deal.players), ours))
+            best = max(by_player[p] for p in live)
+            if winner_id not in live or by_player[winner_id] != best:
+                winners = [p for p in live if by_player[p] == best]
+                report.winner_mismatches.append((deal.id, winner_id, winners))
+                self.metrics.counter("showdown_mismatches_total", kind="winner").inc()
+        report.showdowns += len(ready)
+        report.players += len(rows)
+        self._checked.inc(len(ready))
+        return report
+
+
+def _random_hands(rng, count, cards=7):
+    return np.argsort(rng.random((count, 52)), axis=1)[:, :cards]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hands", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    hands = _random_hands(np.random.default_rng(args.seed), args.hands)
+    started = time.perf_counter()
+    scores = evaluate(hands)
+    elapsed = time.perf_counter() - started
+    print(f"{args.hands} hands in {elapsed * 1000:.1f} ms ({args.hands / elapsed:,.0f} hands/sec)")
+    categories = np.bincount(scores >> 20, minlength=len(CATEGORY_NAMES))
+    for name, count in zip(CATEGORY_NAMES, categories):
+        print(f"  {name:<16} {count / args.hands:8.4%}")
+
+
+if __name__ == "__main__":
+    main()
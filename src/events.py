@@ -0,0 +1,221 @@
+"""
+Immutable, slotted model of ``deal`` and ``handEvent`` subscription payloads.
+
+:func:`decode_frame` turns a graphql-ws ``data`` frame (raw text or an
+already parsed dict) into these objects in one walk over the payload.
+Amounts are parsed to ``Decimal`` exactly once, identifiers and enum values
+are interned, a player unchanged since an earlier event reuses that event's
+node, and every list becomes a tuple, so a run holding millions of events
+keeps one small object per node instead of a dict per node.
+
+Attribute names follow the GraphQL schema, as in ``test/test_data.py``.
+Fields missing from a projected payload decode as ``None``.
+"""
+
+import json
+import sys
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional, Tuple
+
+_intern = sys.intern
+PLAYER_CACHE_SIZE = 65536
+_PLAYERS = {}
+
+
+@lru_cache(maxsize=4096)
+def parse_amount(text):
+    """``Decimal`` for an amount string; repeated amounts share one object."""
+    return Decimal(text)
+
+
+def _amount(value):
+    # Amounts arrive as strings; checked first since this runs per field per event.
+    if value.__class__ is str:
+        return parse_amount(value)
+    if value is None:
+        return None
+    return parse_amount(str(value))
+
+
+def _name(value):
+    return _intern(value) if value.__class__ is str else value
+
+
+@dataclass(frozen=True, slots=True)
+class ActivePlayer:
+    id: str
+    bet: Decimal
+    stack: Decimal
+    isInactive: bool
+    isBigBlind: Optional[bool] = None
+
+
+@dataclass(frozen=True, slots=True)
+class StreetEvent:
+    streetType: str
+    currentActivePlayers: Tuple[ActivePlayer, ...]
+    pot: Decimal
+
+    def player(self, player_id):
+        for p in self.currentActivePlayers:
+            if p.id == player_id:
+                return p
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerEvent:
+    playerId: str
+    action: str
+    amount: Decimal
+    streetType: str
+    currentStack: Decimal
+    currentPot: Decimal
+
+
+@dataclass(frozen=True, slots=True)
+class Cards:
+    flop: Tuple[str, ...]
+    turn: str
+    river: str
+
+
+@dataclass(frozen=True, slots=True)
+class HandEvent:
+    mutationType: str
+    handId: str
+    streetEvent: Optional[StreetEvent]
+    playerEvent: Optional[PlayerEvent]
+    cards: Optional[Cards]
+    buttonIndex: Optional[int] = None
+    isComplete: Optional[bool] = None
+    winnerId: Optional[str] = None
+
+
+MutationData = HandEvent
+
+
+@dataclass(frozen=True, slots=True)
+class DealPlayer:
+    id: str
+    stack: Decimal
+    cards: Tuple[str, ...]
+    score: Optional[int] = None
+    description: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class Deal:
+    id: str
+    tableId: str
+    players: Tuple[DealPlayer, ...]
+    cards: Optional[Cards]
+    playerEvents: Tuple[PlayerEvent, ...]
+    streetEvents: Tuple[StreetEvent, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class DealEvent:
+    mutationType: str
+    id: str
+    deal: Optional[Deal]
+
+
+def _active_player(d):
+    # Most players are unchanged from one event to the next: reuse their node.
+    get = d.get
+    key = (get("id"), get("bet"), get("stack"), get("isInactive"), get("isBigBlind"))
+    player = _PLAYERS.get(key)
+    if player is None:
+        if len(_PLAYERS) >= PLAYER_CACHE_SIZE:
+            _PLAYERS.clear()
+        player = _PLAYERS[key] = ActivePlayer(_name(key[0]), _amount(key[1]), _amount(key[2]), key[3], key[4])
+    return player
+
+
+def decode_street_event(d):
+    """Build a :class:`StreetEvent` from a ``streetEvent`` dict, e.g. from a ``hand`` query."""
+    if d is None:
+        return None
+    players = d.get("currentActivePlayers") or ()
+    return StreetEvent(_name(d.get("streetType")), tuple(map(_active_player, players)), _amount(d.get("pot")))
+
+
+def _player_event(d):
+    if d is None:
+        return None
+    return PlayerEvent(
+        _name(d.get("playerId")),
+        _name(d.get("action")),
+        _amount(d.get("amount")),
+        _name(d.get("streetType")),
+        _amount(d.get("currentStack")),
+        _amount(d.get("currentPot")),
+    )
+
+
+def _cards(d):
+    if d is None:
+        return None
+    return Cards(tuple(_name(c) for c in d.get("flop") or ()), _name(d.get("turn")), _name(d.get("river")))
+
+
+def _deal_player(d):
+    cards = d.get("cards")
+    return DealPlayer(
+        _name(d.get("id")),
+        _amount(d.get("stack")),
+        tuple(_name(c) for c in cards) if cards is not None else None,
+        d.get("score"),
+        d.get("description"),
+    )
+
+
+def decode_hand_event(d):
+    """Build a :class:`HandEvent` from a ``handEvent`` payload dict."""
+    return HandEvent(
+        _name(d.get("mutationType")),
+        d.get("handId"),
+        decode_street_event(d.get("streetEvent")),
+        _player_event(d.get("playerEvent")),
+        _cards(d.get("cards")),
+        d.get("buttonIndex"),
+        d.get("isComplete"),
+        _name(d.get("winnerId")),
+    )
+
+
+def decode_deal_event(d):
+    """Build a :class:`DealEvent` from a ``deal`` subscription payload dict."""
+    deal = d.get("deal")
+    if deal is not None:
+        deal = Deal(
+            deal.get("id"),
+            _name(deal.get("tableId")),
+            tuple(_deal_player(p) for p in deal.get("players") or ()),
+            _cards(deal.get("cards")),
+            tuple(_player_event(e) for e in deal.get("playerEvents") or ()),
+            tuple(decode_street_event(e) for e in deal.get("streetEvents") or ()),
+        )
+    return DealEvent(_name(d.get("mutationType")), d.get("id"), deal)
+
+
+_DECODERS = {"handEvent": decode_hand_event, "deal": decode_deal_event}
+
+
+def decode_frame(frame):
+    """Decode a graphql-ws ``data`` frame into a :class:`HandEvent` or :class:`DealEvent`.
+
+    ``frame`` may be the raw text (``str``/``bytes``) or the parsed dict.
+    Returns ``None`` for frames that carry neither field.
+    """
+    if isinstance(frame, (str, bytes, bytearray)):
+        frame = json.loads(frame)
+    data = (frame.get("payload") or {}).get("data") or {}
+    for field, value in data.items():
+        decoder = _DECODERS.get(field)
+        if decoder is not None and value is not None:
+            return decoder(value)
+    return None
@@ -0,0 +1,895 @@
+"""
+In-process stand-in for the Unlimited Poker API.
+
+Implements just enough of the Go server for the system tests and load tools to
+run offline: a Texas Hold'em betting engine behind the ``deal``/``playTurn``/
+``hand`` GraphQL operations, the ``deal``/``handEvent`` subscriptions over
+graphql-ws on ``/ws`` and the ``/api`` REST endpoints.
+
+    python -m src.fake_server --port 3000 --latency 0.002 --fan-out-delay 0.001
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import socket
+import uuid
+from collections import Counter
+from decimal import Decimal
+
+from aiohttp import ClientError, WSCloseCode, WSMsgType, web
+
+STREETS = ["Preflop", "Flop", "Turn", "River"]
+RANKS = "23456789TJQKA"
+SUITS = "shdc"
+DEFAULT_SMALL_BLIND = Decimal("10")
+DEFAULT_BIG_BLIND = Decimal("20")
+
+HOLDEM_RULES = {
+    "name": "HOLDEM_RULES",
+    "holeCards": 2,
+    "flopCards": 3,
+    "turnCards": 1,
+    "riverCards": 1,
+    "totalBoardCards": 5,
+    "streets": STREETS,
+    "btnFirstPostflop": False,
+}
+
+CATEGORY_NAMES = [
+    "High Card",
+    "Pair",
+    "Two Pair",
+    "Three of a Kind",
+    "Straight",
+    "Flush",
+    "Full House",
+    "Four of a Kind",
+    "Straight Flush",
+]
+
+
+class GameError(Exception):
+    """An illegal deal or action; reported to clients as a GraphQL error."""
+
+
+def fmt_amount(amount):
+    """Render a chip amount the way the Go server does ("1000", "10.5")."""
+    amount = Decimal(amount)
+    if amount == amount.to_integral_value():
+        return str(int(amount))
+    return str(amount.normalize())
+
+
+def score_cards(cards):
+    """Score the best five-card hand out of ``cards``; higher is better.
+
+    The score packs the category and five tie-break ranks into one integer
+    (four bits per rank), so plain integer comparison orders hands.
+    """
+    ranks = sorted((RANKS.index(c[0]) for c in cards), reverse=True)
+    suits = Counter(c[1] for c in cards)
+    counts = Counter(ranks)
+
+    def straight_high(rank_set):
+        ranks_present = set(rank_set)
+        if 12 in ranks_present:
+            ranks_present.add(-1)
+        for high in range(12, 2, -1):
+            if all(r in ranks_present for r in range(high - 4, high + 1)):
+                return high
+        return None
+
+    flush_suit = next((s for s, n in suits.items() if n >= 5), None)
+    if flush_suit is not None:
+        flush_ranks = sorted((RANKS.index(c[0]) for c in cards if c[1] == flush_suit), reverse=True)
+        high = straight_high(flush_ranks)
+        if high is not None:
+            return _pack(8, [high])
+    by_count = sorted(counts.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    quads = [r for r, n in by_count if n == 4]
+    trips = [r for r, n in by_count if n == 3]
+    pairs = [r for r, n in by_count if n == 2]
+    if quads:
+        return _pack(7, [quads[0], max(r for r in ranks if r != quads[0])])
+    if trips and (len(trips) > 1 or pairs):
+        pair = max(trips[1:] + pairs)
+        return _pack(6, [trips[0], pair])
+    if flush_suit is not None:
+        return _pack(5, flush_ranks[:5])
+    high = straight_high(ranks)
+    if high is not None:
+        return _pack(4, [high])
+    if trips:
+        return _pack(3, [trips[0]] + [r for r in ranks if r != trips[0]][:2])
+    if len(pairs) >= 2:
+        top, second = pairs[:2]
+        return _pack(2, [top, second, max(r for r in ranks if r not in (top, second))])
+    if pairs:
+        return _pack(1, [pairs[0]] + [r for r in ranks if r != pairs[0]][:3])
+    return _pack(0, ranks[:5])
+
+
+def _pack(category, kickers):
+    score = category
+    for i in range(5):
+        score = (score << 4) | (kickers[i] if i < len(kickers) else 0)
+    return score
+
+
+def describe_score(score):
+    return CATEGORY_NAMES[score >> 20]
+
+
+class Seat:
+    __slots__ = ("id", "stack", "bet", "contributed", "inactive", "acted", "cards")
+
+    def __init__(self, player_id, stack, cards):
+        self.id = player_id
+        self.stack = stack
+        self.bet = Decimal(0)
+        self.contributed = Decimal(0)
+        self.inactive = False
+        self.acted = False
+        self.cards = cards
+
+    def post(self, amount):
+        amount = min(amount, self.stack)
+        self.stack -= amount
+        self.bet += amount
+        self.contributed += amount
+        return amount
+
+
+class Hand:
+    """One hand of Hold'em and its betting state machine."""
+
+    def __init__(self, table_id, players, rng, button_index=None, small_blind=None, big_blind=None):
+        if len(players) < 2:
+            raise GameError("at least 2 players are required to deal")
+        n = len(players)
+        self.id = str(uuid.uuid4())
+        self.table_id = table_id
+        self.small_blind = Decimal(small_blind if small_blind is not None else DEFAULT_SMALL_BLIND)
+        self.big_blind = Decimal(big_blind if big_blind is not None else DEFAULT_BIG_BLIND)
+        if button_index is None:
+            button_index = 0 if n == 2 else n - 1
+        self.button_index = button_index % n
+        self.small_blind_index = self.button_index if n == 2 else (self.button_index + 1) % n
+        self.big_blind_index = (self.small_blind_index + 1) % n
+
+        deck = [r + s for r in RANKS for s in SUITS]
+        rng.shuffle(deck)
+        self.seats = [Seat(p["id"], Decimal(str(p["stack"])), [deck.pop(), deck.pop()]) for p in players]
+        self.board = [deck.pop() for _ in range(5)]
+        self.scores = {s.id: score_cards(s.cards + self.board) for s in self.seats}
+        self.starting_stacks = {s.id: s.stack for s in self.seats}
+        self.street_index = 0
+        self.pot = Decimal(0)
+        self.player_events = []
+        self.street_events = []
+        self.is_complete = False
+        self.winner_id = None
+        self.last_player_event = None
+
+        self.pot += self.seats[self.small_blind_index].post(self.small_blind)
+        self.pot += self.seats[self.big_blind_index].post(self.big_blind)
+        self._open_street()
+        if self.next_actor() is None:
+            # The blinds put everyone all-in: run the board out straight away.
+            self._advance()
+
+    # -- ordering -----------------------------------------------------------
+
+    def action_order(self):
+        n = len(self.seats)
+        start = (self.big_blind_index + 1) % n if self.street_index == 0 else (self.button_index + 1) % n
+        return [self.seats[(start + i) % n] for i in range(n)]
+
+    def next_actor(self):
+        if self.is_complete:
+            return None
+        top = max(s.bet for s in self.seats)
+        for seat in self.action_order():
+            if seat.inactive or seat.stack == 0:
+                continue
+            if not seat.acted or seat.bet < top:
+                return seat
+        return None
+
+    # -- state snapshots ----------------------------------------------------
+
+    def _street_event(self):
+        return {
+            "streetType": STREETS[self.street_index],
+            "currentActivePlayers": [
+                {
+                    "id": s.id,
+                    "bet": fmt_amount(s.bet),
+                    "stack": fmt_amount(s.stack),
+                    "isInactive": s.inactive,
+                    "isBigBlind": s is self.seats[self.big_blind_index],
+                }
+                for s in self.action_order()
+            ],
+            "pot": fmt_amount(self.pot),
+        }
+
+    def _open_street(self):
+        self.street_events.append(self._street_event())
+
+    def _refresh_street(self):
+        self.street_events[-1] = self._street_event()
+
+    def visible_cards(self):
+        if self.street_index == 0:
+            return None
+        shown = (0, 3, 4, 5)[self.street_index]
+        return {
+            "flop": self.board[:3] if shown >= 3 else [],
+            "turn": self.board[3] if shown >= 4 else "",
+            "river": self.board[4] if shown >= 5 else "",
+        }
+
+    def to_dict(self):
+        scores = self.scores
+        return {
+            "id": self.id,
+            "tableId": self.table_id,
+            "buttonIndex": self.button_index,
+            "smallBlindIndex": self.small_blind_index,
+            "bigBlindIndex": self.big_blind_index,
+            "tableConfig": {
+                "smallBlind": fmt_amount(self.small_blind),
+                "bigBlind": fmt_amount(self.big_blind),
+                "buttonIndex": self.button_index,
+            },
+            "players": [
+                {
+                    "id": s.id,
+                    "stack": fmt_amount(s.stack),
+                    "cards": list(s.cards),
+                    "score": scores[s.id],
+                    "description": describe_score(scores[s.id]),
+                }
+                for s in self.seats
+            ],
+            "cards": {"flop": self.board[:3], "turn": self.board[3], "river": self.board[4]},
+            "playerEvents": list(self.player_events),
+            "streetEvents": list(self.street_events),
+            "isComplete": self.is_complete,
+            "winnerId": self.winner_id,
+            "rules": HOLDEM_RULES,
+        }
+
+    def hand_event(self):
+        return {
+            "mutationType": "UPDATED",
+            "handId": self.id,
+            "tableConfig": {
+                "smallBlind": fmt_amount(self.small_blind),
+                "bigBlind": fmt_amount(self.big_blind),
+                "buttonIndex": self.button_index,
+            },
+            "buttonIndex": self.button_index,
+            "smallBlindIndex": self.small_blind_index,
+            "bigBlindIndex": self.big_blind_index,
+            "streetEvent": self.street_events[-1],
+            "playerEvent": self.last_player_event,
+            "cards": self.visible_cards(),
+            "isComplete": self.is_complete,
+            "winnerId": self.winner_id,
+        }
+
+    # -- actions ------------------------------------------------------------
+
+    def play(self, player_id, action, amount):
+        if self.is_complete:
+            raise GameError(f"hand {self.id} is complete")
+        actor = self.next_actor()
+        if actor is None or actor.id != player_id:
+            expected = actor.id if actor else None
+            raise GameError(f"it is not {player_id}'s turn (expected {expected})")
+        action = str(action).upper()
+        amount = Decimal(str(amount))
+        to_call = max(s.bet for s in self.seats) - actor.bet
+        street = STREETS[self.street_index]
+
+        if action == "FOLD":
+            actor.inactive = True
+            amount = Decimal(0)
+        elif action == "CHECK":
+            if to_call > 0:
+                raise GameError(f"{player_id} cannot check facing a bet of {fmt_amount(to_call)}")
+            amount = Decimal(0)
+        elif action in ("BET", "CALL", "RAISE"):
+            if amount <= 0 or amount > actor.stack:
+                raise GameError(f"invalid bet amount {fmt_amount(amount)} for {player_id}")
+            if amount < to_call and amount != actor.stack:
+                raise GameError(f"{player_id} must bet at least {fmt_amount(to_call)}")
+            self.pot += actor.post(amount)
+        else:
+            raise GameError(f"unknown action {action}")
+        actor.acted = True
+
+        self.last_player_event = {
+            "playerId": actor.id,
+            "action": action.capitalize(),
+            "amount": fmt_amount(amount),
+            "streetType": street,
+            "currentStack": fmt_amount(actor.stack),
+            "currentPot": fmt_amount(self.pot),
+        }
+        self.player_events.append(self.last_player_event)
+        self._advance()
+
+    def _advance(self):
+        live = [s for s in self.seats if not s.inactive]
+        if len(live) == 1:
+            self._refresh_street()
+            self._finish([live[0]])
+            return
+        if self.next_actor() is not None:
+            self._refresh_street()
+            return
+        self._refresh_street()
+        can_act = [s for s in live if s.stack > 0]
+        while self.street_index < len(STREETS) - 1:
+            self.street_index += 1
+            for seat in self.seats:
+                seat.bet = Decimal(0)
+                seat.acted = False
+            self._open_street()
+            if len(can_act) > 1:
+                return
+        self._refresh_street()
+        best = max(self.scores[s.id] for s in live)
+        self._finish([s for s in live if self.scores[s.id] == best])
+
+    def _finish(self, winners):
+        self.is_complete = True
+        self.winner_id = winners[0].id
+        share = (self.pot / len(winners)).quantize(Decimal("0.01"))
+        for seat in winners:
+            seat.stack += share
+        winners[0].stack += self.pot - share * len(winners)
+
+
+class PokerEngine:
+    """All hands known to the stand-in, indexed by id."""
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.hands = {}
+
+    def deal(self, table_id, players, button_index=None, small_blind=None, big_blind=None):
+        hand = Hand(table_id, players, self.rng, button_index, small_blind, big_blind)
+        self.hands[hand.id] = hand
+        return hand
+
+    def get(self, hand_id):
+        try:
+            return self.hands[hand_id]
+        except KeyError:
+            raise GameError(f"hand {hand_id} not found") from None
+
+    def play(self, hand_id, player_id, action, amount):
+        hand = self.get(hand_id)
+        hand.play(player_id, action, amount)
+        return hand
+
+    def next_hand(self, hand):
+        """Deal the follow-up hand on ``hand``'s table with the button moved on."""
+        players = [{"id": s.id, "stack": s.stack} for s in hand.seats if s.stack > 0]
+        if len(players) < 2:
+            return None
+        return self.deal(hand.table_id, players, hand.button_index + 1, hand.small_blind, hand.big_blind)
+
+
+# -- GraphQL ------------------------------------------------------------------
+
+_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[A-Za-z_][A-Za-z0-9_]*|[{}()]|\S')
+
+
+def selection_tree(query):
+    """Parse a GraphQL document's top-level selection set into nested dicts.
+
+    Only what the stand-in needs: arguments are skipped, each field maps to its
+    sub-selection (or ``None`` for leaves).
+    """
+    tokens = _TOKEN_RE.findall(query)
+    pos = tokens.index("{")
+
+    def parse_set(i):
+        fields = {}
+        i += 1
+        while tokens[i] != "}":
+            name = tokens[i]
+            i += 1
+            if tokens[i] == "(":
+                depth = 0
+                while True:
+                    depth += {"(": 1, ")": -1}.get(tokens[i], 0)
+                    i += 1
+                    if depth == 0:
+                        break
+            if tokens[i] == "{":
+                fields[name], i = parse_set(i)
+            else:
+                fields[name] = None
+        return fields, i + 1
+
+    return parse_set(pos)[0]
+
+
+def project(value, tree):
+    if tree is None or value is None:
+        return value
+    if isinstance(value, list):
+        return [project(v, tree) for v in value]
+    return {name: project(value.get(name), sub) for name, sub in tree.items()}
+
+
+def _shape_error(operation):
+    """What is wrong with the shape of one GraphQL operation, or ``None``."""
+    if not isinstance(operation, dict):
+        return "an operation must be a JSON object"
+    if not isinstance(operation.get("query"), (str, type(None))):
+        return "query must be a string"
+    if not isinstance(operation.get("variables"), (dict, type(None))):
+        return "variables must be an object"
+    if not isinstance(operation.get("extensions"), (dict, type(None))):
+        return "extensions must be an object"
+    return None
+
+
+def _bad_request(message):
+    return web.json_response({"data": None, "errors": [{"message": message}]}, status=400)
+
+
+class _Operation:
+    __slots__ = ("subscriber", "id", "field", "tree", "query", "key")
+
+    def __init__(self, subscriber, op_id, field, tree, query, key):
+        self.subscriber = subscriber
+        self.id = op_id
+        self.field = field
+        self.tree = tree
+        self.query = query
+        self.key = key
+
+
+class _Subscriber:
+    """One graphql-ws socket and the frames waiting to be written to it."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.init = {}
+        self.operations = {}
+        self.queue = asyncio.Queue()
+        self.writer = None
+        self.closer = None
+
+
+class FakePokerServer:
+    """aiohttp application serving the stand-in API on ``host:port``.
+
+    ``port=0`` picks a free port; read it back from :attr:`url` after
+    :meth:`start`. ``latency`` delays every HTTP request and ``fan_out_delay``
+    delays every subscription frame on its way to each subscriber. Finished
+    hands are followed by an automatic deal on the same table unless
+    ``auto_deal`` is off.
+
+    Like the Go server, ``handEvent`` frames carry the whole event (including
+    ``isComplete``/``winnerId``) whatever the selection set, while ``deal``
+    frames honour it; ``project_subscriptions=True`` projects both.
+
+    A JSON array posted to ``/graphql`` is a batch: its operations run in
+    order and the responses come back as an array, unless ``batching`` is
+    off, in which case the request is refused with a 400.
+
+    Each subscriber's outgoing frames wait in its own queue, unbounded by
+    default. With ``max_queue`` set, a subscriber that falls that many data
+    frames behind has further frames dropped (``slow_policy="drop"``) or is
+    disconnected with close code 1013 (``slow_policy="close"``);
+    :attr:`dropped_frames`, :attr:`slow_closes` and :attr:`max_queue_depth`
+    count what happened. ``send_buffer`` sets ``SO_SNDBUF`` on subscriber
+    sockets, so a stalled reader backs up into the queue sooner.
+    ``subscribe_delay`` holds each ``start`` that long before registering
+    it, as a server still setting up a subscription would.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        seed=None,
+        latency=0.0,
+        fan_out_delay=0.0,
+        auto_deal=True,
+        auto_deal_delay=0.0,
+        project_subscriptions=False,
+        persisted_queries=True,
+        batching=True,
+        max_queue=None,
+        slow_policy="drop",
+        send_buffer=None,
+        subscribe_delay=0.0,
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.fan_out_delay = fan_out_delay
+        self.auto_deal = auto_deal
+        self.auto_deal_delay = auto_deal_delay
+        self.project_subscriptions = project_subscriptions
+        self.persisted_queries = persisted_queries
+        self.batching = batching
+        if slow_policy not in ("drop", "close"):
+            raise ValueError(f"slow_policy must be 'drop' or 'close', not {slow_policy!r}")
+        self.max_queue = max_queue
+        self.slow_policy = slow_policy
+        self.send_buffer = send_buffer
+        self.subscribe_delay = subscribe_delay
+        self.dropped_frames = 0
+        self.slow_closes = 0
+        self.max_queue_depth = 0
+        self.persisted = {}
+        self.engine = PokerEngine(seed)
+        self.subscribers = set()
+        self._deal_operations = {}
+        self._hand_operations = {}
+        self.app = web.Application()
+        self.app.router.add_get("/", self.handle_health)
+        self.app.router.add_post("/graphql", self.handle_graphql)
+        self.app.router.add_get("/ws", self.handle_ws)
+        self.app.router.add_post("/api/deal", self.handle_rest_deal)
+        self.app.router.add_get("/api/hands", self.handle_rest_hands)
+        self.app.router.add_get("/api/hands/{hand_id}", self.handle_rest_hand)
+        self.app.router.add_post("/api/hands/{hand_id}/play", self.handle_rest_play)
+        self._runner = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def graphql_url(self):
+        return f"{self.url}/graphql"
+
+    @property
+    def ws_url(self):
+        return f"ws://{self.host}:{self.port}/ws"
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self
+
+    async def stop(self):
+        for subscriber in list(self.subscribers):
+            await subscriber.ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    # -- game actions shared by GraphQL and REST ------------------------------
+
+    def deal(self, deal_input):
+        hand = self.engine.deal(
+            deal_input.get("tableId", "123"),
+            deal_input.get("players", []),
+            deal_input.get("buttonIndex"),
+            deal_input.get("smallBlind"),
+            deal_input.get("bigBlind"),
+        )
+        self.publish_deal(hand)
+        return hand
+
+    def play(self, hand_id, player_id, action, amount):
+        hand = self.engine.play(hand_id, player_id, action, amount)
+        self.publish(
+            self._hand_operations, (hand.table_id, hand.id), "handEvent", hand.hand_event(), self.project_subscriptions
+        )
+        if hand.is_complete and self.auto_deal:
+            asyncio.get_running_loop().call_later(self.auto_deal_delay, self._deal_next, hand)
+        return hand
+
+    def _deal_next(self, hand):
+        next_hand = self.engine.next_hand(hand)
+        if next_hand is not None:
+            self.publish_deal(next_hand)
+
+    def publish_deal(self, hand):
+        value = {"mutationType": "CREATED", "id": hand.id, "deal": hand.to_dict()}
+        self.publish(self._deal_operations, (hand.table_id,), "deal", value, True)
+
+    def publish(self, registry, keys, field, value, projected=True):
+        """Queue ``value`` for every operation registered under any of ``keys``.
+
+        Each distinct payload is serialized once, however many sockets
+        subscribed to it.
+        """
+        encoded = {}
+        for key in keys:
+            for operation in registry.get(key, ()):
+                query = operation.query if projected else None
+                payload = encoded.get(query)
+                if payload is None:
+                    selected = project(value, operation.tree) if projected else value
+                    payload = json.dumps({"data": {field: selected}})
+                    encoded[query] = payload
+                frame = '{"type":"data","id":%s,"payload":%s}' % (json.dumps(operation.id), payload)
+                self._push(operation.subscriber, frame)
+
+    def _push(self, subscriber, frame):
+        queue = subscriber.queue
+        if self.max_queue is not None and queue.qsize() >= self.max_queue:
+            if self.slow_policy == "drop":
+                self.dropped_frames += 1
+            elif subscriber.closer is None:
+                self.slow_closes += 1
+                subscriber.writer.cancel()
+                subscriber.closer = asyncio.ensure_future(
+                    subscriber.ws.close(code=WSCloseCode.TRY_AGAIN_LATER, message=b"subscriber too slow")
+                )
+            return
+        queue.put_nowait(frame)
+        self.max_queue_depth = max(self.max_queue_depth, queue.qsize())
+
+    # -- HTTP -----------------------------------------------------------------
+
+    async def handle_health(self, request):
+        return web.json_response({"status": "online", "service": "Unlimited Poker API"})
+
+    async def handle_graphql(self, request):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        try:
+            body = await request.json()
+        except ValueError as exc:
+            return _bad_request(f"bad request: {exc}")
+        if isinstance(body, list):
+            if not self.batching:
+                return _bad_request("batched requests are not supported")
+            # A bad entry gets its own error: failing the array would have the client resend what already ran.
+            return web.json_response([self.execute(operation) for operation in body])
+        problem = _shape_error(body)
+        if problem is not None:
+            return _bad_request(f"bad request: {problem}")
+        return web.json_response(self.execute(body))
+
+    def execute(self, body):
+        problem = _shape_error(body)
+        if problem is not None:
+            return {"data": None, "errors": [{"message": f"bad request: {problem}"}]}
+        variables = body.get("variables") or {}
+        try:
+            query = self._document(body)
+            try:
+                (field, sub), = selection_tree(query).items()
+            except (ValueError, IndexError):
+                raise GameError("bad request: cannot parse the query") from None
+            resolver = getattr(self, f"resolve_{field}", None)
+            if resolver is None:
+                raise GameError(f"unknown field {field}")
+            return {"data": {field: project(resolver(variables), sub)}}
+        except GameError as exc:
+            return {"data": None, "errors": [{"message": str(exc)}]}
+
+    def _document(self, body):
+        query = body.get("query")
+        persisted = (body.get("extensions") or {}).get("persistedQuery")
+        if persisted and self.persisted_queries:
+            sha256 = persisted.get("sha256Hash")
+            if query is None:
+                if sha256 not in self.persisted:
+                    raise GameError("PersistedQueryNotFound")
+                return self.persisted[sha256]
+            if hashlib.sha256(query.encode()).hexdigest() != sha256:
+                raise GameError("provided sha does not match query")
+            self.persisted[sha256] = query
+        if query is None:
+            raise GameError("PersistedQueryNotSupported" if persisted else "no operation provided")
+        return query
+
+    def resolve_deal(self, variables):
+        return self.deal(variables.get("dealInput") or variables.get("input") or {}).id
+
+    def resolve_playTurn(self, variables):
+        args = variables.get("input") or variables
+        hand_id = args.get("handId") or args.get("id")
+        self.play(hand_id, args.get("playerId"), args.get("action"), args.get("amount", 0))
+        return hand_id
+
+    def resolve_hand(self, variables):
+        return self.engine.get(variables.get("id")).to_dict()
+
+    async def handle_rest_deal(self, request):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        try:
+            hand = self.deal(await request.json())
+        except GameError as exc:
+            return web.json_response({"error": str(exc)}, status=400)
+        return web.json_response({"id": hand.id, "hand": hand.to_dict()}, status=201)
+
+    async def handle_rest_hands(self, request):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        hands = [h.to_dict() for h in self.engine.hands.values()]
+        return web.json_response({"hands": hands, "count": len(hands)})
+
+    async def handle_rest_hand(self, request):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        try:
+            hand = self.engine.get(request.match_info["hand_id"])
+        except GameError as exc:
+            return web.json_response({"error": str(exc)}, status=404)
+        return web.json_response(hand.to_dict())
+
+    async def handle_rest_play(self, request):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        body = await request.json()
+        try:
+            hand = self.play(request.match_info["hand_id"], body.get("playerId"), body.get("action"), body.get("amount", 0))
+        except GameError as exc:
+            status = 404 if "not found" in str(exc) else 400
+            return web.json_response({"error": str(exc)}, status=status)
+        return web.json_response({"gameOver": hand.is_complete, "winner": hand.winner_id, "hand": hand.to_dict()})
+
+    # -- graphql-ws -----------------------------------------------------------
+
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse(protocols=("graphql-ws",))
+        await ws.prepare(request)
+        if self.send_buffer:
+            sock = request.transport.get_extra_info("socket")
+            if sock is not None:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer)
+        subscriber = _Subscriber(ws)
+        subscriber.writer = asyncio.create_task(self._write_loop(subscriber))
+        self.subscribers.add(subscriber)
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                frame = json.loads(msg.data)
+                msg_type = frame.get("type")
+                if msg_type == "connection_init":
+                    subscriber.init = frame.get("payload") or {}
+                    subscriber.queue.put_nowait(json.dumps({"type": "connection_ack"}))
+                elif msg_type == "start":
+                    if self.subscribe_delay:
+                        await asyncio.sleep(self.subscribe_delay)
+                    self._start(subscriber, frame)
+                elif msg_type == "stop":
+                    self._stop(subscriber, frame.get("id"))
+                    subscriber.queue.put_nowait(json.dumps({"type": "complete", "id": frame.get("id")}))
+                elif msg_type == "connection_terminate":
+                    break
+        finally:
+            self._drop(subscriber)
+            subscriber.writer.cancel()
+            await ws.close()
+        return ws
+
+    def _drop(self, subscriber):
+        for op_id in list(subscriber.operations):
+            self._stop(subscriber, op_id)
+        self.subscribers.discard(subscriber)
+
+    def _start(self, subscriber, frame):
+        op_id = frame.get("id")
+        payload = frame.get("payload") or {}
+        query = payload.get("query") or ""
+        try:
+            tree = selection_tree(query)
+            (field, sub), = tree.items()
+        except (ValueError, IndexError):
+            subscriber.queue.put_nowait(json.dumps({"type": "error", "id": op_id, "payload": {"message": "bad query"}}))
+            return
+        table_id = payload.get("x-table-token") or subscriber.init.get("x-table-token")
+        hand_id = payload.get("x-hand-token") or subscriber.init.get("x-hand-token")
+        if field == "__typename":
+            # A query over the socket, as the client's readiness probe sends: answer it and end it.
+            data = {"type": "data", "id": op_id, "payload": {"data": {field: "Query"}}}
+            subscriber.queue.put_nowait(json.dumps(data))
+            subscriber.queue.put_nowait(json.dumps({"type": "complete", "id": op_id}))
+            return
+        if field == "deal":
+            registry, key = self._deal_operations, table_id
+        elif field == "handEvent":
+            registry, key = self._hand_operations, hand_id or table_id
+        else:
+            message = {"message": f"unknown subscription {field}"}
+            subscriber.queue.put_nowait(json.dumps({"type": "error", "id": op_id, "payload": message}))
+            return
+        self._stop(subscriber, op_id)
+        operation = _Operation(subscriber, op_id, field, sub, query, key)
+        subscriber.operations[op_id] = (registry, operation)
+        registry.setdefault(key, set()).add(operation)
+
+    def _stop(self, subscriber, op_id):
+        entry = subscriber.operations.pop(op_id, None)
+        if entry is None:
+            return
+        registry, operation = entry
+        operations = registry.get(operation.key)
+        if operations is not None:
+            operations.discard(operation)
+            if not operations:
+                del registry[operation.key]
+
+    async def _write_loop(self, subscriber):
+        while True:
+            frame = await subscriber.queue.get()
+            if self.fan_out_delay:
+                await asyncio.sleep(self.fan_out_delay)
+            if subscriber.ws.closed:
+                return
+            try:
+                await subscriber.ws.send_str(frame)
+            except (ConnectionError, ClientError):
+                # The peer went away mid-write: stop publishing to it and close our end.
+                self._drop(subscriber)
+                await subscriber.ws.close()
+                return
+
+
+async def serve(host, port, **options):
+    async with FakePokerServer(host, port, **options) as server:
+        print(f"fake Unlimited Poker API listening on {server.url}")
+        await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every HTTP request")
+    parser.add_argument("--fan-out-delay", type=float, default=0.0, help="seconds added to every pushed frame")
+    parser.add_argument("--no-auto-deal", action="store_true")
+    parser.add_argument("--no-batching", action="store_true", help="refuse batched (array) GraphQL requests")
+    parser.add_argument("--max-queue", type=int, help="data frames a subscriber may fall behind (default unbounded)")
+    parser.add_argument("--send-buffer", type=int, help="SO_SNDBUF bytes for each subscriber socket")
+    parser.add_argument(
+        "--slow-policy", choices=("drop", "close"), default="drop", help="what happens past --max-queue"
+    )
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(
+            serve(
+                args.host,
+                args.port,
+                seed=args.seed,
+                latency=args.latency,
+                fan_out_delay=args.fan_out_delay,
+                auto_deal=not args.no_auto_deal,
+                batching=not args.no_batching,
+                max_queue=args.max_queue,
+                slow_policy=args.slow_policy,
+                send_buffer=args.send_buffer,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Mutation-to-fan-out latency: from the ``playTurn`` POST to the matching
+``handEvent`` frame on every seated player's socket.
+
+:class:`FanOutTracker` plugs into :class:`~src.subscriptions.GraphQLWSConnection`
+as its ``recorder`` and correlates the n-th ``playTurn`` of a hand with the
+n-th ``handEvent`` each subscriber receives for it. Latencies are reported
+per subscriber and as the worst of the N subscribers of each mutation,
+broken down by table size.
+
+    python -m src.fanout --local --sizes 2,3,6,9 --hands 20
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import aiohttp
+
+from .client import GRAPHQL_URL, GraphQLClient
+from .load import PERCENTILES, check_down_script, percentile, table_players
+from .metrics import METRICS
+from .recorder import frame_identity
+from .subscriptions import WS_URL, GraphQLWSConnection, wait_ready
+
+
+class _TrackedHand:
+    __slots__ = ("table_size", "subscribers", "sent", "arrivals", "received", "per_subscriber", "worst")
+
+    def __init__(self, table_size, subscribers, metrics):
+        self.table_size = table_size
+        self.per_subscriber = metrics.histogram("fanout_seconds", table_size=table_size, kind="subscriber")
+        self.worst = metrics.histogram("fanout_seconds", table_size=table_size, kind="worst")
+        self.subscribers = frozenset(subscribers)
+        self.sent = []
+        self.arrivals = []
+        self.received = dict.fromkeys(self.subscribers, 0)
+
+
+@dataclass
+class FanOutReport:
+    per_subscriber: dict = field(default_factory=dict)
+    worst: dict = field(default_factory=dict)
+    missing: int = 0
+    uncorrelated: int = 0
+
+    def percentiles(self, samples):
+        values = sorted(samples)
+        return {f"p{pct:g}": percentile(values, pct) for pct in PERCENTILES}
+
+    def summary(self):
+        lines = [f"missing={self.missing} uncorrelated={self.uncorrelated}"]
+        for size in sorted(self.per_subscriber):
+            for label, samples in (("subscriber", self.per_subscriber[size]), ("worst-of-N", self.worst.get(size, []))):
+                cols = " ".join(f"{k}={v * 1000:8.2f}ms" for k, v in self.percentiles(samples).items())
+                lines.append(f"  size={size:<3} {label:<10} n={len(samples):<7} {cols}")
+        return "\n".join(lines)
+
+
+class FanOutTracker:
+    """Correlates ``playTurn`` mutations with the ``handEvent`` frames they cause."""
+
+    def __init__(self, metrics=METRICS):
+        self.hands = {}
+        self.uncorrelated = 0
+        self.metrics = metrics
+
+    def expect(self, hand_id, subscribers):
+        """Register the subscriber ids that should see every event of ``hand_id``."""
+        subscribers = list(subscribers)
+        self.hands[hand_id] = _TrackedHand(len(subscribers), subscribers, self.metrics)
+
+    def mutation_sent(self, hand_id, player_id, sent_ns=None):
+        """Call right before posting a ``playTurn`` for ``hand_id``."""
+        hand = self.hands[hand_id]
+        hand.sent.append((sent_ns if sent_ns is not None else time.monotonic_ns(), player_id))
+        hand.arrivals.append([])
+
+    def record(self, subscriber_id, frame, raw=None, received_ns=None):
+        received_ns = received_ns if received_ns is not None else time.monotonic_ns()
+        field_name, hand_id = frame_identity(frame)
+        hand = self.hands.get(hand_id)
+        if field_name != "handEvent" or hand is None or subscriber_id not in hand.subscribers:
+            return
+        seq = hand.received[subscriber_id]
+        hand.received[subscriber_id] = seq + 1
+        player_event = frame["payload"]["data"]["handEvent"].get("playerEvent") or {}
+        if seq >= len(hand.sent) or player_event.get("playerId") != hand.sent[seq][1]:
+            self.uncorrelated += 1
+            return
+        latency_ns = received_ns - hand.sent[seq][0]
+        arrivals = hand.arrivals[seq]
+        arrivals.append(latency_ns / 1e9)
+        hand.per_subscriber.record_ns(latency_ns)
+        if len(arrivals) == hand.table_size:
+            hand.worst.record(max(arrivals))
+
+    def report(self):
+        report = FanOutReport(uncorrelated=self.uncorrelated)
+        for hand in self.hands.values():
+            per_subscriber = report.per_subscriber.setdefault(hand.table_size, [])
+            worst = report.worst.setdefault(hand.table_size, [])
+            for arrivals in hand.arrivals:
+                per_subscriber.extend(arrivals)
+                report.missing += hand.table_size - len(arrivals)
+                if len(arrivals) == hand.table_size:
+                    worst.append(max(arrivals))
+        return report
+
+
+async def measure_table(client, tracker, ws_url, session, table_id, table_size, hands):
+    """Play ``hands`` check-down hands with every seated player subscribed."""
+    players = table_players(table_id, table_size)
+    script = check_down_script(table_size)
+    connections = [
+        GraphQLWSConnection(ws_url, user_token=p, table_token=table_id, session=session, recorder=tracker)
+        for p in players
+    ]
+    await asyncio.gather(*(c.connect() for c in connections))
+    try:
+        for _ in range(hands):
+            hand_id = await client.deal(players, table_id=table_id)
+            tracker.expect(hand_id, players)
+            subscriptions = await asyncio.gather(*(c.subscribe_hand(hand_id) for c in connections))
+            await wait_ready(subscriptions)
+            for index, action, amount in script:
+                tracker.mutation_sent(hand_id, players[index])
+                await client.play_turn(hand_id, players[index], action, amount, table_id=table_id)
+                await asyncio.gather(*(s.next() for s in subscriptions))
+            await asyncio.gather(*(s.stop() for s in subscriptions))
+    finally:
+        await asyncio.gather(*(c.close() for c in connections))
+
+
+async def run_fanout(client, ws_url=WS_URL, table_sizes=(2, 3, 6, 9), hands_per_table=10, prefix="fanout"):
+    """Measure fan-out on one table per size in ``table_sizes``, concurrently."""
+    run_id = uuid.uuid4().hex[:8]
+    tracker = FanOutTracker()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(
+            *(
+                measure_table(client, tracker, ws_url, session, f"{prefix}-{run_id}-{size}", size, hands_per_table)
+                for size in table_sizes
+            )
+        )
+    return tracker.report()
+
+
+async def _main(args):
+    server = None
+    url, ws_url = args.url, args.ws_url
+    if args.local:
+        from .fake_server import FakePokerServer
+
+        server = await FakePokerServer(auto_deal=False, fan_out_delay=args.fan_out_delay).start()
+        url, ws_url = server.graphql_url, server.ws_url
+    try:
+        async with GraphQLClient(url) as client:
+            report = await run_fanout(client, ws_url, args.sizes, args.hands)
+    finally:
+        if server is not None:
+            await server.stop()
+    print(report.summary())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=GRAPHQL_URL)
+    parser.add_argument("--ws-url", default=WS_URL)
+    parser.add_argument("--local", action="store_true", help="run against an in-process stand-in server")
+    parser.add_argument("--fan-out-delay", type=float, default=0.0, help="per-frame delay for the stand-in server")
+    parser.add_argument("--sizes", type=lambda s: tuple(int(v) for v in s.split(",")), default=(2, 3, 6, 9))
+    parser.add_argument("--hands", type=int, default=10)
+    asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Randomized legal-action fuzzer for the betting engine.
+
+Plays many hands at once, each on its own table with a random table size and
+random stacks. Every action is picked at random from the moves that are
+legal in the latest ``streetEvent.currentActivePlayers``: fold, check, call,
+or bet/raise of a varied amount (sometimes fractional, sometimes all-in).
+Each ``handEvent`` goes through :class:`~src.validator.HandState` (turn
+order, pot and stack arithmetic, chips conserved against what was dealt,
+folded players staying out, streets in ``rules.streets`` order, a winner who
+did not fold); on top of that the event must echo the action that was sent,
+the server must accept every legal action and the final stacks must add up
+to the chips dealt.
+
+A hand's choices depend only on ``(seed, hand index)``, so any violation can
+be replayed on its own with ``--only``:
+
+    python -m src.fuzzer --local --hands 2000 --concurrency 100 --seed 7
+    python -m src.fuzzer --local --seed 7 --only 1234
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+import aiohttp
+
+from .client import GRAPHQL_URL, GraphQLClient, GraphQLError
+from .events import decode_street_event, parse_amount
+from .fake_server import DEFAULT_BIG_BLIND
+from .queries import register
+from .subscriptions import WS_URL, GraphQLWSConnection, SubscriptionError, wait_ready
+from .validator import HandState
+
+MIN_PLAYERS = 2
+MAX_PLAYERS = 6
+ALL_IN_PROBABILITY = 0.08
+FRACTION_PROBABILITY = 0.15
+SHORT_STACK_PROBABILITY = 0.1
+# Fold/call/raise facing a bet; check/bet otherwise.
+FACING_BET_WEIGHTS = (0.25, 0.5, 0.25)
+UNOPENED_WEIGHTS = (0.6, 0.4)
+EVENT_TIMEOUT_SECONDS = 5
+
+FUZZ_HAND_QUERY = register(
+    "FuzzHand",
+    """
+query FuzzHand($id: ID!) {
+  hand(id: $id) {
+    id
+    isComplete
+    winnerId
+    rules {
+      streets
+    }
+    players {
+      id
+      stack
+    }
+    streetEvents {
+      streetType
+      currentActivePlayers {
+        id
+        bet
+        stack
+        isInactive
+      }
+      pot
+    }
+  }
+}
+""",
+)
+
+
+@dataclass(frozen=True)
+class Violation:
+    seed: int
+    hand_index: int
+    hand_id: str
+    event: int
+    message: str
+
+    def __str__(self):
+        return f"seed={self.seed} hand={self.hand_index} ({self.hand_id}) event {self.event}: {self.message}"
+
+
+@dataclass
+class FuzzReport:
+    seed: int
+    hands: int = 0
+    events: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    actions: Counter = field(default_factory=Counter)
+    violations: list = field(default_factory=list)
+
+    def summary(self):
+        rate = self.hands / self.elapsed if self.elapsed else 0.0
+        actions = " ".join(f"{k}={v}" for k, v in sorted(self.actions.items()))
+        return (
+            f"seed={self.seed} hands={self.hands} events={self.events} errors={self.errors} "
+            f"violations={len(self.violations)} elapsed={self.elapsed:.2f}s hands/sec={rate:.1f}\n  {actions}"
+        )
+
+
+def hand_rng(seed, index):
+    """The random stream for hand ``index`` of a run seeded with ``seed``."""
+    return random.Random(f"{seed}:{index}")
+
+
+def random_table(rng, table_id):
+    """Random player ids and stacks for one table."""
+    players = [f"{table_id}-p{i}" for i in range(rng.randint(MIN_PLAYERS, MAX_PLAYERS))]
+    stacks = {}
+    for player in players:
+        if rng.random() < SHORT_STACK_PROBABILITY:
+            stacks[player] = float(rng.randint(1, int(DEFAULT_BIG_BLIND) * 2))
+        else:
+            stacks[player] = float(rng.randrange(100, 2001, 10))
+    return players, stacks
+
+
+def _bet_size(rng, low, stack):
+    if stack <= low or rng.random() < ALL_IN_PROBABILITY:
+        return stack
+    amount = Decimal(rng.randint(int(low), int(stack)))
+    if rng.random() < FRACTION_PROBABILITY:
+        amount += Decimal("0.5")
+    return min(max(amount, low), stack)
+
+
+def choose_action(rng, bet, stack, top, big_blind=DEFAULT_BIG_BLIND):
+    """A random legal ``(action, amount)`` for a player with ``bet``/``stack`` facing ``top``."""
+    to_call = top - bet
+    if to_call <= 0:
+        action = rng.choices(("CHECK", "BET"), UNOPENED_WEIGHTS)[0]
+        if action == "CHECK":
+            return "CHECK", Decimal(0)
+        return "BET", _bet_size(rng, min(big_blind, stack), stack)
+    action = rng.choices(("FOLD", "CALL", "RAISE"), FACING_BET_WEIGHTS)[0]
+    if action == "FOLD":
+        return "FOLD", Decimal(0)
+    if action == "CALL" or stack <= to_call:
+        return "BET", min(to_call, stack)
+    return "BET", _bet_size(rng, to_call + min(big_blind, stack - to_call), stack)
+
+
+class _FuzzedHand:
+    """A :class:`~src.validator.HandState` plus the checks only the sender can make."""
+
+    def __init__(self, seed, index, hand, dealt):
+        self.seed = seed
+        self.index = index
+        self.hand_id = hand["id"]
+        street_event = decode_street_event(hand["streetEvents"][-1])
+        self.state = HandState(self.hand_id, street_event, hand["rules"]["streets"], dealt, complete=hand["isComplete"])
+        self.violations = []
+        for problem in self.state.initial_problems:
+            self.violation(problem)
+
+    @property
+    def events(self):
+        return self.state.events
+
+    @property
+    def complete(self):
+        return self.state.complete
+
+    def violation(self, message):
+        self.violations.append(Violation(self.seed, self.index, self.hand_id, self.events, message))
+
+    def apply(self, event, player_id, action, amount):
+        """Check the :class:`~src.events.HandEvent` caused by ``player_id`` playing ``action``."""
+        played = event.playerEvent
+        for problem in self.state.update(event):
+            self.violation(problem)
+        if played is not None and played.playerId == player_id:
+            if played.action.upper() != action or (action == "BET" and played.amount != amount):
+                self.violation(f"sent {action} {amount}, event says {played.action} {played.amount}")
+
+    def check_final(self, hand):
+        chips = sum(parse_amount(str(p["stack"])) for p in hand["players"])
+        if not hand["isComplete"]:
+            self.violation("hand query says the hand is not complete")
+        if chips != self.state.total:
+            self.violation(f"final stacks add up to {chips}, dealt {self.state.total}")
+
+
+async def fuzz_hand(client, connection, seed, index, report, prefix="fuzz"):
+    """Deal hand ``index`` of run ``seed`` and play random legal actions to the end."""
+    rng = hand_rng(seed, index)
+    table_id = f"{prefix}-{index}"
+    players, stacks = random_table(rng, table_id)
+    hand_id = await client.deal(players, stacks, table_id)
+    subscription = await connection.subscribe_hand(hand_id)
+    fuzzed = None
+    try:
+        await wait_ready([subscription])
+        dealt = sum(parse_amount(str(stack)) for stack in stacks.values())
+        fuzzed = _FuzzedHand(seed, index, await client.hand(hand_id, FUZZ_HAND_QUERY), dealt)
+        while not fuzzed.complete and not fuzzed.violations:
+            actor = fuzzed.state.next_actor()
+            if actor is None:
+                fuzzed.violation("hand is not complete but nobody can act")
+                break
+            top = fuzzed.state.top_bet
+            action, amount = choose_action(rng, actor.bet, actor.stack, top)
+            try:
+                await client.play_turn(hand_id, actor.id, action, float(amount), table_id)
+            except GraphQLError as exc:
+                fuzzed.violation(f"legal {action} {amount} by {actor.id} refused: {exc.errors[0].get('message')}")
+                break
+            report.actions[_label(action, amount, top - actor.bet)] += 1
+            try:
+                event = await subscription.next_event(EVENT_TIMEOUT_SECONDS)
+            except (asyncio.TimeoutError, SubscriptionError):
+                fuzzed.violation(f"no handEvent after {actor.id} played {action} {amount}")
+                break
+            fuzzed.apply(event, actor.id, action, amount)
+        if fuzzed.complete:
+            fuzzed.check_final(await client.hand(hand_id, FUZZ_HAND_QUERY))
+    except (GraphQLError, aiohttp.ClientError, asyncio.TimeoutError):
+        report.errors += 1
+    finally:
+        await subscription.stop()
+    if fuzzed is not None:
+        report.events += fuzzed.events
+        report.violations += fuzzed.violations
+    report.hands += 1
+
+
+def _label(action, amount, to_call):
+    if action != "BET":
+        return action
+    if to_call <= 0:
+        return "BET"
+    return "CALL" if amount <= to_call else "RAISE"
+
+
+async def run_fuzz(client, ws_url=WS_URL, hands=100, seed=0, concurrency=50, only=None):
+    """Fuzz ``hands`` hands (or just hand ``only``), ``concurrency`` at a time."""
+    report = FuzzReport(seed=seed)
+    indices = [only] if only is not None else range(hands)
+    prefix = f"fuzz-{seed}-{uuid.uuid4().hex[:8]}"
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(index):
+        async with limit:
+            await fuzz_hand(client, connection, seed, index, report, prefix)
+
+    started = time.perf_counter()
+    async with GraphQLWSConnection(ws_url, user_token="fuzzer") as connection:
+        await asyncio.gather(*(one(i) for i in indices))
+    report.elapsed = time.perf_counter() - started
+    report.violations.sort(key=lambda v: (v.hand_index, v.event))
+    return report
+
+
+async def _main(args):
+    server = None
+    url, ws_url = args.url, args.ws_url
+    if args.local:
+        from .fake_server import FakePokerServer
+
+        server = await FakePokerServer(auto_deal=False).start()
+        url, ws_url = server.graphql_url, server.ws_url
+    try:
+        async with GraphQLClient(url, max_connections=args.concurrency) as client:
+            report = await run_fuzz(client, ws_url, args.hands, args.seed, args.concurrency, args.only)
+    finally:
+        if server is not None:
+            await server.stop()
+    print(report.summary())
+    for violation in report.violations[:20]:
+        print(f"  {violation}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=GRAPHQL_URL)
+    parser.add_argument("--ws-url", default=WS_URL)
+    parser.add_argument("--local", action="store_true", help="run against an in-process stand-in server")
+    parser.add_argument("--hands", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=50, help="hands in flight at once")
+    parser.add_argument("--only", type=int, metavar="INDEX", help="replay a single hand of this seed")
+    report = asyncio.run(_main(parser.parse_args(argv)))
+    raise SystemExit(1 if report.violations else 0)
+
+
+if __name__ == "__main__":
+    main()
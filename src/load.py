@@ -0,0 +1,279 @@
+"""
+Multi-table load generator for the deal/playTurn flows.
+
+Starts ``--tables`` tables with unique ids, plays ``--hands`` scripted hands on
+each of them concurrently and reports hands/sec plus per-operation latency
+percentiles.
+
+    python -m src.load --tables 200 --hands 5 --script fold
+    python -m src.load --local --tables 50
+    python -m src.load --local --tables 50 --script showdown --check-showdowns
+    python -m src.load --local --tables 50 --script showdown --validate
+    python -m src.load --local --tables 50 --script showdown --sequence --metrics-out load.prom
+    python -m src.load --local --tables 50 --script showdown --validate --projection observer
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import aiohttp
+
+from .client import GRAPHQL_URL, GraphQLClient, GraphQLError
+from .metrics import METRICS, PERCENTILES, MetricsRegistry
+from .play import hand_event_subscription
+from .projections import PROFILES, subscribe
+from .subscriptions import WS_URL, GraphQLWSConnection, wait_ready
+
+# How long to keep listening after the last hand for its trailing frames.
+OBSERVER_SETTLE_SECONDS = 0.2
+
+# Scripts index into the dealt player list: with three players 0 is the small
+# blind, 1 the big blind and 2 UTG (see the scenarios in test_three_players).
+_CHECK_AROUND = ((0, "CHECK", 0.0), (1, "CHECK", 0.0), (2, "CHECK", 0.0))
+SCRIPTS = {
+    "fold": ((2, "FOLD", 0.0), (0, "FOLD", 0.0)),
+    "raise_fold": ((2, "FOLD", 0.0), (0, "BET", 30.0), (1, "FOLD", 0.0)),
+    "showdown": ((2, "BET", 20.0), (0, "BET", 10.0), (1, "CHECK", 0.0)) + _CHECK_AROUND * 3,
+}
+
+
+def check_down_script(players_per_table):
+    """Limp-and-check-to-showdown script for any table size with the default button."""
+    n = players_per_table
+    button = 0 if n == 2 else n - 1
+    small_blind = button if n == 2 else (button + 1) % n
+    big_blind = (small_blind + 1) % n
+    preflop = []
+    for k in range(n):
+        index = (big_blind + 1 + k) % n
+        if index == big_blind:
+            preflop.append((index, "CHECK", 0.0))
+        elif index == small_blind:
+            preflop.append((index, "BET", 10.0))
+        else:
+            preflop.append((index, "BET", 20.0))
+    postflop = tuple(((button + 1 + k) % n, "CHECK", 0.0) for k in range(n))
+    return tuple(preflop) + postflop * 3
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[min(len(sorted_values), int(rank)) - 1]
+
+
+@dataclass
+class LoadReport:
+    tables: int
+    hands: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    latencies: dict = field(default_factory=dict)
+    metrics: MetricsRegistry = field(default=METRICS, repr=False, compare=False)
+
+    def record(self, operation, seconds):
+        self.latencies.setdefault(operation, []).append(seconds)
+        self.metrics.histogram("load_operation_seconds", operation=operation).record(seconds)
+
+    @property
+    def hands_per_second(self):
+        return self.hands / self.elapsed if self.elapsed else 0.0
+
+    def percentiles(self, operation):
+        values = sorted(self.latencies.get(operation, []))
+        return {f"p{pct:g}": percentile(values, pct) for pct in PERCENTILES}
+
+    def summary(self):
+        lines = [
+            f"tables={self.tables} hands={self.hands} errors={self.errors} "
+            f"elapsed={self.elapsed:.2f}s hands/sec={self.hands_per_second:.1f}"
+        ]
+        for operation in sorted(self.latencies):
+            cols = " ".join(f"{k}={v * 1000:8.2f}ms" for k, v in self.percentiles(operation).items())
+            lines.append(f"  {operation:<10} n={len(self.latencies[operation]):<7} {cols}")
+        return "\n".join(lines)
+
+
+def table_players(table_id, count):
+    return [f"{table_id}-p{i}" for i in range(count)]
+
+
+async def observe_table(observer, table_id, projection=None):
+    """Subscribe ``observer`` to every deal and hand event on ``table_id``.
+
+    ``projection`` names a :mod:`src.projections` profile to select instead
+    of the suites' own documents. Returns once the server has both.
+    """
+    if projection is not None:
+        subscriptions = [
+            await subscribe(observer, "deal", projection, table_token=table_id),
+            await subscribe(observer, "handEvent", projection, table_token=table_id),
+        ]
+    else:
+        subscriptions = [
+            await observer.subscribe_deal(table_token=table_id),
+            await observer.subscribe(
+                hand_event_subscription, "OnHandEvent", extra_payload={"x-table-token": table_id}
+            ),
+        ]
+    await wait_ready(subscriptions)
+    return subscriptions
+
+
+async def play_table(client, report, table_id, hands, script, players_per_table=3):
+    players = table_players(table_id, players_per_table)
+    for _ in range(hands):
+        hand_started = time.perf_counter()
+        try:
+            started = time.perf_counter()
+            hand_id = await client.deal(players, table_id=table_id)
+            report.record("deal", time.perf_counter() - started)
+            for index, action, amount in script:
+                started = time.perf_counter()
+                await client.play_turn(hand_id, players[index], action, amount, table_id=table_id)
+                report.record("playTurn", time.perf_counter() - started)
+        except (GraphQLError, aiohttp.ClientError, asyncio.TimeoutError):
+            report.errors += 1
+            continue
+        report.record("hand", time.perf_counter() - hand_started)
+        report.hands += 1
+
+
+async def run_load(
+    client,
+    tables=10,
+    hands_per_table=5,
+    script=SCRIPTS["fold"],
+    players_per_table=3,
+    prefix="load",
+    observer=None,
+    projection=None,
+):
+    """Play ``hands_per_table`` hands on ``tables`` concurrent tables.
+
+    With a :class:`~src.subscriptions.GraphQLWSConnection` as ``observer``,
+    every table's deal and hand events are subscribed on it (with
+    ``projection``'s selection, if given), so its ``recorder`` sees the
+    whole run.
+    """
+    run_id = uuid.uuid4().hex[:8]
+    table_ids = [f"{prefix}-{run_id}-{i}" for i in range(tables)]
+    subscriptions = []
+    if observer is not None:
+        for table_id in table_ids:
+            subscriptions += await observe_table(observer, table_id, projection)
+    report = LoadReport(tables=tables)
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(play_table(client, report, table_id, hands_per_table, script, players_per_table) for table_id in table_ids)
+    )
+    report.elapsed = time.perf_counter() - started
+    if subscriptions:
+        await asyncio.sleep(OBSERVER_SETTLE_SECONDS)
+        await asyncio.gather(*(s.stop() for s in subscriptions))
+    return report
+
+
+class _Tee:
+    """Recorder handing every frame to several recorders."""
+
+    def __init__(self, recorders):
+        self.recorders = recorders
+
+    def record(self, subscriber_id, frame, raw=None, received_ns=None):
+        for recorder in self.recorders:
+            recorder.record(subscriber_id, frame, raw, received_ns)
+
+
+async def _main(args):
+    server = None
+    url, ws_url = args.url, args.ws_url
+    if args.local:
+        from .fake_server import FakePokerServer
+
+        # Project handEvent frames too, as a server honouring --projection would.
+        server = await FakePokerServer(project_subscriptions=args.projection is not None).start()
+        url, ws_url = server.graphql_url, server.ws_url
+    checker = validator = sequencer = observer = None
+    try:
+        recorders = []
+        if args.check_showdowns:
+            from .evaluator import ShowdownChecker
+
+            if args.rank_table:
+                from .rank_table import load
+
+                checker = ShowdownChecker(evaluate=load(args.rank_table).evaluate)
+            else:
+                checker = ShowdownChecker()
+            recorders.append(checker)
+        if args.validate:
+            from .validator import HandValidator
+
+            validator = HandValidator()
+            recorders.append(validator)
+        if args.sequence:
+            from .sequencing import HandSequencer
+
+            sequencer = HandSequencer()
+            recorders.append(sequencer)
+        if recorders:
+            recorder = recorders[0] if len(recorders) == 1 else _Tee(recorders)
+            observer = await GraphQLWSConnection(ws_url, recorder=recorder).connect()
+        async with GraphQLClient(url, max_connections=args.connections) as client:
+            report = await run_load(
+                client, args.tables, args.hands, SCRIPTS[args.script], observer=observer, projection=args.projection
+            )
+    finally:
+        if observer is not None:
+            await observer.close()
+        if server is not None:
+            await server.stop()
+    print(report.summary())
+    if checker is not None:
+        showdowns = checker.check()
+        print(showdowns.summary())
+        for mismatch in (showdowns.score_mismatches + showdowns.winner_mismatches)[:10]:
+            print(f"  {mismatch}")
+    if validator is not None:
+        print(validator.report.summary())
+        for violation in validator.report.violations[:10]:
+            print(f"  {violation}")
+    if sequencer is not None:
+        print(sequencer.report.summary())
+    if args.metrics_out:
+        METRICS.write(args.metrics_out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=GRAPHQL_URL)
+    parser.add_argument("--ws-url", default=WS_URL)
+    parser.add_argument("--local", action="store_true", help="run against an in-process stand-in server")
+    parser.add_argument("--tables", type=int, default=10)
+    parser.add_argument("--hands", type=int, default=5)
+    parser.add_argument("--script", choices=sorted(SCRIPTS), default="fold")
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument(
+        "--check-showdowns", action="store_true", help="re-score every observed showdown (needs numpy)"
+    )
+    parser.add_argument("--validate", action="store_true", help="check every observed hand event as it arrives")
+    parser.add_argument(
+        "--sequence", action="store_true", help="count gaps, duplicates and reorders in every observed stream"
+    )
+    parser.add_argument("--projection", choices=PROFILES, help="subscription profile for --validate/--sequence")
+    parser.add_argument("--rank-table", help="with --check-showdowns, score from the rank tables in this directory")
+    parser.add_argument("--metrics-out", help="write metrics as Prometheus text, or JSON for a .json path")
+    args = parser.parse_args(argv)
+    if args.check_showdowns and args.projection not in (None, "auditor"):
+        parser.error("--check-showdowns needs the scores only --projection auditor selects")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Latency histograms and counters shared by the suites and load tools.
+
+:class:`Histogram` is HDR-style: durations are bucketed by their top
+``sub_bucket_bits`` significant bits, so memory is fixed (a few thousand
+counters covering 1 ns to ~18 minutes) and every recorded value is kept
+within ``1 / 2 ** (sub_bucket_bits - 1)`` relative error (0.8% by default).
+Histograms with the same layout merge by adding counts, including across
+processes via :meth:`Histogram.to_dict`/:meth:`Histogram.from_dict`.
+
+:class:`MetricsRegistry` holds named, labelled histograms and counters and
+exports them as Prometheus text or JSON. ``METRICS`` is the process-wide
+registry the client, subscriptions and load tools record into.
+"""
+
+import json
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+
+PERCENTILES = (50, 95, 99, 99.9)
+DEFAULT_SUB_BUCKET_BITS = 8
+DEFAULT_HIGHEST_NS = 1 << 40
+
+
+class Histogram:
+    """Fixed-memory log-linear histogram of durations."""
+
+    __slots__ = ("sub_bucket_bits", "highest_ns", "counts", "count", "sum_ns", "min_ns", "max_ns", "_half", "_full")
+
+    def __init__(self, sub_bucket_bits=DEFAULT_SUB_BUCKET_BITS, highest_ns=DEFAULT_HIGHEST_NS):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.highest_ns = highest_ns
+        self._full = 1 << sub_bucket_bits
+        self._half = self._full >> 1
+        self.counts = array("Q", bytes(8 * (self._index(highest_ns) + 1)))
+        self.count = 0
+        self.sum_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    def _index(self, value_ns):
+        if value_ns < self._full:
+            return value_ns
+        shift = value_ns.bit_length() - self.sub_bucket_bits
+        return self._full + (shift - 1) * self._half + (value_ns >> shift) - self._half
+
+    def _bounds(self, index):
+        """Lowest and highest value that land in bucket ``index``."""
+        if index < self._full:
+            return index, index
+        shift, offset = divmod(index - self._full, self._half)
+        shift += 1
+        low = (offset + self._half) << shift
+        return low, low + (1 << shift) - 1
+
+    def record_ns(self, value_ns, count=1):
+        value_ns = min(max(int(value_ns), 0), self.highest_ns)
+        self.counts[self._index(value_ns)] += count
+        self.count += count
+        self.sum_ns += value_ns * count
+        if self.min_ns is None or value_ns < self.min_ns:
+            self.min_ns = value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+
+    def record(self, seconds, count=1):
+        self.record_ns(seconds * 1e9, count)
+
+    def merge(self, other):
+        if (other.sub_bucket_bits, other.highest_ns) != (self.sub_bucket_bits, self.highest_ns):
+            raise ValueError("cannot merge histograms with different bucket layouts")
+        counts = self.counts
+        for index, n in enumerate(other.counts):
+            if n:
+                counts[index] += n
+        self.count += other.count
+        self.sum_ns += other.sum_ns
+        if other.min_ns is not None and (self.min_ns is None or other.min_ns < self.min_ns):
+            self.min_ns = other.min_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        return self
+
+    def percentile(self, pct):
+        """Nearest-rank percentile in seconds (bucket midpoint, clamped to min/max)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * pct // 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                low, high = self._bounds(index)
+                value = min(max((low + high) // 2, self.min_ns), self.max_ns)
+                return value / 1e9
+        return self.max_ns / 1e9
+
+    def percentiles(self, percentiles=PERCENTILES):
+        return {f"p{pct:g}": self.percentile(pct) for pct in percentiles}
+
+    @property
+    def mean(self):
+        return self.sum_ns / self.count / 1e9 if self.count else 0.0
+
+    def to_dict(self):
+        return {
+            "sub_bucket_bits": self.sub_bucket_bits,
+            "highest_ns": self.highest_ns,
+            "count": self.count,
+            "sum_ns": self.sum_ns,
+            "min_ns": self.min_ns,
+            "max_ns": self.max_ns,
+            "counts": {str(i): n for i, n in enumerate(self.counts) if n},
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        histogram = cls(d["sub_bucket_bits"], d["highest_ns"])
+        for index, n in d["counts"].items():
+            histogram.counts[int(index)] = n
+        histogram.count = d["count"]
+        histogram.sum_ns = d["sum_ns"]
+        histogram.min_ns = d["min_ns"]
+        histogram.max_ns = d["max_ns"]
+        return histogram
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self, value=0):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Named histograms and counters keyed by ``(name, labels)``.
+
+    Look a metric up once and keep the returned object when recording on a
+    hot path; lookups build a key from the labels.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, **labels):
+        key = _key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, Histogram())
+        return histogram
+
+    def counter(self, name, **labels):
+        key = _key(name, labels)
+        counter = self.counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self.counters.setdefault(key, Counter())
+        return counter
+
+    @contextmanager
+    def time(self, name, **labels):
+        histogram = self.histogram(name, **labels)
+        started = time.perf_counter_ns()
+        try:
+            yield histogram
+        finally:
+            histogram.record_ns(time.perf_counter_ns() - started)
+
+    def merge(self, other):
+        for key, histogram in other.histograms.items():
+            self.histogram(key[0], **dict(key[1])).merge(histogram)
+        for key, counter in other.counters.items():
+            self.counter(key[0], **dict(key[1])).inc(counter.value)
+        return self
+
+    def clear(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def to_dict(self):
+        return {
+            "histograms": [
+                {"name": name, "labels": dict(labels), **h.to_dict()} for (name, labels), h in sorted(self.histograms.items())
+            ],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": c.value} for (name, labels), c in sorted(self.counters.items())
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        registry = cls()
+        for entry in d.get("histograms", ()):
+            registry.histograms[_key(entry["name"], entry["labels"])] = Histogram.from_dict(entry)
+        for entry in d.get("counters", ()):
+            registry.counter(entry["name"], **entry["labels"]).inc(entry["value"])
+        return registry
+
+    def to_prometheus(self):
+        """Prometheus text exposition: histograms as summaries in seconds."""
+        lines = []
+        typed = set()
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} summary")
+                typed.add(name)
+            for pct in PERCENTILES:
+                quantile = ("quantile", f"{pct / 100:g}")
+                lines.append(f"{name}{_label_text(labels, (quantile,))} {histogram.percentile(pct):.9g}")
+            lines.append(f"{name}_sum{_label_text(labels)} {histogram.sum_ns / 1e9:.9g}")
+            lines.append(f"{name}_count{_label_text(labels)} {histogram.count}")
+        for (name, labels), counter in sorted(self.counters.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_label_text(labels)} {counter.value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write Prometheus text, or JSON when ``path`` ends in ``.json``."""
+        text = json.dumps(self.to_dict()) if str(path).endswith(".json") else self.to_prometheus()
+        with open(path, "w") as fh:
+            fh.write(text)
+
+    @classmethod
+    def read(cls, path):
+        with open(path) as fh:
+            return cls.from_dict(json.load(fh))
+
+
+METRICS = MetricsRegistry()
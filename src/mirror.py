@@ -0,0 +1,434 @@
+"""
+Client-side hand mirrors: read a hand's state from its frames, not by query.
+
+:class:`HandMirror` holds one hand as a :class:`~src.validator.HandState`,
+started from the ``deal`` frame (or a ``hand`` query, or the first
+``handEvent``) and moved forward by each ``handEvent`` delta. Bots and
+assertions read the current actor, street, pot, bets and stacks from it
+locally instead of sending ``hand(id)`` after every action. An event that
+does not apply cleanly is kept in :attr:`HandMirror.problems`.
+
+:class:`MirrorSet` mirrors every hand on one subscriber's stream (pass it
+as a :class:`~src.subscriptions.GraphQLWSConnection` ``recorder``) and lets
+a bot wait for a state with :meth:`MirrorSet.until`.
+:meth:`MirrorSet.reconcile` queries the server for a batch of hands and
+reports every field where a mirror has drifted from it. Use
+:meth:`MirrorSet.reconcile_every` to do that in the background. A mirror
+that is a few frames behind the server is skipped until the next round,
+not flagged.
+
+    python -m src.mirror --local --tables 20 --hands 10 --reconcile 0.5
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import aiohttp
+
+from .client import GRAPHQL_URL, GraphQLClient, GraphQLError
+from .events import DealEvent, HandEvent, decode_frame, decode_street_event
+from .load import observe_table, table_players
+from .metrics import METRICS
+from .queries import register
+from .subscriptions import WS_EVENT_TIMEOUT_SECONDS, WS_URL, GraphQLWSConnection
+from .validator import STREETS, HandState
+
+# Completed hands kept for reading after the fact; live hands are always kept.
+COMPLETED_HANDS = 10_000
+RECONCILE_BATCH = 50
+
+MIRROR_HAND_QUERY = register(
+    "MirrorHand",
+    """
+query MirrorHand($id: ID!) {
+  hand(id: $id) {
+    id
+    isComplete
+    winnerId
+    playerEvents {
+      playerId
+    }
+    streetEvents {
+      streetType
+      currentActivePlayers {
+        id
+        bet
+        stack
+        isInactive
+        isBigBlind
+      }
+      pot
+    }
+  }
+}
+""",
+)
+
+
+@dataclass(frozen=True)
+class Drift:
+    hand_id: str
+    message: str
+
+    def __str__(self):
+        return f"hand {self.hand_id}: {self.message}"
+
+
+class HandMirror:
+    """One hand's state, kept current from its frames."""
+
+    __slots__ = ("state", "actions", "problems")
+
+    def __init__(self, state, actions=0):
+        self.state = state
+        self.actions = actions
+        self.problems = []
+
+    @classmethod
+    def from_deal(cls, deal, streets=STREETS):
+        """Mirror a decoded :class:`~src.events.Deal`."""
+        return cls(HandState.from_deal(deal, streets), len(deal.playerEvents))
+
+    @classmethod
+    def from_hand(cls, hand, streets=STREETS):
+        """Mirror a ``hand`` query result shaped like :data:`MIRROR_HAND_QUERY`.
+
+        Who already acted on the current street is not in the query, so turn
+        order is trusted from the next street on.
+        """
+        actions = len(hand.get("playerEvents") or ())
+        state = HandState(
+            hand["id"],
+            decode_street_event(hand["streetEvents"][-1]),
+            streets,
+            turns_known=not actions,
+            complete=hand.get("isComplete"),
+        )
+        state.winner_id = hand.get("winnerId")
+        return cls(state, actions)
+
+    @classmethod
+    def from_event(cls, event, streets=STREETS):
+        """Mirror a hand first seen mid-stream, from a :class:`~src.events.HandEvent`.
+
+        The number of actions before it is unknown, so :attr:`actions`
+        counts from here and reconciling is skipped for this hand.
+        """
+        state = HandState(event.handId, event.streetEvent, streets, turns_known=False, complete=event.isComplete)
+        if event.isComplete is None:
+            state.complete = state.over()
+        state.winner_id = event.winnerId
+        return cls(state, None)
+
+    @property
+    def hand_id(self):
+        return self.state.hand_id
+
+    @property
+    def street(self):
+        return self.state.street
+
+    @property
+    def pot(self):
+        return self.state.pot
+
+    @property
+    def complete(self):
+        return self.state.complete
+
+    @property
+    def winner_id(self):
+        return self.state.winner_id
+
+    @property
+    def current_actor(self):
+        """Id of the player due to act, or ``None`` once the hand is over."""
+        if self.state.complete:
+            return None
+        actor = self.state.next_actor()
+        return actor.id if actor is not None else None
+
+    @property
+    def to_call(self):
+        """Chips the current actor must put in to stay in."""
+        actor = self.state.next_actor()
+        return self.state.top_bet - actor.bet if actor is not None else 0
+
+    @property
+    def stacks(self):
+        """Stacks as of the last street snapshot (winnings are not paid into them)."""
+        return {p.id: p.stack for p in self.state.players.values()}
+
+    @property
+    def bets(self):
+        return {p.id: p.bet for p in self.state.players.values()}
+
+    @property
+    def folded(self):
+        return frozenset(self.state.folded)
+
+    def apply(self, event):
+        """Apply one :class:`~src.events.HandEvent`; return what did not add up."""
+        problems = self.state.update(event)
+        if event.playerEvent is not None and self.actions is not None:
+            self.actions += 1
+        self.problems += problems
+        return problems
+
+    def diff(self, hand):
+        """Differences from a ``hand`` query result (:data:`MIRROR_HAND_QUERY` shape)."""
+        found = []
+        if bool(hand.get("isComplete")) != self.complete:
+            found.append(f"isComplete is {hand.get('isComplete')}, mirror has {self.complete}")
+        if hand.get("winnerId") is not None and self.winner_id is not None and hand["winnerId"] != self.winner_id:
+            found.append(f"winnerId is {hand['winnerId']}, mirror has {self.winner_id}")
+        street = decode_street_event(hand["streetEvents"][-1])
+        if street.streetType != self.street:
+            found.append(f"street is {street.streetType}, mirror has {self.street}")
+        if street.pot != self.pot:
+            found.append(f"pot is {street.pot}, mirror has {self.pot}")
+        mirrored = self.state.players
+        for p in street.currentActivePlayers:
+            mine = mirrored.get(p.id)
+            if mine is None:
+                found.append(f"{p.id} is seated, mirror does not have them")
+            elif (p.bet, p.stack, p.isInactive) != (mine.bet, mine.stack, mine.isInactive):
+                found.append(
+                    f"{p.id} bet/stack/folded is {p.bet}/{p.stack}/{p.isInactive}, "
+                    f"mirror has {mine.bet}/{mine.stack}/{mine.isInactive}"
+                )
+        return found
+
+
+@dataclass
+class MirrorReport:
+    events: int = 0
+    hands: int = 0
+    reconciles: int = 0
+    checked: int = 0
+    behind: int = 0
+    drift: list = field(default_factory=list)
+
+    def summary(self):
+        return (
+            f"events={self.events} hands={self.hands} reconciles={self.reconciles} checked={self.checked} "
+            f"behind={self.behind} drift={len(self.drift)}"
+        )
+
+
+class MirrorSet:
+    """Mirrors of every hand on one subscriber's stream.
+
+    Feed it one subscriber's frames: the same event from two subscribers
+    would be applied twice. ``deal`` frames start a mirror and ``handEvent``
+    frames move it on; frames of a hand already dropped are ignored.
+    """
+
+    def __init__(self, streets=STREETS, metrics=METRICS):
+        self.streets = tuple(streets)
+        self.mirrors = {}
+        self.completed = OrderedDict()
+        self.report = MirrorReport()
+        self._changed = asyncio.Event()
+        self._events = metrics.counter("mirror_events_total")
+        self._queries = metrics.counter("mirror_reconcile_queries_total")
+        self._drift = metrics.counter("mirror_drift_total")
+
+    def get(self, hand_id):
+        return self.mirrors.get(hand_id)
+
+    def record(self, subscriber_id, frame, raw=None, received_ns=None):
+        event = decode_frame(frame)
+        if isinstance(event, HandEvent):
+            self.apply(event)
+        elif isinstance(event, DealEvent) and event.deal is not None and event.deal.streetEvents:
+            if event.deal.id not in self.mirrors:
+                self.add(HandMirror.from_deal(event.deal, self.streets))
+
+    def apply(self, event):
+        """Move the hand's mirror on by one decoded :class:`~src.events.HandEvent`."""
+        self.report.events += 1
+        self._events.inc()
+        mirror = self.mirrors.get(event.handId)
+        if mirror is None:
+            if event.streetEvent is None or event.handId in self.completed:
+                return
+            self.add(HandMirror.from_event(event, self.streets))
+        elif not mirror.complete:
+            mirror.apply(event)
+            if mirror.complete:
+                self._completed(mirror)
+        self._notify()
+
+    def add(self, mirror):
+        """Start tracking ``mirror``, e.g. one built by :meth:`HandMirror.from_hand` on joining mid-hand."""
+        self.report.hands += 1
+        self.mirrors[mirror.hand_id] = mirror
+        if mirror.complete:
+            self._completed(mirror)
+        self._notify()
+
+    def _completed(self, mirror):
+        self.completed[mirror.hand_id] = None
+        if len(self.completed) > COMPLETED_HANDS:
+            self.mirrors.pop(self.completed.popitem(last=False)[0], None)
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def until(self, hand_id, predicate, timeout=WS_EVENT_TIMEOUT_SECONDS):
+        """Wait until ``hand_id`` is mirrored and ``predicate(mirror)`` holds; return the mirror."""
+        deadline = time.monotonic() + timeout
+        while True:
+            mirror = self.mirrors.get(hand_id)
+            if mirror is not None and predicate(mirror):
+                return mirror
+            changed = self._changed
+            await asyncio.wait_for(changed.wait(), max(deadline - time.monotonic(), 0))
+
+    async def reconcile(self, client, hand_ids=None):
+        """Compare mirrors with the server in batches; return the :class:`Drift` found.
+
+        Mirrors that have seen fewer actions than the server are behind,
+        not wrong, and are left for the next round.
+        """
+        if hand_ids is None:
+            hand_ids = [h for h, m in self.mirrors.items() if m.actions is not None]
+        self.report.reconciles += 1
+        found = []
+        for start in range(0, len(hand_ids), RECONCILE_BATCH):
+            batch = hand_ids[start : start + RECONCILE_BATCH]
+            self._queries.inc()
+            for hand_id, hand in zip(batch, await client.hands(batch, MIRROR_HAND_QUERY)):
+                mirror = self.mirrors.get(hand_id)
+                if mirror is None or hand is None:
+                    continue
+                if mirror.actions != len(hand.get("playerEvents") or ()):
+                    self.report.behind += 1
+                    continue
+                self.report.checked += 1
+                found += [Drift(hand_id, message) for message in mirror.diff(hand)]
+        self.report.drift += found
+        self._drift.inc(len(found))
+        return found
+
+    async def reconcile_every(self, client, interval):
+        """Reconcile every live mirror each ``interval`` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            live = [h for h, m in self.mirrors.items() if not m.complete and m.actions is not None]
+            if live:
+                await self.reconcile(client, live)
+
+
+@dataclass
+class MirrorRunReport:
+    tables: int
+    hands: int = 0
+    actions: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def summary(self):
+        # Without the mirror each action would be followed by a hand query.
+        return (
+            f"tables={self.tables} hands={self.hands} actions={self.actions} errors={self.errors} "
+            f"elapsed={self.elapsed:.2f}s hand queries saved={self.actions}"
+        )
+
+
+async def play_table(client, mirrors, table_id, hands, players_per_table, report):
+    """Check (or call) every hand down, reading whose turn it is from ``mirrors`` alone."""
+    players = table_players(table_id, players_per_table)
+    for _ in range(hands):
+        try:
+            hand_id = await client.deal(players, table_id=table_id)
+            mirror = await mirrors.until(hand_id, lambda m: True)
+            while not mirror.complete:
+                actor, actions = mirror.state.next_actor(), mirror.actions
+                to_call = min(mirror.to_call, actor.stack)
+                if to_call:
+                    await client.play_turn(hand_id, actor.id, "BET", float(to_call), table_id=table_id)
+                else:
+                    await client.play_turn(hand_id, actor.id, "CHECK", 0.0, table_id=table_id)
+                report.actions += 1
+                await mirrors.until(hand_id, lambda m: m.actions > actions)
+        except (GraphQLError, aiohttp.ClientError, asyncio.TimeoutError):
+            report.errors += 1
+            continue
+        report.hands += 1
+
+
+async def run_mirror(
+    client, ws_url=WS_URL, tables=10, hands=5, players_per_table=3, reconcile=1.0, prefix="mirror", metrics=METRICS
+):
+    """Play ``hands`` hands on ``tables`` tables from mirrors, reconciling every ``reconcile`` seconds.
+
+    Returns the run's :class:`MirrorRunReport` and the :class:`MirrorSet`;
+    every hand is reconciled once more at the end.
+    """
+    run_id = uuid.uuid4().hex[:8]
+    table_ids = [f"{prefix}-{run_id}-{i}" for i in range(tables)]
+    report = MirrorRunReport(tables=tables)
+    mirrors = MirrorSet(metrics=metrics)
+    async with GraphQLWSConnection(ws_url, user_token=f"{prefix}-{run_id}", recorder=mirrors) as connection:
+        for table_id in table_ids:
+            await observe_table(connection, table_id)
+        reconciler = asyncio.create_task(mirrors.reconcile_every(client, reconcile)) if reconcile else None
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(
+                *(play_table(client, mirrors, t, hands, players_per_table, report) for t in table_ids)
+            )
+        finally:
+            if reconciler is not None:
+                reconciler.cancel()
+        report.elapsed = time.perf_counter() - started
+    await mirrors.reconcile(client)
+    return report, mirrors
+
+
+async def _main(args):
+    server = None
+    url, ws_url = args.url, args.ws_url
+    if args.local:
+        from .fake_server import FakePokerServer
+
+        server = await FakePokerServer(auto_deal=False).start()
+        url, ws_url = server.graphql_url, server.ws_url
+    try:
+        async with GraphQLClient(url) as client:
+            report, mirrors = await run_mirror(client, ws_url, args.tables, args.hands, args.players, args.reconcile)
+    finally:
+        if server is not None:
+            await server.stop()
+    print(report.summary())
+    print(mirrors.report.summary())
+    for drift in mirrors.report.drift[:10]:
+        print(f"  {drift}")
+    if args.metrics_out:
+        METRICS.write(args.metrics_out)
+    return mirrors.report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=GRAPHQL_URL)
+    parser.add_argument("--ws-url", default=WS_URL)
+    parser.add_argument("--local", action="store_true", help="run against an in-process stand-in server")
+    parser.add_argument("--tables", type=int, default=10)
+    parser.add_argument("--hands", type=int, default=5)
+    parser.add_argument("--players", type=int, default=3, help="players per table")
+    parser.add_argument("--reconcile", type=float, default=1.0, help="seconds between reconciles; 0 for only the last")
+    parser.add_argument("--metrics-out", help="write metrics as Prometheus text, or JSON for a .json path")
+    report = asyncio.run(_main(parser.parse_args(argv)))
+    raise SystemExit(1 if report.drift else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,10 @@ import asyncio
 
 HTTP_TIMEOUT_SECONDS = 5
 
+hand_event_subscription = "subscription OnHandEvent($mutationType: MutationType) {\n  handEvent(mutationType: $mutationType) {\n    mutationType\n    handId\n    streetEvent {\n      streetType\n      currentActivePlayers {\n        id\n        bet\n        stack\n        isInactive\n        isBigBlind\n      }\n      pot\n    }\n    playerEvent {\n      playerId\n      action\n      amount\n      streetType\n      currentStack\n      currentPot\n    }\n    cards {\n      flop\n      turn\n      river\n    }\n  }\n}\n"
+
+play_turn_mutation = "mutation PlayTurn($id: ID!, $playerId: ID!, $action: PlayerAction!, $amount: Decimal!) {\n  playTurn(id: $id, playerId: $playerId, action: $action, amount: $amount)\n}\n"
+
 
 def play_turn_payload(hand_id, player, action, amount):
     return {
@@ -13,11 +17,11 @@ def play_turn_payload(hand_id, player, action, amount):
             "action": action,
             "amount": amount,
         },
-        "query": "mutation PlayTurn($id: ID!, $playerId: ID!, $action: PlayerAction!, $amount: Decimal!) {\n  playTurn(id: $id, playerId: $playerId, action: $action, amount: $amount)\n}\n",
+        "query": play_turn_mutation,
     }
 
-def play_turn_headers(player, hand_id):
-    return {"X-User-Token": player, "X-Table-Token": "123", "X-Hand-Token": hand_id}
+def play_turn_headers(player, hand_id, table_id="123"):
+    return {"X-User-Token": player, "X-Table-Token": table_id, "X-Hand-Token": hand_id}
 
 
 def execute_play_hand(hand_id, player, action, amount, semaphore):
@@ -40,7 +44,7 @@ async def subscribe_to_play(ws, hand_id):
             "variables": {},
             "extensions": {},
             "operationName": "OnHandEvent",
-            "query": "subscription OnHandEvent($mutationType: MutationType) {\n  handEvent(mutationType: $mutationType) {\n    mutationType\n    handId\n    streetEvent {\n      streetType\n      currentActivePlayers {\n        id\n        bet\n        stack\n        isInactive\n        isBigBlind\n      }\n      pot\n    }\n    playerEvent {\n      playerId\n      action\n      amount\n      streetType\n      currentStack\n      currentPot\n    }\n    cards {\n      flop\n      turn\n      river\n    }\n  }\n}\n",
+            "query": hand_event_subscription,
         },
     }
 
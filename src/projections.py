@@ -0,0 +1,122 @@
+"""
+Subscription projection profiles generated from one schema description.
+
+:data:`SCHEMA` lists every field of the ``deal`` and ``handEvent``
+subscription payloads, each leaf tagged with the first profile that needs it:
+
+* ``observer``: renders the table: whose turn, bets, stacks, pot, board and
+  winner. No hole cards, scores or action history. Enough for
+  :class:`~src.mirror.HandMirror`, :class:`~src.validator.HandValidator`
+  and :class:`~src.sequencing.HandSequencer`.
+* ``player``: what a bot needs on top: hole cards, blinds and the street of
+  each action, which tells the sequencer where a late action belongs.
+* ``auditor``: everything, including scores, hand descriptions and the
+  full ``playerEvents`` history.
+
+Each profile includes the ones before it. :func:`document` renders a
+profile's selection set as a subscription. Every ``(field, profile)`` pair is
+registered in :mod:`src.queries` as e.g. ``DealObserver`` and
+``HandEventPlayer``, and :data:`PROJECTIONS` maps the pair to its
+:class:`~src.queries.Query`. Payload fields a profile leaves out decode as
+``None`` (see :mod:`src.events`).
+
+    python -m bench.bench_projections --tables 20 --hands 10
+"""
+
+from .queries import register
+
+OBSERVER, PLAYER, AUDITOR = PROFILES = ("observer", "player", "auditor")
+
+_CARDS = {"flop": OBSERVER, "turn": OBSERVER, "river": OBSERVER}
+_ACTIVE_PLAYER = {"id": OBSERVER, "bet": OBSERVER, "stack": OBSERVER, "isInactive": OBSERVER, "isBigBlind": PLAYER}
+_STREET_EVENT = {"streetType": OBSERVER, "currentActivePlayers": _ACTIVE_PLAYER, "pot": OBSERVER}
+_PLAYER_EVENT = {
+    "playerId": OBSERVER,
+    "action": OBSERVER,
+    "amount": OBSERVER,
+    "streetType": PLAYER,
+    "currentStack": AUDITOR,
+    "currentPot": AUDITOR,
+}
+
+SCHEMA = {
+    "deal": {
+        "mutationType": AUDITOR,
+        "id": OBSERVER,
+        "deal": {
+            "id": OBSERVER,
+            "tableId": OBSERVER,
+            "players": {"id": OBSERVER, "stack": OBSERVER, "cards": PLAYER, "score": AUDITOR, "description": AUDITOR},
+            "cards": {"flop": AUDITOR, "turn": AUDITOR, "river": AUDITOR},
+            "playerEvents": {name: AUDITOR for name in _PLAYER_EVENT},
+            "streetEvents": _STREET_EVENT,
+        },
+    },
+    "handEvent": {
+        "mutationType": AUDITOR,
+        "handId": OBSERVER,
+        "streetEvent": _STREET_EVENT,
+        "playerEvent": _PLAYER_EVENT,
+        "cards": _CARDS,
+        "buttonIndex": PLAYER,
+        "isComplete": OBSERVER,
+        "winnerId": OBSERVER,
+    },
+}
+
+_OPERATION_PREFIXES = {"deal": "Deal", "handEvent": "HandEvent"}
+
+
+def selection(tree, profile):
+    """The part of ``tree`` that ``profile`` selects, as nested dicts (``None`` for leaves)."""
+    rank = PROFILES.index(profile)
+    selected = {}
+    for name, sub in tree.items():
+        if isinstance(sub, dict):
+            inner = selection(sub, profile)
+            if inner:
+                selected[name] = inner
+        elif PROFILES.index(sub) <= rank:
+            selected[name] = None
+    return selected
+
+
+def _render(tree, indent):
+    lines = []
+    for name, sub in tree.items():
+        if sub is None:
+            lines.append(f"{indent}{name}")
+        else:
+            lines += [f"{indent}{name} {{", *_render(sub, indent + "  "), f"{indent}}}"]
+    return lines
+
+
+def operation_name(field, profile):
+    return f"{_OPERATION_PREFIXES[field]}{profile.capitalize()}"
+
+
+def document(field, profile):
+    """Subscription text selecting ``profile``'s fields of ``field``."""
+    body = "\n".join(_render(selection(SCHEMA[field], profile), "    "))
+    return (
+        f"subscription {operation_name(field, profile)}($mutationType: MutationType) {{\n"
+        f"  {field}(mutationType: $mutationType) {{\n{body}\n  }}\n}}\n"
+    )
+
+
+PROJECTIONS = {
+    (field, profile): register(operation_name(field, profile), document(field, profile))
+    for field in SCHEMA
+    for profile in PROFILES
+}
+
+
+async def subscribe(connection, field, profile, table_token=None, hand_token=None):
+    """Start ``profile``'s ``field`` subscription on a :class:`~src.subscriptions.GraphQLWSConnection`."""
+    query = PROJECTIONS[field, profile]
+    extra = {}
+    if table_token is not None:
+        extra["x-table-token"] = table_token
+    if hand_token is not None:
+        extra["x-hand-token"] = hand_token
+    return await connection.subscribe(query.text, query.name, extra_payload=extra or None)
@@ -0,0 +1,115 @@
+"""
+Registry of the GraphQL documents the harness sends.
+
+Each document is serialized once at import: its JSON-encoded text and its
+SHA-256 (the automatic-persisted-query id) are kept on a frozen
+:class:`Query`, so building a request body only encodes the variables.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+
+from .deal import deal_mutation_query, deal_subscription
+from .play import hand_event_subscription, play_turn_mutation
+
+APQ_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Query:
+    name: str
+    text: str
+    sha256: str
+    text_json: bytes
+    name_json: bytes
+    extensions_json: bytes
+
+    @classmethod
+    def build(cls, name, text):
+        sha256 = hashlib.sha256(text.encode()).hexdigest()
+        extensions = {"persistedQuery": {"version": APQ_VERSION, "sha256Hash": sha256}}
+        return cls(
+            name=name,
+            text=text,
+            sha256=sha256,
+            text_json=json.dumps(text).encode(),
+            name_json=json.dumps(name).encode(),
+            extensions_json=json.dumps(extensions, separators=(",", ":")).encode(),
+        )
+
+    def encode(self, variables=None, persisted=False, include_text=True):
+        """Return the request body as bytes.
+
+        ``persisted`` adds the persisted-query extension; with
+        ``include_text=False`` the document itself is left out and the server
+        resolves it from the hash.
+        """
+        parts = [b'{"operationName":', self.name_json, b',"variables":', _dumps(variables or {})]
+        if include_text or not persisted:
+            parts += [b',"query":', self.text_json]
+        if persisted:
+            parts += [b',"extensions":', self.extensions_json]
+        parts.append(b"}")
+        return b"".join(parts)
+
+
+_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
+def _dumps(value):
+    return _ENCODER.encode(value).encode()
+
+
+REGISTRY = {}
+
+
+def register(name, text):
+    """Add ``text`` under operation ``name`` (idempotent for identical text)."""
+    query = REGISTRY.get(name)
+    if query is not None:
+        if query.text != text:
+            raise ValueError(f"operation {name} is already registered with different text")
+        return query
+    query = REGISTRY[name] = Query.build(name, text)
+    return query
+
+
+def get(name):
+    return REGISTRY[name]
+
+
+HAND_QUERY_TEXT = """
+query Hand($id: ID!) {
+  hand(id: $id) {
+    id
+    tableId
+    isComplete
+    winnerId
+    buttonIndex
+    smallBlindIndex
+    bigBlindIndex
+    players {
+      id
+      stack
+    }
+    streetEvents {
+      streetType
+      currentActivePlayers {
+        id
+        bet
+        stack
+        isInactive
+        isBigBlind
+      }
+      pot
+    }
+  }
+}
+"""
+
+DEAL_MUTATION = register("DealHand", deal_mutation_query)
+PLAY_TURN_MUTATION = register("PlayTurn", play_turn_mutation)
+HAND_QUERY = register("Hand", HAND_QUERY_TEXT)
+DEAL_SUBSCRIPTION = register("DealSubscription", deal_subscription)
+HAND_EVENT_SUBSCRIPTION = register("OnHandEvent", hand_event_subscription)
@@ -0,0 +1,160 @@
+"""
+Precomputed seven-card rank tables, stored as ``.npy`` files and memory-mapped.
+
+A seven-card score is the better of two lookups:
+
+* ``ranks.npy``: the best non-flush score for each multiset of seven ranks,
+  indexed by a perfect hash (the combinatorial-number-system index of the
+  sorted ranks, so 50388 slots for the 49205 reachable multisets);
+* ``flush.npy``: the best flush or straight-flush score for each 13-bit mask
+  of ranks in the flush suit.
+
+Scores use the :mod:`src.evaluator` encoding. The tables are generated once
+with :func:`build` (a few hundred milliseconds) and :func:`load` maps them
+read-only, so startup is a pair of ``mmap`` calls and worker processes share
+the same page-cache pages.
+
+    python -m src.rank_table build
+    python -m src.rank_table bench --hands 1000000
+"""
+
+import argparse
+import os
+import time
+from itertools import combinations_with_replacement
+from math import comb
+from pathlib import Path
+
+import numpy as np
+
+from . import evaluator
+
+DEFAULT_DIR = Path(os.environ.get("RANK_TABLE_DIR", Path.home() / ".cache" / "unlimited-poker" / "rank-table"))
+CARDS = 7
+RANK_SLOTS = comb(13 + CARDS - 1, CARDS)
+FLUSH_SLOTS = 1 << 13
+
+# _COLEX[i, r] is the contribution of the i-th smallest rank r to the index.
+_COLEX = np.array([[comb(r + i, i + 1) for r in range(13)] for i in range(CARDS)], dtype=np.int64)
+_POSITIONS = np.arange(CARDS)
+_COLEX_ROWS = _COLEX.tolist()
+_RANK_OF = {r: i for i, r in enumerate(evaluator.RANKS)}
+
+
+def rank_index(sorted_ranks):
+    """Perfect-hash slot of a sorted ``(hands, 7)`` rank array."""
+    return _COLEX[_POSITIONS, sorted_ranks].sum(axis=-1)
+
+
+def generate():
+    """Return ``(ranks, flush)`` score tables as int32 arrays."""
+    multisets = np.array(
+        [m for m in combinations_with_replacement(range(13), CARDS) if max(m.count(r) for r in set(m)) <= 4],
+        dtype=np.int64,
+    )
+    # Sorted ranks with suits cycling 0-3 never hold five of a suit, and equal
+    # ranks (adjacent after sorting) always get distinct suits.
+    ranks = np.zeros(RANK_SLOTS, dtype=np.int32)
+    ranks[rank_index(multisets)] = evaluator.evaluate(multisets * 4 + _POSITIONS % 4)
+
+    flush = np.zeros(FLUSH_SLOTS, dtype=np.int32)
+    masks = np.arange(FLUSH_SLOTS)
+    sizes = np.array([bin(m).count("1") for m in masks])
+    for size in range(5, CARDS + 1):
+        selected = masks[sizes == size]
+        cards = np.array([[r * 4 for r in range(13) if m >> r & 1] for m in selected], dtype=np.int64)
+        flush[selected] = evaluator.evaluate(cards)
+    return ranks, flush
+
+
+def _save(path, array):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def build(directory=DEFAULT_DIR):
+    """Generate the tables into ``directory``; safe to race from several processes."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    ranks, flush = generate()
+    _save(directory / "ranks.npy", ranks)
+    _save(directory / "flush.npy", flush)
+    return directory
+
+
+class RankTable:
+    """Read-only view of the two tables; see :func:`load`."""
+
+    def __init__(self, ranks, flush):
+        if ranks.shape != (RANK_SLOTS,) or flush.shape != (FLUSH_SLOTS,):
+            raise ValueError("rank table has the wrong shape; rebuild it")
+        self.ranks = ranks
+        self.flush = flush
+
+    def evaluate(self, cards):
+        """Scores for a ``(hands, 7)`` card-index array; same result as :func:`src.evaluator.evaluate`."""
+        cards = np.asarray(cards, dtype=np.int64)
+        scores = self.ranks[rank_index(np.sort(cards >> 2, axis=1))].astype(np.int64)
+        suits = cards & 3
+        suit_counts = evaluator._counts(suits, 4)
+        flushed = np.flatnonzero(suit_counts.max(axis=1) >= 5)
+        if flushed.size:
+            flush_suit = suit_counts[flushed].argmax(axis=1)
+            in_suit = suits[flushed] == flush_suit[:, None]
+            masks = np.where(in_suit, 1 << (cards[flushed] >> 2), 0).sum(axis=1)
+            scores[flushed] = np.maximum(scores[flushed], self.flush[masks])
+        return scores
+
+    def score(self, cards):
+        """Score of seven card strings such as ``["Ah", "Kd", ...]``, one hand at a time."""
+        ranks = sorted(_RANK_OF[c[0]] for c in cards)
+        best = int(self.ranks[sum(row[r] for row, r in zip(_COLEX_ROWS, ranks))])
+        suits = [c[1] for c in cards]
+        for suit in set(suits):
+            if suits.count(suit) >= 5:
+                mask = sum(1 << _RANK_OF[c[0]] for c in cards if c[1] == suit)
+                best = max(best, int(self.flush[mask]))
+        return best
+
+
+def load(directory=DEFAULT_DIR, build_missing=True):
+    """Memory-map the tables in ``directory``, generating them first if absent."""
+    directory = Path(directory)
+    if build_missing and not all((directory / name).exists() for name in ("ranks.npy", "flush.npy")):
+        build(directory)
+    return RankTable(np.load(directory / "ranks.npy", mmap_mode="r"), np.load(directory / "flush.npy", mmap_mode="r"))
+
+
+def verify_deal_scores(deal, table):
+    """Category and placing mismatches in a decoded ``Deal`` (see :func:`src.evaluator.score_mismatches`)."""
+    board = (*deal.cards.flop, deal.cards.turn, deal.cards.river)
+    scores = [table.score((*player.cards, *board)) for player in deal.players]
+    return evaluator.score_mismatches(deal.id, deal.players, scores)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("build", "bench"))
+    parser.add_argument("--dir", type=Path, default=DEFAULT_DIR)
+    parser.add_argument("--hands", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        started = time.perf_counter()
+        build(args.dir)
+        print(f"built {args.dir} in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return
+    started = time.perf_counter()
+    table = load(args.dir)
+    print(f"loaded in {(time.perf_counter() - started) * 1000:.2f} ms")
+    hands = evaluator._random_hands(np.random.default_rng(0), args.hands)
+    for name, evaluate in (("evaluator", evaluator.evaluate), ("rank table", table.evaluate)):
+        started = time.perf_counter()
+        evaluate(hands)
+        elapsed = time.perf_counter() - started
+        print(f"{name:<12} {args.hands / elapsed:12,.0f} hands/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Append-only recorder for subscription frames.
+
+Every frame becomes one compact JSON line::
+
+    {"t":<monotonic ns>,"s":"<subscriber>","h":"<hand id>","k":"<field>","f":<raw frame>}
+
+The raw frame text is spliced in as received, so recording never re-encodes a
+payload. Lines are buffered in memory and written in batches from a worker
+thread, keeping file I/O off the event loop.
+"""
+
+import asyncio
+import json
+import time
+
+DEFAULT_BATCH_SIZE = 2048
+DEFAULT_FLUSH_INTERVAL_SECONDS = 0.25
+
+
+def frame_identity(frame):
+    """Return ``(field, hand_id)`` for a decoded ``data`` frame."""
+    data = (frame.get("payload") or {}).get("data") or {}
+    if "handEvent" in data:
+        return "handEvent", (data["handEvent"] or {}).get("handId")
+    if "deal" in data:
+        return "deal", (data["deal"] or {}).get("id")
+    field = next(iter(data), None)
+    return field, None
+
+
+class HandRecorder:
+    """Batching JSON-lines writer; use as ``async with HandRecorder(path) as recorder``."""
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL_SECONDS):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.recorded = 0
+        self._buffer = []
+        self._file = None
+        self._flusher = None
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._closing = False
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        self._file = await asyncio.to_thread(open, self.path, "ab")
+        self._flusher = asyncio.create_task(self._flush_loop())
+        return self
+
+    def record(self, subscriber_id, frame, raw=None, received_ns=None):
+        """Queue one frame; ``raw`` is the frame text as received, if available."""
+        field, hand_id = frame_identity(frame)
+        self._buffer.append(
+            '{"t":%d,"s":%s,"h":%s,"k":%s,"f":%s}\n'
+            % (
+                received_ns if received_ns is not None else time.monotonic_ns(),
+                json.dumps(subscriber_id),
+                json.dumps(hand_id),
+                json.dumps(field),
+                raw if raw is not None else json.dumps(frame, separators=(",", ":")),
+            )
+        )
+        self.recorded += 1
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+            await asyncio.to_thread(self._file.write, "".join(batch).encode())
+
+    async def _flush_loop(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def close(self):
+        if self._flusher is not None:
+            self._closing = True
+            self._wake.set()
+            await self._flusher
+            self._flusher = None
+        if self._file is not None:
+            await self.flush()
+            await asyncio.to_thread(self._file.close)
+            self._file = None
+
+
+def read_recording(path):
+    """Yield recorded lines as dicts, in file order."""
+    with open(path, "rb") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
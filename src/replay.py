@@ -0,0 +1,174 @@
+"""
+Replay recorded hand histories against a server.
+
+Reads a :mod:`src.recorder` file, rebuilds every hand's seating and
+``playTurn`` sequence and plays them again, each hand on its own table, at
+real time (``--speed 1``), N times faster (``--speed N``) or as fast as
+possible (``--speed 0``).
+
+    python -m src.replay run.jsonl --speed 10 --local
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+
+import aiohttp
+
+from .client import GRAPHQL_URL, GraphQLClient, GraphQLError
+from .events import decode_frame
+from .load import LoadReport
+from .recorder import read_recording
+
+
+@dataclass(frozen=True)
+class RecordedAction:
+    at_ns: int
+    player_id: str
+    action: str
+    amount: float
+
+
+@dataclass(frozen=True)
+class RecordedHand:
+    hand_id: str
+    table_id: str
+    dealt_at_ns: int
+    seats: tuple
+    stacks: dict
+    actions: tuple
+
+
+def seats_from_preflop_order(order):
+    """Seat order that makes the default deal reproduce a preflop action order.
+
+    ``deal_mutation_params`` lets the server pick the button, which puts the
+    small and big blind in the first two seats; preflop action ends with the
+    blinds, so they are rotated to the front.
+    """
+    return tuple(order[-2:]) + tuple(order[:-2])
+
+
+def load_hands(rows):
+    """Group recorded rows (see :func:`src.recorder.read_recording`) into hands.
+
+    Several subscribers usually record the same hand; the deal comes from
+    the first frame seen and the actions from whichever subscriber saw the
+    most ``handEvent`` frames.
+    """
+    deals = {}
+    events = {}
+    for row in rows:
+        hand_id = row.get("h")
+        if hand_id is None:
+            continue
+        if row["k"] == "deal" and hand_id not in deals:
+            deals[hand_id] = (row["t"], decode_frame(row["f"]).deal)
+        elif row["k"] == "handEvent":
+            events.setdefault(hand_id, {}).setdefault(row["s"], []).append((row["t"], decode_frame(row["f"])))
+
+    hands = []
+    for hand_id, (dealt_at, deal) in deals.items():
+        preflop = deal.streetEvents[0].currentActivePlayers
+        streams = events.get(hand_id, {})
+        stream = max(streams.values(), key=len) if streams else []
+        actions = tuple(
+            RecordedAction(t, e.playerEvent.playerId, e.playerEvent.action.upper(), float(e.playerEvent.amount))
+            for t, e in stream
+            if e.playerEvent is not None
+        )
+        hands.append(
+            RecordedHand(
+                hand_id=hand_id,
+                table_id=deal.tableId,
+                dealt_at_ns=dealt_at,
+                seats=seats_from_preflop_order([p.id for p in preflop]),
+                stacks={p.id: float(p.stack + p.bet) for p in preflop},
+                actions=actions,
+            )
+        )
+    hands.sort(key=lambda h: h.dealt_at_ns)
+    return hands
+
+
+async def _sleep_until(started, offset_ns, speed):
+    if not speed:
+        return
+    delay = started + offset_ns / 1e9 / speed - time.perf_counter()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+async def replay_hand(client, report, hand, table_id, origin_ns, started, speed):
+    try:
+        await _sleep_until(started, hand.dealt_at_ns - origin_ns, speed)
+        t0 = time.perf_counter()
+        hand_id = await client.deal(list(hand.seats), hand.stacks, table_id=table_id)
+        report.record("deal", time.perf_counter() - t0)
+        for action in hand.actions:
+            await _sleep_until(started, action.at_ns - origin_ns, speed)
+            if speed:
+                report.record("lag", max(0.0, time.perf_counter() - started - (action.at_ns - origin_ns) / 1e9 / speed))
+            t0 = time.perf_counter()
+            await client.play_turn(hand_id, action.player_id, action.action, action.amount, table_id=table_id)
+            report.record("playTurn", time.perf_counter() - t0)
+    except (GraphQLError, aiohttp.ClientError, asyncio.TimeoutError):
+        report.errors += 1
+        return
+    report.hands += 1
+
+
+async def replay(client, hands, speed=1.0, prefix="replay"):
+    """Replay ``hands`` concurrently, each on a fresh table.
+
+    ``speed`` scales the recorded timeline; ``0``/``None`` ignores it and
+    plays every hand as fast as the server answers.
+    """
+    run_id = uuid.uuid4().hex[:8]
+    report = LoadReport(tables=len(hands))
+    if not hands:
+        return report
+    origin_ns = hands[0].dealt_at_ns
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            replay_hand(client, report, hand, f"{prefix}-{run_id}-{i}", origin_ns, started, speed)
+            for i, hand in enumerate(hands)
+        )
+    )
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+async def _main(args):
+    hands = load_hands(read_recording(args.recording))
+    server = None
+    url = args.url
+    if args.local:
+        from .fake_server import FakePokerServer
+
+        server = await FakePokerServer(auto_deal=False).start()
+        url = server.graphql_url
+    try:
+        async with GraphQLClient(url, max_connections=args.connections) as client:
+            report = await replay(client, hands, args.speed)
+    finally:
+        if server is not None:
+            await server.stop()
+    print(report.summary())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording")
+    parser.add_argument("--url", default=GRAPHQL_URL)
+    parser.add_argument("--local", action="store_true", help="replay against an in-process stand-in server")
+    parser.add_argument("--speed", type=float, default=1.0, help="timeline multiplier; 0 = as fast as possible")
+    parser.add_argument("--connections", type=int, default=64)
+    asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Parallel scenario runner.
+
+Splits every scenario's tables into jobs and spreads them over ``--workers``
+processes; each process plays its jobs concurrently as asyncio tasks on one
+pooled client. Tables and player names are unique per job (see
+:meth:`~src.scenario.ActionPlan.bind`), so scenarios never share server
+state and a run takes about as long as its slowest scenario rather than the
+sum of all of them.
+
+With ``--suite`` it runs the pytest suite instead, one pytest process per
+test module (or per node id given) and ``--workers`` of them at a time. The live suites deal on a
+table of their own per test, so modules can share one server; ``--local``
+serves the stand-in on ``localhost:3000`` for them, as ``--local-server``
+does for a plain ``pytest`` run.
+
+    python -m src.runner --local --workers 4 --tables 40
+    python -m src.runner --local --suite --workers 4
+    python -m src.runner --local --suite test/test_three_players.py test/test_rest_api.py
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from .client import GRAPHQL_URL, GraphQLClient
+from .metrics import METRICS, MetricsRegistry
+from .scenario import PLANS, ScenarioReport, run_plan
+
+SUITE_DIR = "test"
+# Port the live suites expect the API on.
+SUITE_SERVER_PORT = 3000
+
+
+async def _run_jobs(url, jobs, connections):
+    registry = MetricsRegistry()
+    async with GraphQLClient(url, max_connections=connections, metrics=registry) as client:
+        reports = await asyncio.gather(
+            *(run_plan(client, plan, tables, prefix, metrics=registry) for plan, tables, prefix in jobs)
+        )
+    return [
+        (plan.name, report.hands, report.errors, report.elapsed, report.latencies, report.failures)
+        for (plan, _, _), report in zip(jobs, reports)
+    ], registry.to_dict()
+
+
+def run_jobs(url, jobs, connections=64):
+    """Worker entry point: play ``(plan, tables, prefix)`` jobs concurrently in a fresh loop."""
+    return asyncio.run(_run_jobs(url, jobs, connections))
+
+
+def plan_jobs(plans, tables, workers, run_id):
+    """One job per scenario per worker, each with a distinct table prefix."""
+    jobs = []
+    for plan in plans:
+        for worker in range(workers):
+            share = tables // workers + (worker < tables % workers)
+            if share:
+                jobs.append((plan, share, f"{plan.name}-{run_id}-w{worker}"))
+    return jobs
+
+
+async def run_scenarios(url, plans=None, tables=10, workers=4, connections=64, metrics=METRICS):
+    """Play each plan on ``tables`` tables using ``workers`` processes.
+
+    ``workers=0`` runs everything as tasks in this process. Returns
+    ``({scenario: ScenarioReport}, elapsed)``; worker metrics are merged
+    into ``metrics``.
+    """
+    plans = list(plans if plans is not None else PLANS.values())
+    run_id = uuid.uuid4().hex[:8]
+    jobs = plan_jobs(plans, tables, max(workers, 1), run_id)
+    started = time.perf_counter()
+    if workers:
+        batches = [jobs[i::workers] for i in range(workers)]
+        loop = asyncio.get_running_loop()
+        # spawn, not fork: workers must not inherit this process's running loop.
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = await asyncio.gather(
+                *(loop.run_in_executor(pool, run_jobs, url, batch, connections) for batch in batches if batch)
+            )
+    else:
+        results = [await _run_jobs(url, jobs, connections)]
+    elapsed = time.perf_counter() - started
+
+    reports = {plan.name: ScenarioReport(tables=0, metrics=metrics) for plan in plans}
+    for job_results, registry in results:
+        metrics.merge(MetricsRegistry.from_dict(registry))
+        for name, hands, errors, job_elapsed, latencies, failures in job_results:
+            report = reports[name]
+            report.hands += hands
+            report.errors += errors
+            report.elapsed = max(report.elapsed, job_elapsed)
+            report.failures += failures
+            for operation, values in latencies.items():
+                report.latencies.setdefault(operation, []).extend(values)
+    for plan, share, _ in jobs:
+        reports[plan.name].tables += share
+    return reports, elapsed
+
+
+@dataclass
+class ModuleResult:
+    """Outcome of one test module's pytest process."""
+
+    module: str
+    returncode: int
+    elapsed: float
+    output: str
+
+    @property
+    def passed(self):
+        # 5: pytest collected no tests, e.g. a module of helpers only.
+        return self.returncode in (0, 5)
+
+
+def suite_modules(directory=SUITE_DIR):
+    """Every ``test_*.py`` module under ``directory``, in name order."""
+    return [str(path) for path in sorted(Path(directory).glob("test_*.py"))]
+
+
+async def run_module(module, pytest_args=()):
+    """Run ``module`` in its own pytest process."""
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "pytest",
+        "-q",
+        "-p",
+        "no:cacheprovider",
+        module,
+        *pytest_args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    output, _ = await process.communicate()
+    return ModuleResult(module, process.returncode, time.perf_counter() - started, output.decode(errors="replace"))
+
+
+async def run_suite(modules=None, workers=4, pytest_args=()):
+    """Run test modules ``workers`` at a time; return ``([ModuleResult], elapsed)``."""
+    modules = list(modules if modules is not None else suite_modules())
+    slots = asyncio.Semaphore(max(workers, 1))
+
+    async def run(module):
+        async with slots:
+            return await run_module(module, pytest_args)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run(module) for module in modules))
+    return results, time.perf_counter() - started
+
+
+async def _suite_main(args):
+    server = None
+    if args.local:
+        from .fake_server import FakePokerServer
+
+        server = await FakePokerServer(port=SUITE_SERVER_PORT, latency=args.latency).start()
+    try:
+        results, elapsed = await run_suite(args.suite or None, args.workers)
+    finally:
+        if server is not None:
+            await server.stop()
+    for result in results:
+        if not result.passed:
+            print(result.output)
+    for result in results:
+        outcome = result.output.strip().splitlines()[-1] if result.output.strip() else f"exit {result.returncode}"
+        print(f"{result.module:<40} {result.elapsed:6.2f}s  {outcome}")
+    slowest = max((r.elapsed for r in results), default=0.0)
+    print(f"total {elapsed:.2f}s, slowest module {slowest:.2f}s, sum {sum(r.elapsed for r in results):.2f}s")
+    return all(result.passed for result in results)
+
+
+async def _main(args):
+    server = None
+    url = args.url
+    if args.local:
+        from .fake_server import FakePokerServer
+
+        server = await FakePokerServer(auto_deal=False, latency=args.latency).start()
+        url = server.graphql_url
+    plans = [PLANS[name] for name in args.scenarios] if args.scenarios else None
+    try:
+        reports, elapsed = await run_scenarios(url, plans, args.tables, args.workers, args.connections)
+    finally:
+        if server is not None:
+            await server.stop()
+    for name, report in reports.items():
+        print(f"{name}: {len(report.failures)} failures")
+        print(report.summary())
+        for failure in report.failures[:10]:
+            print(f"  {failure}")
+    slowest = max(r.elapsed for r in reports.values())
+    print(f"total {elapsed:.2f}s, slowest scenario {slowest:.2f}s, sum {sum(r.elapsed for r in reports.values()):.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", metavar="scenario", help=f"any of {', '.join(sorted(PLANS))}")
+    parser.add_argument("--url", default=GRAPHQL_URL)
+    parser.add_argument("--local", action="store_true", help="run against an in-process stand-in server")
+    parser.add_argument("--latency", type=float, default=0.0, help="stand-in server latency per request")
+    parser.add_argument("--tables", type=int, default=10, help="tables per scenario")
+    parser.add_argument("--workers", type=int, default=4, help="worker processes; 0 runs in this process")
+    parser.add_argument("--connections", type=int, default=64, help="HTTP connections per worker")
+    parser.add_argument(
+        "--suite", nargs="*", metavar="module", help="run these test modules (default: all) instead of scenarios"
+    )
+    args = parser.parse_args(argv)
+    if args.suite is not None:
+        if args.scenarios:
+            parser.error("--suite runs test modules, not scenarios")
+        raise SystemExit(0 if asyncio.run(_suite_main(args)) else 1)
+    unknown = set(args.scenarios) - set(PLANS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,466 @@
+"""
+Declarative hand scenarios compiled to action plans.
+
+A scenario is a plain dict::
+
+    {
+        "name": "sb_raises_bb_folds",
+        "players": ["player_one", "player_two", "player_three"],  # seat order
+        "stacks": 1000,                     # one stack for all, or {player: stack}
+        "button": "player_three",           # optional, default: the server's default seat
+        "actions": ["player_three fold", "player_one bet 30", "player_two fold"],
+        "expect": {"winner": "player_one", "pot": 60, "stacks": {"player_one": 1020}},
+        "next_hand": {"rotate": 1, "small_blind": "player_two", "big_blind": "player_three"},
+    }
+
+``"winner": "best"`` expects the best showdown score to win. Stacks left out
+of ``expect`` are derived from the plan: every player loses what they put
+in and the winners share the pot. ``next_hand`` deals again with the seats
+rotated and checks who posts the blinds.
+
+:func:`compile_scenario` validates a scenario once, replaying its actions
+through its own account of the betting, and returns an :class:`ActionPlan`
+addressed by seat. :func:`run_plan` plays a plan on any number of tables at
+once, each with its own player names, so the regression scenarios double
+as load profiles:
+
+    python -m src.scenario --local --tables 200 showdown_best_hand
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+import aiohttp
+
+from .client import GRAPHQL_URL, GraphQLClient, GraphQLError
+from .load import LoadReport
+from .metrics import METRICS
+from .queries import register
+
+ACTIONS = ("FOLD", "CHECK", "BET", "CALL", "RAISE")
+BEST_SCORE = "best"
+# Blinds of the server's default table, posted by the two seats after the button.
+SMALL_BLIND = Decimal("10")
+BIG_BLIND = Decimal("20")
+STREET_COUNT = 4
+# Split pots are rounded to cents, the odd cent going to one winner.
+_SPLIT_TOLERANCE = Decimal("0.01")
+
+SCENARIO_HAND_QUERY = register(
+    "ScenarioHand",
+    """
+query ScenarioHand($id: ID!) {
+  hand(id: $id) {
+    id
+    isComplete
+    winnerId
+    players {
+      id
+      stack
+      score
+    }
+    streetEvents {
+      streetType
+      currentActivePlayers {
+        id
+        bet
+        stack
+        isBigBlind
+      }
+      pot
+    }
+  }
+}
+""",
+)
+
+
+class ScenarioError(ValueError):
+    """A scenario that does not compile."""
+
+
+@dataclass(frozen=True)
+class ActionPlan:
+    """A compiled scenario; players are referred to by seat index."""
+
+    name: str
+    seats: tuple
+    stacks: tuple
+    steps: tuple
+    contributions: tuple
+    pot: Decimal
+    live_seats: tuple
+    winner: object = None
+    expected_stacks: tuple = None
+    next_rotate: int = None
+    next_blinds: tuple = None
+
+    def bind(self, table_id):
+        """Player names for one table."""
+        return tuple(f"{table_id}-{seat}" for seat in self.seats)
+
+
+@dataclass
+class ScenarioReport(LoadReport):
+    failures: list = field(default_factory=list)
+
+
+def _seat_order(players, button):
+    """Rotate ``players`` so the server's default button lands on ``button``."""
+    if button is None:
+        return tuple(players)
+    b = players.index(button)
+    if len(players) == 2:
+        return tuple(players[b:] + players[:b])
+    return tuple(players[b + 1 :] + players[: b + 1])
+
+
+def _parse_action(text, players):
+    parts = text.split()
+    if len(parts) not in (2, 3):
+        raise ScenarioError(f"expected 'player ACTION [amount]', got {text!r}")
+    player, action = parts[0], parts[1].upper()
+    if player not in players:
+        raise ScenarioError(f"unknown player {player!r} in {text!r}")
+    if action not in ACTIONS:
+        raise ScenarioError(f"unknown action {action!r} in {text!r}")
+    amount = float(parts[2]) if len(parts) == 3 else 0.0
+    return player, action, amount
+
+
+class _Replay:
+    """The chips each seat puts in as a scenario's actions play out.
+
+    Kept apart from the stand-in's engine on purpose: a plan is the oracle
+    the server is checked against, so it must not share its arithmetic.
+    """
+
+    def __init__(self, names, stacks):
+        n = len(names)
+        self.names = names
+        self.stacks = list(stacks)
+        self.bets = [Decimal(0)] * n
+        self.contributed = [Decimal(0)] * n
+        self.folded = [False] * n
+        self.acted = [False] * n
+        self.street = 0
+        self.complete = False
+        button = 0 if n == 2 else n - 1
+        small_blind = button if n == 2 else (button + 1) % n
+        self.big_blind = (small_blind + 1) % n
+        self.first_postflop = (button + 1) % n
+        self._put_in(small_blind, SMALL_BLIND)
+        self._put_in(self.big_blind, BIG_BLIND)
+        if self.to_act() is None:
+            self._next_street()
+
+    @property
+    def pot(self):
+        return sum(self.contributed)
+
+    @property
+    def live(self):
+        return tuple(i for i, folded in enumerate(self.folded) if not folded)
+
+    def _put_in(self, seat, amount):
+        amount = min(amount, self.stacks[seat])
+        self.stacks[seat] -= amount
+        self.bets[seat] += amount
+        self.contributed[seat] += amount
+
+    def to_act(self):
+        """The seat to act next, or ``None`` once the street's betting is closed."""
+        n = len(self.names)
+        first = (self.big_blind + 1) % n if self.street == 0 else self.first_postflop
+        top = max(self.bets)
+        for seat in ((first + k) % n for k in range(n)):
+            if self.folded[seat] or self.stacks[seat] == 0:
+                continue
+            if not self.acted[seat] or self.bets[seat] < top:
+                return seat
+        return None
+
+    def play(self, seat, action, amount):
+        name = self.names[seat]
+        if self.complete:
+            raise ScenarioError("the hand is already over")
+        actor = self.to_act()
+        if actor != seat:
+            raise ScenarioError(f"it is not {name}'s turn (expected {self.names[actor]})")
+        to_call = max(self.bets) - self.bets[seat]
+        amount = Decimal(str(amount))
+        if action == "FOLD":
+            self.folded[seat] = True
+        elif action == "CHECK":
+            if to_call > 0:
+                raise ScenarioError(f"{name} cannot check facing a bet of {to_call}")
+        else:
+            if amount <= 0 or amount > self.stacks[seat]:
+                raise ScenarioError(f"{name} cannot bet {amount} from a stack of {self.stacks[seat]}")
+            if amount < to_call and amount != self.stacks[seat]:
+                raise ScenarioError(f"{name} must bet at least {to_call}")
+            self._put_in(seat, amount)
+        self.acted[seat] = True
+        if len(self.live) == 1:
+            self.complete = True
+        elif self.to_act() is None:
+            self._next_street()
+
+    def _next_street(self):
+        """Deal streets until someone can act; the hand is over after the river."""
+        can_act = [i for i in self.live if self.stacks[i] > 0]
+        while self.street < STREET_COUNT - 1:
+            self.street += 1
+            self.bets = [Decimal(0)] * len(self.names)
+            self.acted = [False] * len(self.names)
+            if len(can_act) > 1:
+                return
+        self.complete = True
+
+
+def compile_scenario(spec):
+    """Validate ``spec`` and compile it into an :class:`ActionPlan`."""
+    name = spec.get("name", "scenario")
+    players = list(spec["players"])
+    if len(players) < 2 or len(set(players)) != len(players):
+        raise ScenarioError(f"{name}: need at least two distinct players")
+    stacks = spec.get("stacks", 1000)
+    if not isinstance(stacks, dict):
+        stacks = dict.fromkeys(players, stacks)
+    button = spec.get("button")
+    if button is not None and button not in players:
+        raise ScenarioError(f"{name}: button {button!r} is not seated")
+
+    seats = _seat_order(players, button)
+    index = {player: i for i, player in enumerate(seats)}
+    start = tuple(Decimal(str(stacks.get(p, 1000))) for p in seats)
+    steps = []
+    hand = _Replay(seats, start)
+    for i, text in enumerate(spec.get("actions", ())):
+        player, action, amount = _parse_action(text, index)
+        try:
+            hand.play(index[player], action, amount)
+        except ScenarioError as exc:
+            raise ScenarioError(f"{name}: action {i} ({text!r}): {exc}") from None
+        steps.append((index[player], action, amount))
+    if not hand.complete:
+        raise ScenarioError(f"{name}: the actions do not finish the hand")
+
+    expect = spec.get("expect", {})
+    winner = expect.get("winner")
+    if winner is not None and winner != BEST_SCORE:
+        if winner not in index:
+            raise ScenarioError(f"{name}: unknown winner {winner!r}")
+        if len(hand.live) == 1 and seats[hand.live[0]] != winner:
+            raise ScenarioError(f"{name}: everyone but {seats[hand.live[0]]} folds, not {winner}")
+        winner = index[winner]
+    if "pot" in expect and Decimal(str(expect["pot"])) != hand.pot:
+        raise ScenarioError(f"{name}: the actions make a pot of {hand.pot}, not {expect['pot']}")
+    expected_stacks = None
+    if "stacks" in expect:
+        expected_stacks = tuple(
+            Decimal(str(expect["stacks"][p])) if p in expect["stacks"] else None for p in seats
+        )
+
+    next_rotate = next_blinds = None
+    if "next_hand" in spec:
+        next_hand = spec["next_hand"]
+        next_rotate = next_hand.get("rotate", 1) % len(seats)
+        blinds = (next_hand.get("small_blind"), next_hand.get("big_blind"))
+        if any(b is not None and b not in index for b in blinds):
+            raise ScenarioError(f"{name}: unknown blind in next_hand")
+        next_blinds = tuple(index.get(b) for b in blinds)
+
+    return ActionPlan(
+        name=name,
+        seats=seats,
+        stacks=start,
+        steps=tuple(steps),
+        contributions=tuple(hand.contributed),
+        pot=hand.pot,
+        live_seats=hand.live,
+        winner=winner,
+        expected_stacks=expected_stacks,
+        next_rotate=next_rotate,
+        next_blinds=next_blinds,
+    )
+
+
+def check_hand(plan, names, hand):
+    """Compare a finished hand (``SCENARIO_HAND_QUERY`` shape) with ``plan``; return failures."""
+    failures = []
+    if not hand["isComplete"]:
+        return [f"hand {hand['id']} is not complete"]
+    final = {p["id"]: Decimal(p["stack"]) for p in hand["players"]}
+    live = plan.live_seats
+    if len(live) == 1:
+        winners = list(live)
+    else:
+        scores = {p["id"]: p.get("score") for p in hand["players"]}
+        best = max(scores[names[i]] for i in live)
+        winners = [i for i in live if scores[names[i]] == best]
+
+    if hand["winnerId"] not in {names[i] for i in winners}:
+        failures.append(f"winner {hand['winnerId']}, expected one of {[names[i] for i in winners]}")
+    if isinstance(plan.winner, int) and hand["winnerId"] != names[plan.winner]:
+        failures.append(f"winner {hand['winnerId']}, expected {names[plan.winner]}")
+
+    share = plan.pot / len(winners)
+    for i, name in enumerate(names):
+        expected = plan.stacks[i] - plan.contributions[i] + (share if i in winners else 0)
+        if plan.expected_stacks is not None and plan.expected_stacks[i] is not None:
+            expected = plan.expected_stacks[i]
+        if abs(final.get(name, Decimal(-1)) - expected) > _SPLIT_TOLERANCE:
+            failures.append(f"{name} stack {final.get(name)}, expected {expected}")
+    return failures
+
+
+def check_next_hand(plan, names, stacks, hand):
+    """Check who posted the blinds in the follow-up hand."""
+    failures = []
+    preflop = {p["id"]: p for p in hand["streetEvents"][0]["currentActivePlayers"]}
+    for seat, blind, big in zip(plan.next_blinds, (SMALL_BLIND, BIG_BLIND), (False, True)):
+        if seat is None:
+            continue
+        player = preflop.get(names[seat])
+        if player is None or Decimal(player["bet"]) != blind or bool(player["isBigBlind"]) is not big:
+            failures.append(f"next hand: {names[seat]} should post {blind}, got {player}")
+        elif Decimal(player["stack"]) != stacks[names[seat]] - blind:
+            failures.append(f"next hand: {names[seat]} stack {player['stack']}, expected {stacks[names[seat]] - blind}")
+    return failures
+
+
+async def run_table(client, plan, table_id, report):
+    names = plan.bind(table_id)
+    hand_started = time.perf_counter()
+    try:
+        started = time.perf_counter()
+        hand_id = await client.deal(list(names), dict(zip(names, map(float, plan.stacks))), table_id=table_id)
+        report.record("deal", time.perf_counter() - started)
+        for seat, action, amount in plan.steps:
+            started = time.perf_counter()
+            await client.play_turn(hand_id, names[seat], action, amount, table_id=table_id)
+            report.record("playTurn", time.perf_counter() - started)
+        hand = await client.hand(hand_id, SCENARIO_HAND_QUERY)
+        failures = check_hand(plan, names, hand)
+        if plan.next_rotate is not None and not failures:
+            stacks = {p["id"]: Decimal(p["stack"]) for p in hand["players"]}
+            seats = names[plan.next_rotate :] + names[: plan.next_rotate]
+            next_id = await client.deal(list(seats), {n: float(stacks[n]) for n in seats}, table_id=table_id)
+            failures += check_next_hand(plan, names, stacks, await client.hand(next_id, SCENARIO_HAND_QUERY))
+    except (GraphQLError, aiohttp.ClientError, asyncio.TimeoutError) as exc:
+        report.errors += 1
+        report.failures.append(f"{table_id}: {exc!r}")
+        return
+    report.record("hand", time.perf_counter() - hand_started)
+    report.hands += 1
+    report.failures.extend(f"{table_id}: {failure}" for failure in failures)
+
+
+async def run_plan(client, plan, tables=1, prefix=None, metrics=METRICS):
+    """Play ``plan`` once on each of ``tables`` fresh tables, concurrently."""
+    prefix = prefix or f"{plan.name}-{uuid.uuid4().hex[:8]}"
+    report = ScenarioReport(tables=tables, metrics=metrics)
+    started = time.perf_counter()
+    await asyncio.gather(*(run_table(client, plan, f"{prefix}-{i}", report) for i in range(tables)))
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+_THREE = ["player_one", "player_two", "player_three"]
+_CHECK_ROUND = ["player_one check", "player_two check", "player_three check"]
+
+# The regression scenarios of test_three_players.py: player_one posts the
+# small blind, player_two the big blind and player_three acts first.
+SCENARIOS = {
+    "all_except_bb_fold": {
+        "name": "all_except_bb_fold",
+        "players": _THREE,
+        "actions": ["player_three fold", "player_one fold"],
+        "expect": {
+            "winner": "player_two",
+            "pot": 30,
+            "stacks": {"player_one": 990, "player_two": 1010, "player_three": 1000},
+        },
+        "next_hand": {"rotate": 1, "small_blind": "player_two", "big_blind": "player_three"},
+    },
+    "sb_raises_bb_folds": {
+        "name": "sb_raises_bb_folds",
+        "players": _THREE,
+        "actions": ["player_three fold", "player_one bet 30", "player_two fold"],
+        "expect": {
+            "winner": "player_one",
+            "pot": 60,
+            "stacks": {"player_one": 1020, "player_two": 980, "player_three": 1000},
+        },
+    },
+    "utg_raises_wins": {
+        "name": "utg_raises_wins",
+        "players": _THREE,
+        "actions": [
+            "player_three bet 40",
+            "player_one bet 30",
+            "player_two fold",
+            "player_one check",
+            "player_three bet 40",
+            "player_one fold",
+        ],
+        "expect": {
+            "winner": "player_three",
+            "pot": 140,
+            "stacks": {"player_one": 960, "player_two": 980, "player_three": 1060},
+        },
+    },
+    "showdown_best_hand": {
+        "name": "showdown_best_hand",
+        "players": _THREE,
+        "actions": ["player_three bet 20", "player_one bet 10", "player_two check"] + _CHECK_ROUND * 3,
+        "expect": {"winner": BEST_SCORE, "pot": 60},
+        "next_hand": {"rotate": 1, "small_blind": "player_two", "big_blind": "player_three"},
+    },
+}
+
+PLANS = {name: compile_scenario(spec) for name, spec in SCENARIOS.items()}
+
+
+async def _main(args):
+    server = None
+    url = args.url
+    if args.local:
+        from .fake_server import FakePokerServer
+
+        server = await FakePokerServer(auto_deal=False).start()
+        url = server.graphql_url
+    try:
+        async with GraphQLClient(url, max_connections=args.connections) as client:
+            for name in args.scenarios or sorted(PLANS):
+                report = await run_plan(client, PLANS[name], args.tables)
+                print(f"{name}: {len(report.failures)} failures")
+                print(report.summary())
+                for failure in report.failures[:10]:
+                    print(f"  {failure}")
+    finally:
+        if server is not None:
+            await server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", metavar="scenario", help=f"any of {', '.join(sorted(PLANS))}")
+    parser.add_argument("--url", default=GRAPHQL_URL)
+    parser.add_argument("--local", action="store_true", help="run against an in-process stand-in server")
+    parser.add_argument("--tables", type=int, default=10)
+    parser.add_argument("--connections", type=int, default=64)
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(PLANS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
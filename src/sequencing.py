@@ -0,0 +1,251 @@
+"""
+Per-hand ordering of subscription streams: gaps, duplicates and reorders.
+
+Frames carry no sequence number, so a hand event's place in its hand is
+derived from the transition it reports. Within a hand, the tuple
+
+    (street of the action, pot, players folded, actor's index in currentActivePlayers)
+
+only ever grows: bets and calls grow the pot and folds the folded count. Checks
+at the same pot follow the action order of ``currentActivePlayers``, and
+the action that closes a street (its snapshot already shows the next one)
+is last on it. Each event's position is compared with the latest one seen
+on that stream:
+
+* equal to a position already seen: a **duplicate**;
+* behind the latest and not seen: **reordered**, delivered late;
+* ahead, but not the transition that follows the last applied state (wrong
+  actor, or pot or folds moved by more than the action): a **gap**, at
+  least one event was skipped. A late event that fills it counts as
+  reordered too.
+
+Streams that do not select ``playerEvent.streetType`` (the ``observer``
+projection) take the street of an event that follows the last applied state
+from that state. Any other event is placed on its snapshot's street, or as
+the action that closed the street before if that position was seen. An
+action there can look exactly like an earlier one, so after a gap a late
+event may pass for the next one.
+
+Only a :class:`~src.validator.HandState` and the last ``SEQUENCE_WINDOW``
+positions are kept per hand, and finished hands keep just their last
+position, so memory stays flat however long the run.
+
+    python -m src.load --local --tables 50 --script showdown --sequence
+"""
+
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+from .events import DealEvent, HandEvent, decode_frame
+from .metrics import METRICS
+from .validator import STREETS, HandState
+
+# Positions remembered per live hand to tell duplicates from late events.
+SEQUENCE_WINDOW = 64
+# How many finished hands keep their last position to classify late frames.
+FINISHED_HANDS = 100_000
+KINDS = ("gap", "duplicate", "reordered")
+
+
+@dataclass
+class SequenceReport:
+    events: int = 0
+    hands: int = 0
+    gaps: int = 0
+    duplicates: int = 0
+    reordered: int = 0
+
+    @property
+    def anomalies(self):
+        return self.gaps + self.duplicates + self.reordered
+
+    def summary(self):
+        return (
+            f"events={self.events} hands={self.hands} gaps={self.gaps} "
+            f"duplicates={self.duplicates} reordered={self.reordered}"
+        )
+
+
+class _Stream:
+    """One subscriber's view of one hand."""
+
+    __slots__ = ("state", "latest", "seen", "window", "gapped", "dealt")
+
+    def __init__(self, state, position, dealt=False):
+        self.state = state
+        self.latest = position
+        self.seen = {position}
+        self.window = deque((position,))
+        self.gapped = False
+        self.dealt = dealt
+
+    def remember(self, position):
+        self.latest = max(self.latest, position)
+        self.seen.add(position)
+        self.window.append(position)
+        if len(self.window) > SEQUENCE_WINDOW:
+            self.seen.discard(self.window.popleft())
+
+
+def position(event, streets=STREETS, street=None):
+    """Where a decoded :class:`~src.events.HandEvent` falls in its hand (see the module docstring).
+
+    ``street`` stands in for the action's street when the payload leaves it
+    out; failing both, the snapshot's street is used.
+    """
+    street_event = event.streetEvent
+    played = event.playerEvent
+    players = street_event.currentActivePlayers
+    folded = sum(p.isInactive for p in players)
+    if played is None:
+        return _street_index(street_event.streetType, streets), street_event.pot, folded, -1
+    played_street = played.streetType or street or street_event.streetType
+    if played_street != street_event.streetType:
+        # The snapshot is in the next street's order; this action closed its own street.
+        return _street_index(played_street, streets), street_event.pot, folded, len(players)
+    actor = next((i for i, p in enumerate(players) if p.id == played.playerId), -1)
+    return _street_index(played_street, streets), street_event.pot, folded, actor
+
+
+def _street_index(street, streets):
+    return streets.index(street) if street in streets else -1
+
+
+def _dealt_position(deal, streets=STREETS):
+    """Position of a deal snapshot: before any action, or at its last recorded one."""
+    street_event = deal.streetEvents[-1]
+    if not deal.playerEvents:
+        folded = sum(p.isInactive for p in street_event.currentActivePlayers)
+        return -1, street_event.pot, folded, -1
+    return position(HandEvent(None, deal.id, street_event, deal.playerEvents[-1], None), streets)
+
+
+def follows(state, event):
+    """Whether ``event`` is the transition right after ``state`` (no event skipped)."""
+    played = event.playerEvent
+    if played is None:
+        return event.streetEvent.pot == state.pot
+    if state.turns_known:
+        expected = state.next_actor()
+        if expected is None or expected.id != played.playerId:
+            return False
+    action = played.action.upper()
+    chips = 0 if action in ("FOLD", "CHECK") else played.amount
+    folded = sum(p.isInactive for p in event.streetEvent.currentActivePlayers)
+    return event.streetEvent.pot == state.pot + chips and folded == len(state.folded) + (action == "FOLD")
+
+
+class HandSequencer:
+    """Recorder stage counting gaps, duplicates and reorders per subscriber and hand.
+
+    Pass it as a :class:`~src.subscriptions.GraphQLWSConnection` ``recorder``
+    (or call :meth:`record` with frames). A hand is tracked from its ``deal``
+    frame or its first ``handEvent``; a repeated ``deal`` frame counts as a
+    duplicate. Counts go to :attr:`report` and to the
+    ``sequencing_anomalies_total`` counter by ``kind``.
+    """
+
+    def __init__(self, streets=STREETS, metrics=METRICS):
+        self.streets = tuple(streets)
+        self.hands = {}
+        self.finished = OrderedDict()
+        self.report = SequenceReport()
+        self._events = metrics.counter("sequencing_events_total")
+        self._counters = {kind: metrics.counter("sequencing_anomalies_total", kind=kind) for kind in KINDS}
+
+    def record(self, subscriber_id, frame, raw=None, received_ns=None):
+        event = decode_frame(frame)
+        if isinstance(event, HandEvent):
+            self.sequence(subscriber_id, event)
+        elif isinstance(event, DealEvent) and event.deal is not None and event.deal.streetEvents:
+            self._deal(subscriber_id, event.deal)
+
+    def sequence(self, subscriber_id, event):
+        """Place one decoded :class:`~src.events.HandEvent` from ``subscriber_id``."""
+        self.report.events += 1
+        self._events.inc()
+        if event.streetEvent is None:
+            return
+        key = (subscriber_id, event.handId)
+        stream = self.hands.get(key)
+        in_order = stream is not None and follows(stream.state, event)
+        here = self._place(event, stream, in_order)
+        if stream is None:
+            if key in self.finished:
+                last, gapped, _ = self.finished[key]
+                self._count("duplicate" if here == last or not gapped else "reordered")
+                return
+            self.report.hands += 1
+            stream = self.hands[key] = _Stream(self._snapshot(event), here)
+        elif here <= stream.latest:
+            # With no gap on this stream nothing is missing, so even a position older than the window was seen.
+            if here in stream.seen or not stream.gapped:
+                self._count("duplicate")
+            else:
+                self._count("reordered")
+                stream.remember(here)
+            return
+        else:
+            if in_order:
+                stream.state.update(event)
+            else:
+                self._count("gap")
+                stream.gapped = True
+                stream.state = self._snapshot(event, stream.state.total)
+            stream.remember(here)
+        if event.isComplete:
+            self._finish(key, stream)
+
+    def _place(self, event, stream, in_order):
+        played = event.playerEvent
+        if played is None or played.streetType is not None or stream is None:
+            return position(event, self.streets)
+        if in_order:
+            # The action was played on the street the hand was on.
+            return position(event, self.streets, stream.state.street)
+        here = position(event, self.streets)
+        street = _street_index(event.streetEvent.streetType, self.streets)
+        if street > 0:
+            closing = position(event, self.streets, self.streets[street - 1])
+            if closing in stream.seen:
+                return closing
+        return here
+
+    def _deal(self, subscriber_id, deal):
+        key = (subscriber_id, deal.id)
+        stream = self.hands.get(key)
+        if stream is not None:
+            # The deal went out before any hand event: one arriving now is late unless it is a repeat.
+            self._count("duplicate" if stream.dealt else "reordered")
+            stream.dealt = True
+            return
+        if key in self.finished:
+            _, _, dealt = self.finished[key]
+            self._count("duplicate" if dealt else "reordered")
+            self.finished[key] = self.finished[key][:2] + (True,)
+            return
+        state = HandState.from_deal(deal, self.streets)
+        self.report.hands += 1
+        stream = self.hands[key] = _Stream(state, _dealt_position(deal, self.streets), dealt=True)
+        if state.complete:
+            self._finish(key, stream)
+
+    def _snapshot(self, event, total=None):
+        return HandState(
+            event.handId, event.streetEvent, self.streets, total, turns_known=False, complete=bool(event.isComplete)
+        )
+
+    def _count(self, kind):
+        if kind == "gap":
+            self.report.gaps += 1
+        elif kind == "duplicate":
+            self.report.duplicates += 1
+        else:
+            self.report.reordered += 1
+        self._counters[kind].inc()
+
+    def _finish(self, key, stream):
+        del self.hands[key]
+        self.finished[key] = (stream.latest, stream.gapped, stream.dealt)
+        if len(self.finished) > FINISHED_HANDS:
+            self.finished.popitem(last=False)
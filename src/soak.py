@@ -0,0 +1,308 @@
+"""
+Auto-deal soak: many tables folding to game over and catching the next deal.
+
+Each table is dealt once. From then on every hand is folded round to the big
+blind, and the table waits for the server's automatic follow-up deal on its
+``deal`` subscription before folding that one too, for ``--duration``
+seconds. The soak measures
+
+* the gap from the game-over ``playTurn`` response to the next ``deal`` frame;
+* ``playTurn`` latency and hands/sec per table;
+* ``deal`` frames whose id the table already saw (duplicated or replayed
+  deals), and game overs never followed by a deal.
+
+Latencies are also summarised per ``--window`` seconds. A window whose p50 or
+p99 has grown past ``DRIFT_FACTOR`` times the first window's is reported as
+drift, so a slow leak over hours shows up instead of being averaged away.
+
+    python -m src.soak --local --tables 50 --duration 3600 --window 60
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+
+import aiohttp
+
+from .client import GRAPHQL_URL, GraphQLClient, GraphQLError
+from .load import table_players
+from .metrics import METRICS, Histogram, MetricsRegistry
+from .subscriptions import WS_URL, GraphQLWSConnection, SubscriptionError, wait_ready
+from .validator import HandState
+
+DEAL_TIMEOUT_SECONDS = 5
+# Deal ids remembered per table to spot duplicates; bounds memory on long runs.
+SEEN_DEALS_PER_TABLE = 10_000
+DRIFT_FACTOR = 1.5
+# Growth smaller than this is scheduling noise, whatever the ratio.
+DRIFT_FLOOR_SECONDS = 0.002
+DRIFT_PERCENTILES = (50, 99)
+METRIC_NAMES = ("gap", "playTurn")
+
+
+@dataclass(frozen=True)
+class Drift:
+    metric: str
+    percentile: float
+    window: int
+    baseline: float
+    value: float
+
+    def __str__(self):
+        return (
+            f"window {self.window}: {self.metric} p{self.percentile:g} {self.value * 1000:.2f}ms "
+            f"vs {self.baseline * 1000:.2f}ms in window 0"
+        )
+
+
+@dataclass
+class SoakWindow:
+    """Latency percentiles (seconds) of one ``--window`` slice of the run, ``ended`` seconds in."""
+
+    index: int
+    ended: float
+    hands: int = 0
+    latencies: dict = field(default_factory=dict)
+
+
+@dataclass
+class SoakReport:
+    tables: int
+    window: float
+    elapsed: float = 0.0
+    errors: int = 0
+    missed: int = 0
+    hands: Counter = field(default_factory=Counter)
+    duplicates: list = field(default_factory=list)
+    windows: list = field(default_factory=list)
+    totals: dict = field(default_factory=lambda: {name: Histogram() for name in METRIC_NAMES})
+    metrics: MetricsRegistry = field(default=METRICS, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._started = time.monotonic()
+        self._current = self._new_window()
+
+    def _new_window(self):
+        return {name: Histogram() for name in METRIC_NAMES}, Counter()
+
+    def record(self, metric, seconds):
+        self._current[0][metric].record(seconds)
+        self.totals[metric].record(seconds)
+        self.metrics.histogram("soak_seconds", kind=metric).record(seconds)
+
+    def hand_done(self, table_id):
+        self.hands[table_id] += 1
+        self._current[1]["hands"] += 1
+
+    def duplicate(self, table_id, deal_id):
+        self.duplicates.append((table_id, deal_id))
+        self.metrics.counter("soak_duplicate_deals_total").inc()
+
+    def miss(self):
+        self.missed += 1
+        self.metrics.counter("soak_missed_deals_total").inc()
+
+    def roll(self):
+        """Close the current window (unless no hand finished in it) and start the next."""
+        histograms, hands = self._current
+        self._current = self._new_window()
+        if not hands:
+            return
+        window = SoakWindow(len(self.windows), time.monotonic() - self._started, hands["hands"])
+        for name, histogram in histograms.items():
+            if histogram.count:
+                window.latencies[name] = {pct: histogram.percentile(pct) for pct in DRIFT_PERCENTILES}
+        self.windows.append(window)
+
+    @property
+    def total_hands(self):
+        return sum(self.hands.values())
+
+    def hands_per_second(self):
+        """Hands/sec of each table, slowest first."""
+        if not self.elapsed:
+            return []
+        return sorted(self.hands[table] / self.elapsed for table in self.hands)
+
+    def drift(self, factor=DRIFT_FACTOR, floor=DRIFT_FLOOR_SECONDS):
+        """Every window latency that grew past ``factor`` times window 0's."""
+        if not self.windows:
+            return []
+        baseline = self.windows[0].latencies
+        found = []
+        for window in self.windows[1:]:
+            for metric, values in window.latencies.items():
+                for pct, value in values.items():
+                    base = baseline.get(metric, {}).get(pct)
+                    if base is not None and value > base * factor and value - base > floor:
+                        found.append(Drift(metric, pct, window.index, base, value))
+        return found
+
+    def summary(self):
+        rates = self.hands_per_second()
+        lines = [
+            f"tables={self.tables} hands={self.total_hands} errors={self.errors} missed={self.missed} "
+            f"duplicates={len(self.duplicates)} elapsed={self.elapsed:.1f}s"
+        ]
+        if rates:
+            lines.append(
+                f"  hands/sec per table min={rates[0]:.2f} median={rates[len(rates) // 2]:.2f} max={rates[-1]:.2f}"
+            )
+        for name, histogram in self.totals.items():
+            cols = " ".join(f"{k}={v * 1000:8.2f}ms" for k, v in histogram.percentiles().items())
+            lines.append(f"  {name:<10} n={histogram.count:<8} {cols}")
+        for window in self.windows:
+            cols = " ".join(
+                f"{name} p50={v[50] * 1000:.2f}ms p99={v[99] * 1000:.2f}ms" for name, v in window.latencies.items()
+            )
+            lines.append(f"  window {window.index:<4} t={window.ended:8.1f}s hands={window.hands:<7} {cols}")
+        return "\n".join(lines)
+
+
+class _SeenDeals:
+    """The last ``SEEN_DEALS_PER_TABLE`` deal ids of one table."""
+
+    def __init__(self, size=SEEN_DEALS_PER_TABLE):
+        self.ids = set()
+        self.order = deque()
+        self.size = size
+
+    def add(self, deal_id):
+        """Remember ``deal_id``; ``False`` if it was already seen."""
+        if deal_id in self.ids:
+            return False
+        self.ids.add(deal_id)
+        self.order.append(deal_id)
+        if len(self.order) > self.size:
+            self.ids.discard(self.order.popleft())
+        return True
+
+
+async def _next_deal(subscription, seen, report, table_id):
+    """The next deal with an id new to the table and when it arrived, or ``(None, None)``."""
+    deadline = time.monotonic() + DEAL_TIMEOUT_SECONDS
+    while True:
+        try:
+            event = await subscription.next_event(max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            return None, None
+        received = time.perf_counter()
+        if event is None or event.deal is None:
+            continue
+        if seen.add(event.id):
+            return event, received
+        report.duplicate(table_id, event.id)
+
+
+async def soak_table(client, connection, report, table_id, deadline, players_per_table=2):
+    """Fold hand after hand on ``table_id`` until ``deadline`` (``time.monotonic``)."""
+    players = table_players(table_id, players_per_table)
+    subscription = await connection.subscribe_deal(table_token=table_id)
+    seen = _SeenDeals()
+    deal = None
+    try:
+        await wait_ready([subscription])
+        while time.monotonic() < deadline:
+            try:
+                if deal is None:
+                    await client.deal(players, table_id=table_id)
+                    deal, _ = await _next_deal(subscription, seen, report, table_id)
+                    if deal is None:
+                        report.errors += 1
+                        continue
+                # Players are listed in action order: all but the last live one fold.
+                state = HandState.from_deal(deal.deal)
+                live = [p for p in state.players.values() if not p.isInactive and p.stack > 0]
+                over = time.perf_counter()
+                if not state.complete:
+                    for player in live[:-1]:
+                        started = time.perf_counter()
+                        await client.play_turn(deal.id, player.id, "FOLD", 0.0, table_id)
+                        over = time.perf_counter()
+                        report.record("playTurn", over - started)
+                report.hand_done(table_id)
+                deal, received = await _next_deal(subscription, seen, report, table_id)
+                if deal is None:
+                    report.miss()
+                else:
+                    report.record("gap", max(received - over, 0.0))
+            except (GraphQLError, aiohttp.ClientError, asyncio.TimeoutError, SubscriptionError):
+                report.errors += 1
+                deal = None
+    finally:
+        await subscription.stop()
+
+
+async def run_soak(client, ws_url=WS_URL, tables=20, duration=60.0, window=10.0, players_per_table=2, prefix="soak"):
+    """Soak ``tables`` auto-dealing tables for ``duration`` seconds."""
+    run_id = uuid.uuid4().hex[:8]
+    report = SoakReport(tables=tables, window=window)
+    started = time.monotonic()
+    deadline = started + duration
+
+    async def roll_windows():
+        while True:
+            await asyncio.sleep(window)
+            report.roll()
+
+    roller = asyncio.create_task(roll_windows())
+    try:
+        async with GraphQLWSConnection(ws_url, user_token="soak") as connection:
+            await asyncio.gather(
+                *(
+                    soak_table(client, connection, report, f"{prefix}-{run_id}-{i}", deadline, players_per_table)
+                    for i in range(tables)
+                )
+            )
+    finally:
+        roller.cancel()
+    report.roll()
+    report.elapsed = time.monotonic() - started
+    return report
+
+
+async def _main(args):
+    server = None
+    url, ws_url = args.url, args.ws_url
+    if args.local:
+        from .fake_server import FakePokerServer
+
+        server = await FakePokerServer(auto_deal_delay=args.auto_deal_delay).start()
+        url, ws_url = server.graphql_url, server.ws_url
+    try:
+        async with GraphQLClient(url, max_connections=args.tables) as client:
+            report = await run_soak(client, ws_url, args.tables, args.duration, args.window, args.players)
+    finally:
+        if server is not None:
+            await server.stop()
+    print(report.summary())
+    for duplicate in report.duplicates[:10]:
+        print(f"  duplicate deal {duplicate[1]} on table {duplicate[0]}")
+    drift = report.drift()
+    for found in drift[:20]:
+        print(f"  drift: {found}")
+    if args.metrics_out:
+        METRICS.write(args.metrics_out)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=GRAPHQL_URL)
+    parser.add_argument("--ws-url", default=WS_URL)
+    parser.add_argument("--local", action="store_true", help="run against an in-process stand-in server")
+    parser.add_argument("--auto-deal-delay", type=float, default=0.0, help="seconds the stand-in waits to auto-deal")
+    parser.add_argument("--tables", type=int, default=20)
+    parser.add_argument("--players", type=int, default=2, help="players per table")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds to soak for")
+    parser.add_argument("--window", type=float, default=10.0, help="seconds per latency window")
+    parser.add_argument("--metrics-out", help="write metrics as Prometheus text, or JSON for a .json path")
+    report = asyncio.run(_main(parser.parse_args(argv)))
+    raise SystemExit(1 if report.duplicates or report.missed or report.drift() else 0)
+
+
+if __name__ == "__main__":
+    main()
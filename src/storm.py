@@ -0,0 +1,228 @@
+"""
+graphql-ws connection storm: how fast the server takes on new sockets.
+
+Opens graphql-ws connections with the suites' headers and ``connection_init``
+payload (``x-user-token``, ``x-table-token``), paced in stages of rising
+rate and all kept open, as clients reconnecting after an outage would. Every
+connection times four phases separately:
+
+* ``tcp``: the TCP connect;
+* ``upgrade``: the HTTP upgrade to a websocket, once connected;
+* ``ack``: ``connection_init`` to ``connection_ack``;
+* ``first_data``: ``start`` of a ``deal`` subscription on the connection's
+  own table to its first ``data`` frame. A deal is posted on that table right
+  after the ``start``, so this includes the deal mutation.
+
+A stage is sustained when every connection in it got through all phases,
+the p99 of tcp + upgrade + ack stayed within ``--slo`` seconds, and the
+connections were actually opened at ``SUSTAINED_FRACTION`` of the target
+rate or better. The sustainable rate is that of the last stage sustained
+before the first one that was not.
+
+    python -m src.storm --local --rates 50,100,200,400 --per-stage 500
+"""
+
+import argparse
+import asyncio
+import contextvars
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+
+import aiohttp
+
+from .client import GRAPHQL_URL, GraphQLClient, GraphQLError
+from .load import table_players
+from .metrics import METRICS, PERCENTILES, Histogram
+from .subscriptions import (
+    WS_CONNECT_TIMEOUT_SECONDS,
+    WS_URL,
+    GraphQLWSConnection,
+    SubscriptionError,
+    wait_ready,
+)
+
+PHASES = ("tcp", "upgrade", "ack", "first_data")
+SUSTAINED_FRACTION = 0.9
+DEFAULT_SLO_SECONDS = 1.0
+
+# The storm task's timings, for the aiohttp trace hooks that time the TCP connect.
+_TIMINGS = contextvars.ContextVar("storm_timings")
+
+
+async def _on_connection_create_start(session, context, params):
+    context.tcp_started = time.perf_counter()
+
+
+async def _on_connection_create_end(session, context, params):
+    timings = _TIMINGS.get(None)
+    if timings is not None:
+        timings["tcp"] = time.perf_counter() - context.tcp_started
+
+
+def tcp_trace_config():
+    """``aiohttp.TraceConfig`` timing the TCP connect of each socket a storm task opens."""
+    trace = aiohttp.TraceConfig()
+    trace.on_connection_create_start.append(_on_connection_create_start)
+    trace.on_connection_create_end.append(_on_connection_create_end)
+    return trace
+
+
+@dataclass
+class StormStage:
+    rate: float
+    connections: int
+    opened: int = 0
+    elapsed: float = 0.0
+    failures: Counter = field(default_factory=Counter)
+    latencies: dict = field(default_factory=lambda: {phase: Histogram() for phase in PHASES})
+    handshake: Histogram = field(default_factory=Histogram)
+
+    @property
+    def achieved_rate(self):
+        """Connections acknowledged per second, from the first launch to the last ack."""
+        return self.opened / self.elapsed if self.elapsed else 0.0
+
+    def sustained(self, slo=DEFAULT_SLO_SECONDS):
+        return (
+            not self.failures
+            and self.handshake.percentile(99) <= slo
+            and self.achieved_rate >= self.rate * SUSTAINED_FRACTION
+        )
+
+
+@dataclass
+class StormReport:
+    slo: float = DEFAULT_SLO_SECONDS
+    stages: list = field(default_factory=list)
+
+    @property
+    def open_connections(self):
+        return sum(stage.opened for stage in self.stages)
+
+    def sustainable_rate(self):
+        """Target rate of the last stage sustained before the first that was not (0 if none)."""
+        rate = 0.0
+        for stage in self.stages:
+            if not stage.sustained(self.slo):
+                break
+            rate = stage.rate
+        return rate
+
+    def summary(self):
+        lines = [f"open={self.open_connections} sustainable={self.sustainable_rate():g} conn/sec (slo={self.slo:g}s)"]
+        for stage in self.stages:
+            failures = " ".join(f"{phase}={n}" for phase, n in sorted(stage.failures.items())) or "none"
+            lines.append(
+                f"  rate={stage.rate:<7g} opened={stage.opened}/{stage.connections} "
+                f"achieved={stage.achieved_rate:8.1f}/s sustained={stage.sustained(self.slo)} failures: {failures}"
+            )
+            for phase in PHASES:
+                histogram = stage.latencies[phase]
+                cols = " ".join(f"{k}={v * 1000:8.2f}ms" for k, v in histogram.percentiles(PERCENTILES).items())
+                lines.append(f"    {phase:<10} n={histogram.count:<6} {cols}")
+        return "\n".join(lines)
+
+
+async def storm_connection(session, client, ws_url, stage, name, metrics=METRICS):
+    """Open one connection through every phase into ``stage``; return it, or ``None`` on failure."""
+    timings = {}
+    _TIMINGS.set(timings)
+    table_id = f"{name}-table"
+    connection = GraphQLWSConnection(ws_url, user_token=name, table_token=table_id, session=session)
+    phase = None
+    try:
+        await connection.connect()
+        tcp = timings.get("tcp", 0.0)
+        timings.update(connection.connect_timings, upgrade=connection.connect_timings["upgrade"] - tcp)
+        phase = "first_data"
+        started = time.perf_counter()
+        subscription = await connection.subscribe_deal(table_token=table_id)
+        await wait_ready([subscription])
+        await client.deal(table_players(table_id, 2), table_id=table_id)
+        await subscription.next(WS_CONNECT_TIMEOUT_SECONDS)
+        timings["first_data"] = time.perf_counter() - started
+    except (GraphQLError, SubscriptionError, aiohttp.ClientError, OSError, asyncio.TimeoutError):
+        if phase is None:
+            phase = "ack" if connection.ws is not None else "upgrade" if "tcp" in timings else "tcp"
+        stage.failures[phase] += 1
+        metrics.counter("storm_failures_total", phase=phase).inc()
+        await connection.close()
+        return None
+    for phase in PHASES:
+        stage.latencies[phase].record(timings[phase])
+        metrics.histogram("storm_seconds", phase=phase).record(timings[phase])
+    stage.handshake.record(timings["tcp"] + timings["upgrade"] + timings["ack"])
+    stage.opened += 1
+    return connection
+
+
+async def run_storm(
+    client, ws_url=WS_URL, rates=(50, 100, 200, 400), per_stage=200, slo=DEFAULT_SLO_SECONDS, prefix="storm", metrics=METRICS
+):
+    """Open ``per_stage`` connections at each rate in ``rates``, holding them all open until the end."""
+    run_id = uuid.uuid4().hex[:8]
+    report = StormReport(slo=slo)
+    connections = []
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector, trace_configs=[tcp_trace_config()]) as session:
+        try:
+            for number, rate in enumerate(rates):
+                stage = StormStage(rate, per_stage)
+                report.stages.append(stage)
+                tasks = []
+                started = time.perf_counter()
+                for i in range(per_stage):
+                    delay = started + i / rate - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    name = f"{prefix}-{run_id}-{number}-{i}"
+                    tasks.append(asyncio.create_task(storm_connection(session, client, ws_url, stage, name, metrics)))
+                opened = await asyncio.gather(*tasks)
+                stage.elapsed = time.perf_counter() - started
+                connections += [c for c in opened if c is not None]
+        finally:
+            await asyncio.gather(*(c.close() for c in connections))
+    return report
+
+
+async def _main(args):
+    server = None
+    url, ws_url = args.url, args.ws_url
+    if args.local:
+        from .fake_server import FakePokerServer
+
+        server = await FakePokerServer(auto_deal=False).start()
+        url, ws_url = server.graphql_url, server.ws_url
+    try:
+        async with GraphQLClient(url, max_connections=args.http_connections) as client:
+            report = await run_storm(client, ws_url, args.rates, args.per_stage, args.slo)
+    finally:
+        if server is not None:
+            await server.stop()
+    print(report.summary())
+    if args.metrics_out:
+        METRICS.write(args.metrics_out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=GRAPHQL_URL)
+    parser.add_argument("--ws-url", default=WS_URL)
+    parser.add_argument("--local", action="store_true", help="run against an in-process stand-in server")
+    parser.add_argument(
+        "--rates",
+        type=lambda s: tuple(float(v) for v in s.split(",")),
+        default=(50, 100, 200, 400),
+        help="connections/sec of each ramp stage",
+    )
+    parser.add_argument("--per-stage", type=int, default=200, help="connections opened per stage")
+    parser.add_argument("--slo", type=float, default=DEFAULT_SLO_SECONDS, help="p99 handshake budget in seconds")
+    parser.add_argument("--http-connections", type=int, default=64, help="pool size for the deal mutations")
+    parser.add_argument("--metrics-out", help="write metrics as Prometheus text, or JSON for a .json path")
+    asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
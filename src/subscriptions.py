@@ -0,0 +1,320 @@
+import asyncio
+import itertools
+import json
+import time
+
+import aiohttp
+
+from .deal import deal_subscription
+from .events import decode_frame
+from .metrics import METRICS
+from .play import hand_event_subscription
+
+WS_URL = "ws://127.0.0.1:3000/ws"
+WS_CONNECT_TIMEOUT_SECONDS = 5
+WS_EVENT_TIMEOUT_SECONDS = 5
+
+# Started after each subscription: the reply shows the server has handled the start before it.
+READY_PROBE = "query ReadyProbe { __typename }"
+# Until a connection has seen a probe answered, a subscription also counts as ready this long after its start.
+READY_FALLBACK_SECONDS = 1.0
+
+WS_HEADERS = {
+    "Accept-Encoding": "gzip, deflate, br",
+    "Pragma": "no-cache",
+    "Sec-Websocket-Protocol": "graphql-ws",
+}
+
+
+_CLOSED = object()
+
+
+class SubscriptionError(Exception):
+    """A graphql-ws ``error``/``connection_error`` frame or a dropped socket."""
+
+
+class ReadyGate:
+    """Opens once ``expected`` observers have called :meth:`arrive`.
+
+    Replaces fixed sleeps and semaphore counting: a mutation awaits the gate
+    and fires the moment the last subscriber is live.
+    """
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.arrived = 0
+        self._event = asyncio.Event()
+        if expected <= 0:
+            self._event.set()
+
+    def arrive(self):
+        self.arrived += 1
+        if self.arrived >= self.expected:
+            self._event.set()
+
+    @property
+    def is_open(self):
+        return self._event.is_set()
+
+    async def wait(self, timeout=WS_CONNECT_TIMEOUT_SECONDS):
+        await asyncio.wait_for(self._event.wait(), timeout=timeout)
+
+
+class Subscription:
+    """One operation started on a :class:`GraphQLWSConnection`.
+
+    ``data`` frames for this operation's id are queued in arrival order and
+    returned whole (``{"type": "data", "id": ..., "payload": ...}``) so the
+    existing frame assertions keep working.
+
+    ``ready`` is set once the server has handled the ``start``: graphql-ws
+    does not acknowledge individual operations, so a ``READY_PROBE`` query
+    is started right after it and, the server handling a socket's frames in
+    order, any reply to it means the subscription is registered. The first
+    frame for this id sets it too. Until the connection has had a probe
+    answered, ``READY_FALLBACK_SECONDS`` passing with neither sets it as
+    well, for servers that do not answer queries over the socket.
+    """
+
+    def __init__(self, connection, op_id, operation_name):
+        self.connection = connection
+        self.id = op_id
+        self.operation_name = operation_name
+        self.queue = asyncio.Queue()
+        self.completed = False
+        self.ready = asyncio.Event()
+
+    async def next(self, timeout=WS_EVENT_TIMEOUT_SECONDS):
+        frame = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        if frame is _CLOSED:
+            self.queue.put_nowait(_CLOSED)
+            raise SubscriptionError(f"{self.operation_name} ({self.id}) ended before the next frame")
+        if frame.get("type") == "error":
+            raise SubscriptionError(f"GraphQL subscription error for {self.operation_name} ({self.id}): {frame}")
+        return frame
+
+    async def next_event(self, timeout=WS_EVENT_TIMEOUT_SECONDS):
+        """Next frame decoded into a :mod:`src.events` object."""
+        return decode_frame(await self.next(timeout=timeout))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.next(timeout=None)
+        except SubscriptionError:
+            if self.completed or self.connection.closed:
+                raise StopAsyncIteration from None
+            raise
+
+    async def stop(self):
+        if not self.completed and not self.connection.closed:
+            await self.connection.send({"id": self.id, "type": "stop"})
+        self.connection._finish(self.id)
+
+
+async def wait_ready(subscriptions, timeout=WS_CONNECT_TIMEOUT_SECONDS):
+    """Wait until every subscription in ``subscriptions`` is live."""
+    await asyncio.wait_for(asyncio.gather(*(s.ready.wait() for s in subscriptions)), timeout=timeout)
+
+
+class GraphQLWSConnection:
+    """A single graphql-ws socket carrying many subscriptions.
+
+    ``connection_init`` is sent once and acknowledged before any ``start``;
+    a reader task then routes every frame to its operation's queue by ``id``.
+    Pass ``session`` to share one ``aiohttp.ClientSession`` between
+    connections, and a :class:`~src.recorder.HandRecorder` as ``recorder`` to
+    stream every data frame to disk under ``subscriber_id`` (the user token
+    by default). ``throttle``, an ``async`` callable, is awaited after each
+    frame is read, to play a subscriber that reads its socket slowly.
+    """
+
+    def __init__(
+        self,
+        url=WS_URL,
+        user_token="observer",
+        table_token="123",
+        hand_token=None,
+        session=None,
+        recorder=None,
+        subscriber_id=None,
+        metrics=METRICS,
+        throttle=None,
+    ):
+        self.url = url
+        self.init_payload = {"x-user-token": user_token, "x-table-token": table_token}
+        if hand_token is not None:
+            self.init_payload["x-hand-token"] = hand_token
+        self.recorder = recorder
+        self.throttle = throttle
+        self.subscriber_id = subscriber_id or user_token
+        self._frames = metrics.counter("ws_frames_total")
+        self._bytes = metrics.counter("ws_bytes_total")
+        self._errors = metrics.counter("ws_errors_total")
+        self.ws = None
+        self.connect_timings = {}
+        self.subscriptions = {}
+        self._session = session
+        self._owns_session = session is None
+        self._reader = None
+        self._ids = itertools.count(1)
+        self._probes = {}
+        self._answers_probes = False
+
+    @property
+    def closed(self):
+        return self.ws is None or self.ws.closed
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def connect(self, timeout=WS_CONNECT_TIMEOUT_SECONDS):
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        started = time.perf_counter()
+        try:
+            self.ws = await asyncio.wait_for(self._session.ws_connect(self.url, headers=WS_HEADERS), timeout=timeout)
+            upgraded = time.perf_counter()
+            await self.send({"type": "connection_init", "payload": self.init_payload})
+            await asyncio.wait_for(self._wait_for_ack(), timeout=timeout)
+        except BaseException:
+            # No ack (or no socket): do not leave the socket or a session opened for it behind.
+            if self.ws is not None:
+                await self.ws.close()
+            if self._owns_session:
+                await self._session.close()
+                self._session = None
+            raise
+        # Seconds spent opening the socket (TCP plus upgrade) and waiting for the ack.
+        self.connect_timings = {"upgrade": upgraded - started, "ack": time.perf_counter() - upgraded}
+        self._reader = asyncio.create_task(self._read_loop())
+        return self
+
+    async def _wait_for_ack(self):
+        while True:
+            msg = await self.ws.receive()
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                raise SubscriptionError(f"WebSocket closed before connection_ack: {msg.type}")
+            frame = json.loads(msg.data)
+            if frame.get("type") == "connection_ack":
+                return frame
+            if frame.get("type") == "connection_error":
+                raise SubscriptionError(f"connection_init rejected: {frame}")
+
+    async def send(self, frame):
+        await self.ws.send_str(json.dumps(frame))
+
+    async def subscribe(self, query, operation_name, variables=None, op_id=None, extra_payload=None):
+        op_id = str(op_id if op_id is not None else next(self._ids))
+        if op_id in self.subscriptions:
+            raise ValueError(f"operation id {op_id} is already active on this connection")
+        subscription = Subscription(self, op_id, operation_name)
+        self.subscriptions[op_id] = subscription
+        payload = {
+            "variables": variables or {},
+            "extensions": {},
+            "operationName": operation_name,
+            "query": query,
+        }
+        payload.update(extra_payload or {})
+        await self.send({"id": op_id, "type": "start", "payload": payload})
+        probe_id = f"{op_id}:ready"
+        fallback = None
+        if not self._answers_probes:
+            fallback = asyncio.get_running_loop().call_later(READY_FALLBACK_SECONDS, self._probed, probe_id)
+        self._probes[probe_id] = (subscription, fallback)
+        probe = {"variables": {}, "extensions": {}, "operationName": "ReadyProbe", "query": READY_PROBE}
+        await self.send({"id": probe_id, "type": "start", "payload": probe})
+        return subscription
+
+    async def subscribe_deal(self, op_id=None, table_token=None):
+        extra = {"x-table-token": table_token} if table_token else None
+        return await self.subscribe(deal_subscription, "DealSubscription", op_id=op_id, extra_payload=extra)
+
+    async def subscribe_hand(self, hand_id, op_id=None):
+        return await self.subscribe(
+            hand_event_subscription,
+            "OnHandEvent",
+            op_id=op_id if op_id is not None else hand_id,
+            extra_payload={"x-hand-token": hand_id},
+        )
+
+    async def _read_loop(self):
+        try:
+            async for msg in self.ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                received_ns = time.monotonic_ns()
+                frame = json.loads(msg.data)
+                if frame.get("id") in self._probes:
+                    self._answered(frame["id"], done=frame.get("type") in ("complete", "error"))
+                    continue
+                self._frames.inc()
+                self._bytes.inc(len(msg.data))
+                subscription = self.subscriptions.get(frame.get("id"))
+                if subscription is None:
+                    continue
+                msg_type = frame.get("type")
+                if msg_type == "error":
+                    self._errors.inc()
+                if msg_type in ("data", "error"):
+                    if self.recorder is not None and msg_type == "data":
+                        self.recorder.record(self.subscriber_id, frame, msg.data, received_ns)
+                    subscription.ready.set()
+                    subscription.queue.put_nowait(frame)
+                elif msg_type == "complete":
+                    self._finish(subscription.id)
+                if self.throttle is not None:
+                    await self.throttle()
+        finally:
+            for subscription in list(self.subscriptions.values()):
+                subscription.queue.put_nowait(_CLOSED)
+
+    def _answered(self, probe_id, done):
+        """A reply to ``probe_id``: the server answers probes, so later ones need no fallback."""
+        if not self._answers_probes:
+            self._answers_probes = True
+            self._cancel_fallbacks()
+        self._probed(probe_id, done)
+
+    def _probed(self, probe_id, done=True):
+        """Mark the subscription behind ``probe_id`` ready; forget the probe once ``done``."""
+        subscription, _ = self._probes[probe_id]
+        subscription.ready.set()
+        if done:
+            del self._probes[probe_id]
+
+    def _cancel_fallbacks(self):
+        for _, fallback in self._probes.values():
+            if fallback is not None:
+                fallback.cancel()
+
+    def _finish(self, op_id):
+        subscription = self.subscriptions.pop(op_id, None)
+        if subscription is not None and not subscription.completed:
+            subscription.completed = True
+            subscription.queue.put_nowait(_CLOSED)
+
+    async def close(self):
+        self._cancel_fallbacks()
+        self._probes.clear()
+        if self.throttle is not None and self._reader is not None:
+            # A throttled reader may be asleep mid-backlog; it would hold up the close handshake.
+            self._reader.cancel()
+        if self.ws is not None and not self.ws.closed:
+            try:
+                await self.send({"type": "connection_terminate"})
+            except ConnectionError:
+                pass
+            await self.ws.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
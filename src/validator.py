@@ -0,0 +1,320 @@
+"""
+Streaming invariant checks for ``handEvent`` streams.
+
+:class:`HandState` keeps the little that is needed to validate the next
+event of a hand (street, pot, each player's bet/stack/folded flag, who has
+acted this street) and updates it in place, so each event costs O(players)
+however long the hand runs. It checks that
+
+* the acting player is the one whose turn it was, and has not folded;
+* the pot and the actor's stack move by exactly the amount played, and
+  nobody else's chips move;
+* pot plus stacks stays equal to the chips on the table;
+* streets only move forward, with bets reset on each new street;
+* a finished hand has a winner who did not fold and no further events.
+
+On streams that do not select ``isComplete`` a hand ends once nobody can
+play on, and its winner is known only if everyone else folded.
+
+:class:`HandValidator` is the pipeline stage: pass it as a
+:class:`~src.subscriptions.GraphQLWSConnection` ``recorder`` (or call
+:meth:`~HandValidator.record` with frames) and it validates every
+subscriber's stream of every hand, reporting each hand at its first bad
+frame.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from .events import DealEvent, HandEvent, decode_frame
+from .metrics import METRICS
+
+STREETS = ("Preflop", "Flop", "Turn", "River")
+# How many finished hands are remembered to flag late frames.
+FINISHED_HANDS = 100_000
+
+
+class HandState:
+    """Validation state of one hand as seen by one subscriber."""
+
+    __slots__ = (
+        "hand_id",
+        "streets",
+        "street",
+        "pot",
+        "total",
+        "players",
+        "folded",
+        "acted",
+        "turns_known",
+        "events",
+        "complete",
+        "winner_id",
+        "initial_problems",
+    )
+
+    def __init__(self, hand_id, street_event, streets=STREETS, total=None, turns_known=True, complete=False):
+        """Start from a street snapshot; ``total`` defaults to its pot plus stacks.
+
+        Pass ``turns_known=False`` when the snapshot may be mid-street (who
+        already acted is unknown): turn order is then checked from the next
+        street on, and ``complete=None`` when it is not known whether the
+        hand is over. Anything wrong with the snapshot itself (e.g. chips
+        that do not add up to ``total``) is left in :attr:`initial_problems`.
+        """
+        self.hand_id = hand_id
+        self.streets = tuple(streets)
+        self.street = None
+        self.events = 0
+        self.complete = bool(complete)
+        self.winner_id = None
+        self.folded = set()
+        self.acted = set()
+        self.turns_known = turns_known
+        if total is None:
+            total = street_event.pot + sum(p.stack for p in street_event.currentActivePlayers)
+        self.total = total
+        self.initial_problems = []
+        self._apply_street(street_event, self.initial_problems)
+        if complete is False and self.next_actor() is None:
+            self.initial_problems.append("hand is not complete but nobody can act")
+
+    @classmethod
+    def from_deal(cls, deal, streets=STREETS):
+        """Start from a ``deal`` payload; turn order is known if nobody has acted yet.
+
+        A deal does not say whether the hand is over (the blinds can put
+        everyone all-in), so a deal where nobody can act starts complete.
+        """
+        state = cls(deal.id, deal.streetEvents[-1], streets, turns_known=not deal.playerEvents, complete=None)
+        state.complete = state.next_actor() is None
+        return state
+
+    def player(self, player_id):
+        return self.players.get(player_id)
+
+    @property
+    def top_bet(self):
+        """The bet every live player must match on this street."""
+        return max(p.bet for p in self.players.values())
+
+    def next_actor(self):
+        """The :class:`~src.events.ActivePlayer` due to act, or ``None``."""
+        top = self.top_bet
+        for p in self.players.values():
+            if p.isInactive or p.stack == 0:
+                continue
+            if p.id not in self.acted or p.bet < top:
+                return p
+        return None
+
+    def over(self):
+        """Whether play has ended: one player left in, or nobody able to act."""
+        return sum(not p.isInactive for p in self.players.values()) <= 1 or self.next_actor() is None
+
+    def update(self, event):
+        """Apply one :class:`~src.events.HandEvent`; return the invariants it broke."""
+        self.events += 1
+        problems = []
+        if self.complete:
+            return ["event after the hand completed"]
+        played = event.playerEvent
+        chips = 0
+        if played is not None:
+            chips = self._apply_action(played, problems)
+        if event.streetEvent is not None:
+            if event.streetEvent.pot != self.pot + chips:
+                problems.append(f"pot is {event.streetEvent.pot}, expected {self.pot + chips}")
+            self._apply_street(event.streetEvent, problems, played.playerId if played else None, chips)
+        if event.isComplete:
+            self.complete = True
+            self.winner_id = event.winnerId
+            if event.winnerId is None or event.winnerId in self.folded or event.winnerId not in self.players:
+                problems.append(f"hand completed with winner {event.winnerId}")
+        elif event.isComplete is None and self.over():
+            # isComplete was not selected: take the hand as over once nobody can play on.
+            self.complete = True
+            live = [p for p in self.players.values() if not p.isInactive]
+            self.winner_id = event.winnerId or (live[0].id if len(live) == 1 else None)
+        elif self.next_actor() is None:
+            problems.append("hand is not complete but nobody can act")
+        return problems
+
+    def _apply_action(self, played, problems):
+        actor = played.playerId
+        if self.turns_known:
+            expected = self.next_actor()
+            if expected is None or expected.id != actor:
+                problems.append(f"{actor} acted, expected {expected.id if expected else 'nobody'}")
+        prior = self.players.get(actor)
+        if prior is None:
+            problems.append(f"{actor} is not seated")
+            return 0
+        if actor in self.folded:
+            problems.append(f"{actor} acted after folding")
+        action = played.action.upper()
+        top = self.top_bet
+        if action in ("FOLD", "CHECK"):
+            chips = 0
+            if action == "CHECK" and prior.bet < top:
+                problems.append(f"{actor} checked facing {top - prior.bet}")
+        else:
+            chips = played.amount
+            if chips <= 0 or chips > prior.stack:
+                problems.append(f"{actor} bet {chips} with a stack of {prior.stack}")
+            elif prior.bet + chips < top and chips != prior.stack:
+                problems.append(f"{actor} bet {chips}, short of the {top - prior.bet} to call")
+        if played.currentStack is not None and played.currentStack != prior.stack - chips:
+            problems.append(f"{actor} stack is {played.currentStack}, expected {prior.stack - chips}")
+        if played.currentPot is not None and played.currentPot != self.pot + chips:
+            problems.append(f"pot after {actor} is {played.currentPot}, expected {self.pot + chips}")
+        self.acted.add(actor)
+        return chips
+
+    def _apply_street(self, street_event, problems, actor=None, chips=0):
+        street = street_event.streetType
+        previous = self.street
+        new_street = street != previous
+        if new_street:
+            if street not in self.streets:
+                problems.append(f"unknown street {street}")
+            elif previous is not None and self.streets.index(street) < self.streets.index(previous):
+                problems.append(f"street went back from {previous} to {street}")
+        prior_players = self.players if previous is not None else None
+        players = {}
+        chips_on_table = street_event.pot
+        folded = self.folded
+        for p in street_event.currentActivePlayers:
+            players[p.id] = p
+            chips_on_table += p.stack
+            if p.isInactive:
+                folded.add(p.id)
+            elif p.id in folded:
+                problems.append(f"{p.id} folded but is active again")
+            if prior_players is None:
+                continue
+            prior = prior_players.get(p.id)
+            # Decoding reuses unchanged player nodes, so identity means nothing moved.
+            if prior is p and not new_street and p.id != actor:
+                continue
+            if prior is None:
+                problems.append(f"{p.id} joined mid-hand")
+                continue
+            moved = chips if p.id == actor else 0
+            if p.stack != prior.stack - moved:
+                problems.append(f"{p.id} stack is {p.stack}, expected {prior.stack - moved}")
+            expected_bet = 0 if new_street else prior.bet + moved
+            if p.bet != expected_bet:
+                problems.append(f"{p.id} bet is {p.bet} on {street}, expected {expected_bet}")
+        if new_street:
+            if previous is not None:
+                self.turns_known = True
+            self.acted = set()
+        self.street = street
+        self.pot = street_event.pot
+        self.players = players
+        if chips_on_table != self.total:
+            problems.append(f"pot plus stacks is {chips_on_table}, expected {self.total}")
+
+
+@dataclass(frozen=True)
+class Violation:
+    subscriber: str
+    hand_id: str
+    event: int
+    message: str
+
+    def __str__(self):
+        return f"{self.subscriber} hand {self.hand_id} event {self.event}: {self.message}"
+
+
+@dataclass
+class ValidatorReport:
+    events: int = 0
+    hands: int = 0
+    completed: int = 0
+    violations: list = field(default_factory=list)
+
+    def summary(self):
+        return (
+            f"events={self.events} hands={self.hands} completed={self.completed} "
+            f"violations={len(self.violations)}"
+        )
+
+
+class HandValidator:
+    """Recorder stage validating every subscriber's ``handEvent`` stream.
+
+    A hand is tracked from its ``deal`` frame, or from its first
+    ``handEvent`` if the deal was not seen (turn order is then checked from
+    the next street). At the first broken invariant the hand is reported and
+    dropped; completed hands are dropped too, remembering the last
+    ``FINISHED_HANDS`` to flag frames that arrive after the end.
+    ``on_violation`` is called with each :class:`Violation` as it is found.
+    """
+
+    def __init__(self, streets=STREETS, metrics=METRICS, on_violation=None):
+        self.streets = tuple(streets)
+        self.hands = {}
+        self.finished = OrderedDict()
+        self.report = ValidatorReport()
+        self.on_violation = on_violation
+        self._events = metrics.counter("validator_events_total")
+        self._violations = metrics.counter("validator_violations_total")
+
+    def record(self, subscriber_id, frame, raw=None, received_ns=None):
+        event = decode_frame(frame)
+        if isinstance(event, HandEvent):
+            self.validate(subscriber_id, event)
+        elif isinstance(event, DealEvent) and event.deal is not None and event.deal.streetEvents:
+            key = (subscriber_id, event.deal.id)
+            if key not in self.hands and key not in self.finished:
+                state = HandState.from_deal(event.deal, self.streets)
+                self.hands[key] = state
+                self.report.hands += 1
+                self._check(key, state, state.initial_problems)
+
+    def validate(self, subscriber_id, event):
+        """Check one decoded :class:`~src.events.HandEvent` from ``subscriber_id``."""
+        self.report.events += 1
+        self._events.inc()
+        key = (subscriber_id, event.handId)
+        state = self.hands.get(key)
+        if state is None:
+            if key in self.finished:
+                if self.finished[key] is not None:
+                    self._flag(key, self.finished[key] + 1, "event after the hand completed")
+                    self.finished[key] = None
+                return
+            if event.streetEvent is None:
+                return
+            self.report.hands += 1
+            state = HandState(event.handId, event.streetEvent, self.streets, turns_known=False, complete=bool(event.isComplete))
+            state.events = 1
+            self.hands[key] = state
+            problems = state.initial_problems
+        else:
+            problems = state.update(event)
+        self._check(key, state, problems)
+
+    def _check(self, key, state, problems):
+        if problems:
+            self._flag(key, state.events, problems[0])
+            self._finish(key, state, failed=True)
+        elif state.complete:
+            self.report.completed += 1
+            self._finish(key, state)
+
+    def _flag(self, key, event_index, message):
+        violation = Violation(key[0], key[1], event_index, message)
+        self.report.violations.append(violation)
+        self._violations.inc()
+        if self.on_violation is not None:
+            self.on_violation(violation)
+
+    def _finish(self, key, state, failed=False):
+        self.hands.pop(key, None)
+        # Failed hands are muted rather than flagged again on every later frame.
+        self.finished[key] = None if failed else state.events
+        if len(self.finished) > FINISHED_HANDS:
+            self.finished.popitem(last=False)
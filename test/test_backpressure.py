@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from src.backpressure import MODES, BackpressureReport, ModeReport, degradation, run_backpressure
+from src.client import GraphQLClient
+from src.fake_server import FakePokerServer
+
+MIX = ("fast",) * 8 + ("frozen",)
+
+
+async def _backpressure(**server_options):
+    async with FakePokerServer(auto_deal=False, send_buffer=4096, **server_options) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            report = await run_backpressure(client, server.ws_url, tables=1, hands=30, mix=MIX, drain=0.5)
+        return report, server
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "options", [{}, {"max_queue": 20, "slow_policy": "drop"}, {"max_queue": 20, "slow_policy": "close"}]
+)
+async def test_frozen_subscriber_never_starves_the_fast_ones(options):
+    report, server = await _backpressure(**options)
+
+    fast, frozen = report.modes["fast"], report.modes["frozen"]
+    assert report.hands == 30
+    assert fast.subscribers == 8 and fast.delivered == fast.expected > 0
+    assert frozen.subscribers == 1 and frozen.missing > 0 and frozen.drain is None
+    if "max_queue" not in options:
+        # Unbounded: the backlog piles up on the server.
+        assert server.max_queue_depth > 20
+        assert server.dropped_frames == server.slow_closes == 0
+    elif options["slow_policy"] == "drop":
+        assert server.max_queue_depth <= 20 and server.dropped_frames > 0 and server.slow_closes == 0
+    else:
+        assert server.max_queue_depth <= 20 and server.slow_closes == 1 and server.dropped_frames == 0
+
+
+def test_slow_policy_must_be_drop_or_close():
+    with pytest.raises(ValueError):
+        FakePokerServer(max_queue=10, slow_policy="block")
+
+
+@pytest.mark.asyncio
+async def test_throttle_stalls_on_schedule(monkeypatch):
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    assert MODES["fast"].throttle() is None
+    throttle = MODES["stalling"].throttle()
+    await throttle()
+    assert sleeps == []
+    throttle = MODES["frozen"].throttle()
+    await throttle()
+    assert sleeps == [MODES["frozen"].stall_for]
+
+
+def test_degradation_compares_percentiles():
+    baseline, mixed = BackpressureReport(tables=1), BackpressureReport(tables=1)
+    baseline.modes["fast"] = ModeReport("fast", latencies=[0.01] * 100)
+    mixed.modes["fast"] = ModeReport("fast", latencies=[0.02] * 100)
+
+    assert set(degradation(baseline, mixed).values()) == {2.0}
@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from src.client import GraphQLClient, GraphQLError
+from src.fake_server import FakePokerServer
+from src.metrics import MetricsRegistry
+from src.queries import PLAY_TURN_MUTATION
+
+
+async def start_app(handler):
+    app = web.Application()
+    app.router.add_post("/graphql", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}/graphql"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_mutations_share_one_pool():
+    seen = []
+    peers = set()
+
+    async def handler(request):
+        body = await request.json()
+        seen.append((body, dict(request.headers)))
+        peers.add(request.transport.get_extra_info("peername"))
+        hand_id = f"hand-{len(seen)}"
+        await asyncio.sleep(0.01)
+        if "playTurn" in body["query"]:
+            return web.json_response({"data": {"playTurn": body["variables"]["id"]}})
+        return web.json_response({"data": {"deal": hand_id}})
+
+    runner, url = await start_app(handler)
+    try:
+        async with GraphQLClient(url, table_id="pool-test", max_connections=4) as client:
+            hand_ids = await asyncio.gather(*(client.deal(["a", "b"]) for _ in range(20)))
+            played = await asyncio.gather(*(client.play_turn(h, "a", "FOLD", 0.0) for h in hand_ids))
+    finally:
+        await runner.cleanup()
+
+    assert len(set(hand_ids)) == 20
+    assert played == hand_ids
+    assert len(peers) <= 4
+    deal_body, _ = seen[0]
+    assert deal_body["variables"]["dealInput"]["tableId"] == "pool-test"
+    _, play_headers = seen[-1]
+    assert play_headers["X-Table-Token"] == "pool-test"
+
+
+@pytest.mark.asyncio
+async def test_graphql_errors_raise():
+    async def handler(request):
+        return web.json_response({"data": None, "errors": [{"message": "hand not found"}]})
+
+    runner, url = await start_app(handler)
+    try:
+        async with GraphQLClient(url) as client:
+            with pytest.raises(GraphQLError) as exc_info:
+                await client.hand("missing")
+    finally:
+        await runner.cleanup()
+
+    assert exc_info.value.errors[0]["message"] == "hand not found"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("batching", [True, False])
+async def test_execute_batch_with_and_without_server_support(batching):
+    registry = MetricsRegistry()
+    async with FakePokerServer(seed=6, auto_deal=False, batching=batching) as server:
+        async with GraphQLClient(server.graphql_url, metrics=registry) as client:
+            deals = [(["a", "b"], None, f"batch-{i}") for i in range(250)]
+            hand_ids = await client.deal_many(deals)
+            played = await client.execute_batch(
+                [(PLAY_TURN_MUTATION, {"id": h, "playerId": "a", "action": "FOLD", "amount": 0.0}) for h in hand_ids]
+            )
+            hands = await client.hands(hand_ids)
+
+        assert client.batching is batching
+        assert [h.table_id for h in (server.engine.get(i) for i in hand_ids)] == [d[2] for d in deals]
+
+    assert played == [{"playTurn": h} for h in hand_ids]
+    assert [h["winnerId"] for h in hands] == ["b"] * 250
+    requests = registry.counter("graphql_requests_total").value
+    assert requests == (9 if batching else 1 + 750)
+
+
+@pytest.mark.asyncio
+async def test_execute_batch_keeps_order_and_reports_errors_in_place():
+    async with FakePokerServer(seed=6, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            hand_id = await client.deal(["a", "b", "c"])
+            script = [("c", "BET", 20.0), ("a", "BET", 10.0), ("c", "CHECK", 0.0), ("b", "CHECK", 0.0)]
+            operations = [
+                (PLAY_TURN_MUTATION, {"id": hand_id, "playerId": p, "action": act, "amount": amt})
+                for p, act, amt in script
+            ]
+            results = await client.execute_batch(operations, ordered=True, return_exceptions=True)
+            with pytest.raises(GraphQLError):
+                await client.execute_batch(operations[:1], ordered=True)
+
+    assert isinstance(results[2], GraphQLError)
+    assert [r for i, r in enumerate(results) if i != 2] == [{"playTurn": hand_id}] * 3
+    assert server.engine.get(hand_id).street_index == 1
+
+
+@pytest.mark.asyncio
+async def test_batches_too_large_are_split_not_resent_one_by_one():
+    sizes = []
+
+    async def handler(request):
+        body = await request.json()
+        sizes.append(len(body))
+        if len(body) > 2:
+            return web.json_response({"errors": [{"message": "request entity too large"}]}, status=413)
+        return web.json_response([{"data": {"n": op["variables"]["n"]}} for op in body])
+
+    runner, url = await start_app(handler)
+    try:
+        async with GraphQLClient(url) as client:
+            operations = [("query N($n: Int) { n }", {"n": n}) for n in range(5)]
+            results = await client.execute_batch(operations, ordered=True)
+    finally:
+        await runner.cleanup()
+
+    assert results == [{"n": n} for n in range(5)]
+    assert client.batching
+    assert sizes == [5, 2, 3, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_unmatched_batch_responses_raise_instead_of_resending():
+    requests = []
+
+    async def handler(request):
+        requests.append(await request.json())
+        return web.json_response([{"data": {"n": 0}}])
+
+    runner, url = await start_app(handler)
+    try:
+        async with GraphQLClient(url) as client:
+            with pytest.raises(GraphQLError, match="answered with 1 responses"):
+                await client.execute_batch([("query N($n: Int) { n }", {"n": n}) for n in range(3)])
+    finally:
+        await runner.cleanup()
+
+    assert len(requests) == 1
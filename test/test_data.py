@@ -1,63 +1,27 @@
-from dataclasses import dataclass
-from typing import List, Optional
-
-
-@dataclass
-class ActivePlayer:
-    id: str
-    bet: str
-    stack: str
-    isInactive: bool
-    isBigBlind: bool
-
-
-@dataclass
-class StreetEvent:
-    streetType: str
-    currentActivePlayers: List[ActivePlayer]
-    pot: str
-
-
-@dataclass
-class PlayerEvent:
-    playerId: str
-    action: str
-    amount: str
-    streetType: str
-    currentStack: str
-    currentPot: str
-
-
-@dataclass
-class MutationData:
-    mutationType: str
-    handId: str
-    streetEvent: StreetEvent
-    playerEvent: PlayerEvent
-    cards: Optional[str]
-
-
 import json
 from dataclasses import asdict
+from decimal import Decimal
+
+from src.events import ActivePlayer, MutationData, PlayerEvent, StreetEvent
 
 # Create instances of ActivePlayer
-active_players = [
-    ActivePlayer(id="player_one", bet="10", stack="990", isInactive=False, isBigBlind=False),
-    ActivePlayer(id="player_two", bet="20", stack="980", isInactive=False, isBigBlind=True),
-    ActivePlayer(id="player_three", bet="0", stack="1000", isInactive=True, isBigBlind=False),
-]
+active_players = (
+    ActivePlayer(id="player_one", bet=Decimal(10), stack=Decimal(990), isInactive=False, isBigBlind=False),
+    ActivePlayer(id="player_two", bet=Decimal(20), stack=Decimal(980), isInactive=False, isBigBlind=True),
+    ActivePlayer(id="player_three", bet=Decimal(0), stack=Decimal(1000), isInactive=True, isBigBlind=False),
+)
 
 # Create an instance of StreetEvent
-street_event = StreetEvent(streetType="Preflop", currentActivePlayers=active_players, pot="30")
+street_event = StreetEvent(streetType="Preflop", currentActivePlayers=active_players, pot=Decimal(30))
 
 # Create an instance of PlayerEvent
 player_event = PlayerEvent(
     playerId="player_three",
     action="Fold",
-    amount="0",
+    amount=Decimal(0),
     streetType="Preflop",
-    currentStack="1000",
-    currentPot="30",
+    currentStack=Decimal(1000),
+    currentPot=Decimal(30),
 )
 
 # Create an instance of MutationData
@@ -72,7 +36,7 @@ mutation_data = MutationData(
 mutation_data_dict = asdict(mutation_data)
 
 # Convert the dictionary to a JSON string
-mutation_data_json = json.dumps(mutation_data_dict)
+mutation_data_json = json.dumps(mutation_data_dict, default=str)
 
 
 def hand_event_1(hand_id):
@@ -0,0 +1,70 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.client import GraphQLClient  # noqa: E402
+from src.equity import deal_arrays, random_deals, read_deals, run_equity, street_equity  # noqa: E402
+from src.evaluator import encode  # noqa: E402
+from src.fake_server import FakePokerServer  # noqa: E402
+from src.recorder import HandRecorder  # noqa: E402
+from src.subscriptions import GraphQLWSConnection  # noqa: E402
+
+
+def test_known_matchups():
+    hole = encode([["Ah", "As", "Kh", "Ks"]]).reshape(1, 2, 2)
+    board = encode([["2c", "7d", "9s", "Kd", "3h"]])
+    (equity,) = street_equity(hole, board, 4000, np.random.default_rng(17))
+
+    assert equity[0, 0] == pytest.approx(0.82, abs=0.02)
+    assert equity[:, 0] + equity[:, 1] == pytest.approx(np.ones(4))
+    # Kings hit a set on the turn: aces need one of the two remaining aces on the river.
+    assert equity[2, 0] == pytest.approx(2 / 44)
+    assert equity[3].tolist() == [0.0, 1.0]
+
+
+def test_results_do_not_depend_on_worker_count():
+    hole, board = random_deals(np.random.default_rng(17), 40, 3)
+    groups = {3: ([f"h{i}" for i in range(40)], hole, board)}
+    local = run_equity(groups, trials=200, workers=0, chunk_size=16, seed=5)
+    pooled = run_equity(groups, trials=200, workers=2, chunk_size=16, seed=5)
+    other_seed = run_equity(groups, trials=200, workers=0, chunk_size=16, seed=6)
+
+    assert np.array_equal(local.equity[3][1], pooled.equity[3][1])
+    assert not np.array_equal(local.equity[3][1], other_seed.equity[3][1])
+    assert local.for_hand("h7").shape == (4, 3)
+
+
+def test_fairness_of_uniform_deals():
+    hole, board = random_deals(np.random.default_rng(17), 3000, 4)
+    result = run_equity({4: ([str(i) for i in range(3000)], hole, board)}, trials=100, workers=0)
+    report = result.fairness
+
+    assert report.hands == 3000
+    assert report.card_counts.sum() == 3000 * 13
+    assert abs(report.card_z) < 4
+    assert report.seat_equity[4][0] == pytest.approx([0.25] * 4, abs=0.02)
+    assert np.abs(report.seat_luck[4]).max() < 4
+
+
+@pytest.mark.asyncio
+async def test_equity_from_recorded_deals(tmp_path):
+    path = tmp_path / "session.jsonl"
+    async with FakePokerServer(seed=17, auto_deal=False) as server:
+        async with HandRecorder(path) as recorder:
+            async with GraphQLWSConnection(server.ws_url, table_token="equity", recorder=recorder) as conn:
+                subscription = await conn.subscribe_deal()
+                async with GraphQLClient(server.graphql_url, table_id="equity") as client:
+                    for players in (["a", "b"], ["a", "b", "c"], ["a", "b", "c"]):
+                        await client.deal(players)
+                for _ in range(3):
+                    await subscription.next()
+
+    deals = read_deals(path)
+    groups = deal_arrays(deals)
+    assert sorted(groups) == [2, 3] and len(groups[3][0]) == 2
+    result = run_equity(groups, trials=100, workers=0)
+    for deal in deals:
+        river = result.for_hand(deal.id)[3]
+        best = max(p.score for p in deal.players)
+        winners = [p.score == best for p in deal.players]
+        assert river.tolist() == pytest.approx([w / sum(winners) for w in winners])
@@ -0,0 +1,137 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.client import GraphQLClient  # noqa: E402
+from src.evaluator import CATEGORY_NAMES, ShowdownChecker, category_of, describe, encode, score_hands  # noqa: E402
+from src.fake_server import RANKS, SUITS, FakePokerServer, score_cards  # noqa: E402
+from src.load import SCRIPTS, run_load  # noqa: E402
+from src.metrics import MetricsRegistry  # noqa: E402
+from src.subscriptions import GraphQLWSConnection  # noqa: E402
+
+DECK = [r + s for r in RANKS for s in SUITS]
+
+
+def test_scores_match_reference_on_random_hands():
+    rng = random.Random(15)
+    for size in (5, 6, 7):
+        hands = [rng.sample(DECK, size) for _ in range(20000)]
+        assert score_hands(hands).tolist() == [score_cards(h) for h in hands]
+
+
+@pytest.mark.parametrize(
+    "hand, description",
+    [
+        (["Ah", "2d", "3c", "4s", "5h", "Kd", "Kc"], "Straight"),
+        (["Ah", "2h", "3h", "4h", "5h", "6h", "Kc"], "Straight Flush"),
+        (["9s", "9h", "9d", "5c", "5s", "5h", "2d"], "Full House"),
+        (["9s", "9h", "9d", "9c", "5s", "5h", "5d"], "Four of a Kind"),
+        (["Qs", "Qh", "7d", "7c", "3s", "3h", "2d"], "Two Pair"),
+        (["Ks", "9s", "7s", "4s", "2s", "Ah", "Ad"], "Flush"),
+    ],
+)
+def test_edge_cases_match_reference(hand, description):
+    (score,) = score_hands([hand])
+    assert score == score_cards(hand)
+    assert describe(score) == description
+
+
+def test_encode_rejects_malformed_hands():
+    assert encode([["2s", "Ac"]]).tolist() == [[0, 51]]
+    with pytest.raises(ValueError):
+        encode([["Ah", "Kd"], ["Ah"]])
+    with pytest.raises(ValueError):
+        encode([["Ah", "1x"]])
+    with pytest.raises(ValueError):
+        encode([["Ah", "Kx"]])
+
+
+def _frames(hand_id, players, board, winner_id, inactive=(), descriptions=None):
+    descriptions = descriptions or {}
+    deal = {
+        "type": "data",
+        "payload": {
+            "data": {
+                "deal": {
+                    "mutationType": "CREATED",
+                    "id": hand_id,
+                    "deal": {
+                        "id": hand_id,
+                        "tableId": "t",
+                        "players": [
+                            {"id": p, "stack": "1000", "cards": cards, "score": score, "description": descriptions.get(p)}
+                            for p, cards, score in players
+                        ],
+                        "cards": {"flop": board[:3], "turn": board[3], "river": board[4]},
+                    },
+                }
+            }
+        },
+    }
+    active = [{"id": p, "bet": "0", "stack": "980", "isInactive": p in inactive} for p, _, _ in players]
+    final = {
+        "type": "data",
+        "payload": {
+            "data": {
+                "handEvent": {
+                    "mutationType": "UPDATED",
+                    "handId": hand_id,
+                    "streetEvent": {"streetType": "River", "currentActivePlayers": active, "pot": "60"},
+                    "isComplete": True,
+                    "winnerId": winner_id,
+                }
+            }
+        },
+    }
+    return deal, final
+
+
+def test_checker_flags_wrong_scores_and_winners():
+    board = ["2c", "7d", "9h", "Js", "Kd"]
+    a, b = ["Ah", "Ad"], ["Qs", "3h"]
+    registry = MetricsRegistry()
+    checker = ShowdownChecker(metrics=registry)
+
+    # Any encoding will do as long as it places the players the same way.
+    good_deal, good_final = _frames(
+        "h1", [("a", a, 7), ("b", b, 3)], board, "a", descriptions={"a": "Pair of Aces", "b": "High Card"}
+    )
+    bad_deal, bad_final = _frames("h2", [("a", a, 3), ("b", b, 7)], board, "b")
+    wrong_category_deal, wrong_category_final = _frames(
+        "h3", [("a", a, 7), ("b", b, 3)], board, "a", descriptions={"a": "Two Pair"}
+    )
+    folded_deal, folded_final = _frames("h4", [("a", a, 0), ("b", b, 0)], board, "b", inactive=("a",))
+    frames = (good_final, good_deal, good_deal, bad_deal, bad_final, wrong_category_deal, wrong_category_final)
+    for frame in frames + (folded_deal, folded_final):
+        checker.record("observer", frame)
+    report = checker.check()
+
+    assert report.showdowns == 3 and report.players == 6
+    assert report.score_mismatches == [("h2", "a", 1, 0), ("h2", "b", 0, 1), ("h3", "a", "Two Pair", "Pair")]
+    assert report.winner_mismatches == [("h2", "b", ["a"])]
+    assert registry.counter("showdowns_checked_total").value == 3
+    assert registry.counter("showdown_mismatches_total", kind="score").value == 3
+    assert registry.counter("showdown_mismatches_total", kind="winner").value == 1
+
+
+def test_category_of_descriptions():
+    assert category_of("Straight Flush, Five High") == CATEGORY_NAMES.index("Straight Flush")
+    assert category_of("straight") == CATEGORY_NAMES.index("Straight")
+    assert category_of("Pair of Aces") == CATEGORY_NAMES.index("Pair")
+    assert category_of(None) is None and category_of("Royal") is None
+
+
+@pytest.mark.asyncio
+async def test_checker_validates_every_showdown_in_a_load_run():
+    checker = ShowdownChecker(metrics=MetricsRegistry())
+    async with FakePokerServer(seed=15, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            async with GraphQLWSConnection(server.ws_url, recorder=checker) as observer:
+                load = await run_load(client, tables=4, hands_per_table=3, script=SCRIPTS["showdown"], observer=observer)
+
+    report = checker.check()
+    assert load.hands == 12 and load.errors == 0
+    assert report.showdowns == 12 and report.players == 36
+    assert report.ok
@@ -0,0 +1,65 @@
+import dataclasses
+import json
+from decimal import Decimal
+
+import pytest
+
+from src.client import GraphQLClient
+from src.events import DealEvent, HandEvent, decode_frame
+from src.fake_server import FakePokerServer
+from src.subscriptions import GraphQLWSConnection
+
+from .test_data import hand_event_2
+
+
+def test_decode_hand_event_frame():
+    frame = hand_event_2("hand-9")
+    event = decode_frame(frame)
+
+    assert isinstance(event, HandEvent)
+    assert decode_frame(json.dumps(frame)) == event
+    assert event.handId == "hand-9"
+    assert event.isComplete is True and event.winnerId == "player_two"
+    assert event.streetEvent.pot == Decimal(30)
+    assert event.streetEvent.player("player_two").stack == Decimal(980)
+    assert event.playerEvent.action == "Fold" and event.playerEvent.amount == 0
+    assert event.cards is None
+
+
+def test_events_are_slotted_immutable_and_share_values():
+    first = decode_frame(hand_event_2("a"))
+    second = decode_frame(json.dumps(hand_event_2("b")))
+
+    assert not hasattr(first, "__dict__")
+    assert not hasattr(first.streetEvent.currentActivePlayers[0], "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        first.handId = "c"
+    assert first.streetEvent.pot is second.streetEvent.pot
+    assert first.playerEvent.playerId is second.playerEvent.playerId
+    assert first.streetEvent.currentActivePlayers[0] is second.streetEvent.currentActivePlayers[0]
+
+
+def test_projected_and_non_data_frames():
+    projected = {"type": "data", "id": "1", "payload": {"data": {"handEvent": {"handId": "h", "playerEvent": None}}}}
+    event = decode_frame(projected)
+    assert event.handId == "h" and event.streetEvent is None and event.winnerId is None
+    assert decode_frame({"type": "ka"}) is None
+
+
+@pytest.mark.asyncio
+async def test_subscription_next_event_decodes_deal_and_hand_frames():
+    async with FakePokerServer(seed=2, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url, table_id="ev") as client:
+            async with GraphQLWSConnection(server.ws_url, user_token="alice", table_token="ev") as conn:
+                deal_sub = await conn.subscribe_deal()
+                hand_id = await client.deal(["alice", "bob"])
+                deal = await deal_sub.next_event()
+                hand_sub = await conn.subscribe_hand(hand_id)
+                await client.play_turn(hand_id, "alice", "FOLD", 0.0)
+                hand = await hand_sub.next_event()
+
+    assert isinstance(deal, DealEvent) and deal.id == hand_id
+    assert [p.id for p in deal.deal.players] == ["alice", "bob"]
+    assert deal.deal.streetEvents[0].pot == Decimal(30)
+    assert len(deal.deal.cards.flop) == 3
+    assert hand.winnerId == "bob" and hand.playerEvent.playerId == "alice"
@@ -0,0 +1,158 @@
+import asyncio
+import time
+
+import aiohttp
+import pytest
+
+from src.client import GraphQLClient, GraphQLError
+from src.deal import deal_mutation_params, deal_mutation_query
+from src.fake_server import FakePokerServer, score_cards
+from src.subscriptions import GraphQLWSConnection
+
+PLAYERS = ["player_one", "player_two", "player_three"]
+
+
+def test_score_cards_orders_categories():
+    straight_flush = score_cards(["9h", "Th", "Jh", "Qh", "Kh", "2c", "3d"])
+    quads = score_cards(["9h", "9s", "9d", "9c", "Kh", "2c", "3d"])
+    full_house = score_cards(["9h", "9s", "9d", "Kc", "Kh", "2c", "3d"])
+    wheel = score_cards(["Ah", "2s", "3d", "4c", "5h", "9c", "Jd"])
+    two_pair = score_cards(["Ah", "As", "3d", "3c", "5h", "9c", "Jd"])
+    assert straight_flush > quads > full_house > wheel > two_pair
+    assert score_cards(["Ah", "As", "Kd", "3c", "5h", "9c", "Jd"]) > score_cards(["Ah", "As", "Qd", "3c", "5h", "9c", "Jd"])
+
+
+@pytest.mark.asyncio
+async def test_graphql_and_subscriptions_end_to_end():
+    async with FakePokerServer(seed=1, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url, table_id="fake-e2e") as client:
+            async with GraphQLWSConnection(server.ws_url, user_token="player_one", table_token="fake-e2e") as conn:
+                deal_sub = await conn.subscribe_deal()
+                hand_id = await client.deal(PLAYERS)
+                deal_frame = await deal_sub.next()
+                assert deal_frame["payload"]["data"]["deal"]["id"] == hand_id
+
+                hand_sub = await conn.subscribe_hand(hand_id)
+                await client.play_turn(hand_id, "player_three", "FOLD", 0.0)
+                await client.play_turn(hand_id, "player_one", "FOLD", 0.0)
+                first, second = await hand_sub.next(), await hand_sub.next()
+
+            with pytest.raises(GraphQLError):
+                await client.play_turn(hand_id, "player_two", "CHECK", 0.0)
+            hand = await client.hand(hand_id)
+
+    assert first["payload"]["data"]["handEvent"]["playerEvent"]["playerId"] == "player_three"
+    assert second["payload"]["data"]["handEvent"]["isComplete"] is True
+    assert hand["winnerId"] == "player_two"
+    assert {p["id"]: p["stack"] for p in hand["players"]} == {
+        "player_one": "990",
+        "player_two": "1010",
+        "player_three": "1000",
+    }
+
+
+@pytest.mark.asyncio
+async def test_auto_deal_rotates_button():
+    async with FakePokerServer(seed=2) as server:
+        async with GraphQLClient(server.graphql_url, table_id="fake-auto") as client:
+            async with GraphQLWSConnection(server.ws_url, table_token="fake-auto") as conn:
+                deal_sub = await conn.subscribe_deal()
+                hand_id = await client.deal(["alice", "bob"])
+                await deal_sub.next()
+                await client.play_turn(hand_id, "alice", "FOLD", 0.0)
+                next_deal = (await deal_sub.next())["payload"]["data"]["deal"]
+
+    assert next_deal["id"] != hand_id
+    assert next_deal["deal"]["tableId"] == "fake-auto"
+    assert [p["id"] for p in next_deal["deal"]["streetEvents"][0]["currentActivePlayers"]] == ["bob", "alice"]
+
+
+@pytest.mark.asyncio
+async def test_rest_endpoints():
+    async with FakePokerServer(seed=3, auto_deal=False) as server:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"{server.url}/api/deal", json={"tableId": "t", "players": [{"id": "a", "stack": "1000"}]}) as resp:
+                assert resp.status == 400
+            async with session.post(
+                f"{server.url}/api/deal",
+                json={"tableId": "t", "players": [{"id": "a", "stack": "1000"}, {"id": "b", "stack": "1000"}]},
+            ) as resp:
+                assert resp.status == 201
+                hand_id = (await resp.json())["id"]
+            async with session.post(
+                f"{server.url}/api/hands/{hand_id}/play", json={"playerId": "a", "action": "Fold", "amount": "0"}
+            ) as resp:
+                result = await resp.json()
+            async with session.get(f"{server.url}/api/hands") as resp:
+                listing = await resp.json()
+            async with session.get(f"{server.url}/api/hands/nope") as resp:
+                assert resp.status == 404
+
+    assert result["gameOver"] is True
+    assert result["winner"] == "b"
+    assert listing["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_bad_graphql_requests_get_errors_not_500s():
+    async with FakePokerServer(auto_deal=False) as server:
+        async with aiohttp.ClientSession() as session:
+            headers = {"Content-Type": "application/json"}
+            requests = (("{not json", 400), ('"a string"', 400), ('{"query": 1}', 400), ('{"query": "{ hand"}', 200))
+            for body, status in requests:
+                async with session.post(server.graphql_url, data=body, headers=headers) as resp:
+                    assert resp.status == status
+                    payload = await resp.json()
+                    assert payload["data"] is None and payload["errors"][0]["message"].startswith("bad request")
+
+
+@pytest.mark.asyncio
+async def test_bad_batch_entries_get_their_own_errors():
+    async with FakePokerServer(auto_deal=False) as server:
+        async with aiohttp.ClientSession() as session:
+            deal = {"query": deal_mutation_query, "variables": deal_mutation_params(["a", "b"])}
+            async with session.post(server.graphql_url, json=[deal, 1, {"query": "{ hand"}]) as resp:
+                assert resp.status == 200
+                ok, not_an_object, unparsed = await resp.json()
+
+    assert ok["data"]["deal"] in server.engine.hands
+    assert len(server.engine.hands) == 1
+    assert not_an_object["errors"][0]["message"] == "bad request: an operation must be a JSON object"
+    assert unparsed["errors"][0]["message"] == "bad request: cannot parse the query"
+
+
+@pytest.mark.asyncio
+async def test_failed_writes_drop_the_subscriber():
+    async with FakePokerServer(auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url, table_id="gone") as client:
+            async with GraphQLWSConnection(server.ws_url, table_token="gone") as conn:
+                subscription = await conn.subscribe_deal()
+                await subscription.ready.wait()
+                (subscriber,) = server.subscribers
+
+                async def reset(frame):
+                    raise ConnectionResetError("Cannot write to closing transport")
+
+                subscriber.ws.send_str = reset
+                await client.deal(["a", "b"])
+                # Closing ends the socket's handler, which may cancel the writer mid-close.
+                await asyncio.wait_for(asyncio.gather(subscriber.writer, return_exceptions=True), timeout=1)
+
+                assert server.subscribers == set() and server._deal_operations == {}
+                assert subscriber.ws.closed
+
+
+@pytest.mark.asyncio
+async def test_latency_and_fan_out_delay():
+    async with FakePokerServer(latency=0.05, fan_out_delay=0.05, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url, table_id="slow") as client:
+            async with GraphQLWSConnection(server.ws_url, table_token="slow") as conn:
+                deal_sub = await conn.subscribe_deal()
+                started = time.perf_counter()
+                await client.deal(["a", "b"])
+                mutation_done = time.perf_counter() - started
+                await deal_sub.next()
+                frame_received = time.perf_counter() - started
+
+    assert mutation_done >= 0.05
+    assert frame_received >= 0.1
@@ -0,0 +1,57 @@
+import pytest
+
+from src.client import GraphQLClient
+from src.fake_server import FakePokerServer
+from src.fanout import FanOutTracker, run_fanout
+from src.load import SCRIPTS, check_down_script
+
+from .test_data import hand_event_2
+
+
+def test_check_down_script_matches_three_player_showdown():
+    assert check_down_script(3) == SCRIPTS["showdown"]
+    assert check_down_script(2)[:2] == ((0, "BET", 10.0), (1, "CHECK", 0.0))
+
+
+def test_tracker_correlates_frames_per_subscriber():
+    tracker = FanOutTracker()
+    tracker.expect("h", ["a", "b", "c"])
+    tracker.mutation_sent("h", "player_one", sent_ns=1_000_000)
+    frame = hand_event_2("h")
+    tracker.record("a", frame, received_ns=3_000_000)
+    tracker.record("b", frame, received_ns=5_000_000)
+    tracker.record("b", frame, received_ns=6_000_000)
+    tracker.record("z", frame, received_ns=6_000_000)
+
+    report = tracker.report()
+    assert report.per_subscriber == {3: [0.002, 0.004]}
+    assert report.worst == {3: []}
+    assert report.missing == 1
+    assert report.uncorrelated == 1
+
+
+@pytest.mark.asyncio
+async def test_fanout_reports_worst_of_n_by_table_size():
+    delay = 0.002
+    async with FakePokerServer(seed=1, auto_deal=False, fan_out_delay=delay) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            report = await run_fanout(client, server.ws_url, table_sizes=(2, 4), hands_per_table=2)
+
+    assert report.missing == 0 and report.uncorrelated == 0
+    for size in (2, 4):
+        mutations = 2 * len(check_down_script(size))
+        assert len(report.per_subscriber[size]) == mutations * size
+        assert len(report.worst[size]) == mutations
+        assert min(report.per_subscriber[size]) >= delay
+        assert max(report.worst[size]) == max(report.per_subscriber[size])
+    assert "worst-of-N" in report.summary()
+
+
+@pytest.mark.asyncio
+async def test_fanout_waits_for_the_server_to_register_subscriptions():
+    async with FakePokerServer(seed=1, auto_deal=False, subscribe_delay=0.05) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            report = await run_fanout(client, server.ws_url, table_sizes=(2,), hands_per_table=1)
+
+    assert report.missing == 0
+    assert len(report.worst[2]) == len(check_down_script(2))
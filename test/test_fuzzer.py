@@ -0,0 +1,72 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from src import fake_server
+from src.client import GraphQLClient
+from src.fake_server import FakePokerServer, GameError
+from src.fuzzer import choose_action, run_fuzz
+
+
+def test_choose_action_is_always_legal():
+    rng = random.Random(18)
+    for _ in range(5000):
+        stack = Decimal(rng.randint(1, 500))
+        bet = Decimal(rng.choice([0, 10, 20]))
+        top = bet + Decimal(rng.choice([0, 0, 5, 20, 600]))
+        action, amount = choose_action(rng, bet, stack, top)
+        if action in ("FOLD", "CHECK"):
+            assert amount == 0 and (action == "FOLD" or top == bet)
+        else:
+            assert 0 < amount <= stack
+            assert amount >= min(top - bet, stack)
+
+
+async def _fuzz(hands=40, seed=18, only=None, concurrency=20):
+    async with FakePokerServer(seed=1, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            return await run_fuzz(client, server.ws_url, hands, seed, concurrency, only)
+
+
+@pytest.mark.asyncio
+async def test_fuzzer_finds_no_violations_and_is_reproducible():
+    first = await _fuzz()
+    again = await _fuzz(concurrency=7)
+    assert first.violations == [] and first.errors == 0
+    assert first.hands == 40 and first.events > 40
+    assert set(first.actions) == {"BET", "CALL", "CHECK", "FOLD", "RAISE"}
+    assert (again.actions, again.events) == (first.actions, first.events)
+
+    single = await _fuzz(only=11)
+    assert single.hands == 1 and single.events == (await _fuzz(only=11)).events
+
+
+@pytest.mark.asyncio
+async def test_fuzzer_catches_chip_leaks(monkeypatch):
+    finish = fake_server.Hand._finish
+
+    def leaky_finish(self, winners):
+        self.pot -= Decimal(1)
+        finish(self, winners)
+
+    monkeypatch.setattr(fake_server.Hand, "_finish", leaky_finish)
+    report = await _fuzz(hands=10)
+    assert report.violations
+    assert all("final stacks add up to" in v.message for v in report.violations)
+    assert str(report.violations[0]).startswith("seed=18 hand=")
+
+
+@pytest.mark.asyncio
+async def test_fuzzer_catches_refused_legal_actions(monkeypatch):
+    play = fake_server.Hand.play
+
+    def no_half_chips(self, player_id, action, amount):
+        if Decimal(str(amount)) % 1:
+            raise GameError("fractional bets are not allowed")
+        return play(self, player_id, action, amount)
+
+    monkeypatch.setattr(fake_server.Hand, "play", no_half_chips)
+    report = await _fuzz(hands=60)
+    assert report.violations
+    assert all("refused: fractional bets are not allowed" in v.message for v in report.violations)
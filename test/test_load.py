@@ -0,0 +1,48 @@
+import pytest
+
+from src.client import GraphQLClient
+from src.fake_server import FakePokerServer
+from src.load import SCRIPTS, percentile, run_load
+from src.metrics import MetricsRegistry
+from src.sequencing import HandSequencer
+from src.subscriptions import GraphQLWSConnection
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 1001))
+    assert percentile(values, 50) == 500
+    assert percentile(values, 99) == 990
+    assert percentile(values, 99.9) == 999
+    assert percentile([], 50) == 0.0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("script", sorted(SCRIPTS))
+async def test_load_run_against_local_server(script):
+    async with FakePokerServer(seed=7, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            report = await run_load(client, tables=8, hands_per_table=3, script=SCRIPTS[script])
+
+        table_ids = {h.table_id for h in server.engine.hands.values()}
+        assert all(h.is_complete for h in server.engine.hands.values())
+
+    assert report.errors == 0
+    assert report.hands == 24
+    assert len(table_ids) == 8
+    assert len(report.latencies["deal"]) == 24
+    assert len(report.latencies["playTurn"]) == 24 * len(SCRIPTS[script])
+    assert set(report.percentiles("playTurn")) == {"p50", "p95", "p99", "p99.9"}
+    assert report.hands_per_second > 0
+
+
+@pytest.mark.asyncio
+async def test_observer_sees_every_hand_when_subscribing_is_slow():
+    sequencer = HandSequencer(metrics=MetricsRegistry())
+    async with FakePokerServer(seed=7, auto_deal=False, subscribe_delay=0.05) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            async with GraphQLWSConnection(server.ws_url, recorder=sequencer, metrics=MetricsRegistry()) as observer:
+                report = await run_load(client, 3, 2, SCRIPTS["showdown"], observer=observer)
+
+    assert report.hands == 6
+    assert sequencer.report.hands == 6
+    assert sequencer.report.events > 0 and sequencer.report.gaps == 0
@@ -0,0 +1,101 @@
+import json
+import random
+import time
+
+import pytest
+
+from src.client import GraphQLClient
+from src.fake_server import FakePokerServer
+from src.load import percentile
+from src.metrics import Histogram, MetricsRegistry
+from src.subscriptions import GraphQLWSConnection
+
+
+def test_histogram_percentiles_within_bucket_error():
+    rng = random.Random(11)
+    values = [rng.lognormvariate(-6, 1.5) for _ in range(20000)]
+    histogram = Histogram()
+    for v in values:
+        histogram.record(v)
+
+    exact = sorted(values)
+    for pct in (50, 95, 99, 99.9):
+        assert histogram.percentile(pct) == pytest.approx(percentile(exact, pct), rel=0.01)
+    assert histogram.count == len(values)
+    assert histogram.mean == pytest.approx(sum(values) / len(values), rel=1e-6)
+    assert histogram.max_ns == int(max(values) * 1e9)
+
+
+def test_histogram_merge_and_round_trip():
+    a, b, combined = Histogram(), Histogram(), Histogram()
+    for i in range(1, 5000):
+        (a if i % 2 else b).record_ns(i * 997)
+        combined.record_ns(i * 997)
+
+    merged = Histogram.from_dict(json.loads(json.dumps(a.to_dict()))).merge(b)
+    assert merged.counts == combined.counts
+    assert merged.percentiles() == combined.percentiles()
+    assert (merged.min_ns, merged.max_ns, merged.sum_ns) == (combined.min_ns, combined.max_ns, combined.sum_ns)
+    with pytest.raises(ValueError):
+        merged.merge(Histogram(sub_bucket_bits=6))
+
+
+def test_histogram_record_overhead_is_small():
+    histogram = Histogram()
+    started = time.perf_counter()
+    for i in range(100000):
+        histogram.record_ns(i * 31)
+    assert (time.perf_counter() - started) / 100000 < 5e-6
+
+
+def test_registry_exports(tmp_path):
+    registry = MetricsRegistry()
+    with registry.time("op_seconds", operation="deal"):
+        pass
+    registry.histogram("op_seconds", operation="playTurn").record(0.004)
+    registry.counter("frames_total").inc(3)
+
+    text = registry.to_prometheus()
+    assert "# TYPE op_seconds summary" in text
+    assert 'op_seconds{operation="playTurn",quantile="0.5"} 0.004' in text
+    assert 'op_seconds_count{operation="deal"} 1' in text
+    assert "frames_total 3" in text
+
+    path = tmp_path / "metrics.json"
+    registry.write(path)
+    other = MetricsRegistry.read(path).merge(registry)
+    assert other.counter("frames_total").value == 6
+    assert other.histogram("op_seconds", operation="playTurn").count == 2
+
+
+@pytest.mark.asyncio
+async def test_client_and_subscriptions_record_metrics():
+    registry = MetricsRegistry()
+    async with FakePokerServer(seed=4, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url, table_id="m", metrics=registry) as client:
+            async with GraphQLWSConnection(server.ws_url, table_token="m", metrics=registry) as conn:
+                deal_sub = await conn.subscribe_deal()
+                hand_id = await client.deal(["a", "b"])
+                await deal_sub.next()
+                await client.play_turn(hand_id, "a", "FOLD", 0.0)
+                with pytest.raises(Exception):
+                    await client.play_turn(hand_id, "b", "FOLD", 0.0)
+
+    assert registry.histogram("graphql_request_seconds", operation="DealHand").count == 1
+    assert registry.histogram("graphql_request_seconds", operation="PlayTurn").count == 2
+    assert registry.counter("graphql_errors_total", operation="PlayTurn", error="GraphQLError").value == 1
+    assert registry.counter("graphql_request_bytes_total").value > 0
+    assert registry.counter("ws_frames_total").value == 1
+    assert registry.counter("ws_bytes_total").value > 100
+
+
+@pytest.mark.asyncio
+async def test_ad_hoc_requests_count_their_bytes():
+    registry = MetricsRegistry()
+    payload = {"query": "query Hand($id: ID!) { hand(id: $id) { id } }", "variables": {"id": "missing"}}
+    async with FakePokerServer(auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url, metrics=registry) as client:
+            await client.post(payload)
+
+    assert registry.counter("graphql_requests_total").value == 1
+    assert registry.counter("graphql_request_bytes_total").value == len(json.dumps(payload).encode())
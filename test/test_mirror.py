@@ -0,0 +1,134 @@
+import asyncio
+import copy
+from decimal import Decimal
+
+import pytest
+
+from src.client import GraphQLClient
+from src.fake_server import FakePokerServer, PokerEngine
+from src.load import SCRIPTS
+from src.metrics import MetricsRegistry
+from src.mirror import MIRROR_HAND_QUERY, HandMirror, MirrorSet, run_mirror
+from src.validator import HandValidator
+
+
+def _frame(field, value):
+    return {"type": "data", "id": "1", "payload": {"data": {field: value}}}
+
+
+def _deal(hand):
+    return _frame("deal", {"mutationType": "CREATED", "id": hand.id, "deal": copy.deepcopy(hand.to_dict())})
+
+
+def _new_hand(seed=29):
+    return PokerEngine(seed).deal("mirror", [{"id": p, "stack": 1000} for p in ("a", "b", "c")])
+
+
+def test_mirror_tracks_the_engine_action_by_action():
+    hand = _new_hand()
+    mirrors = MirrorSet(metrics=MetricsRegistry())
+    mirrors.record("bot", _deal(hand))
+    mirror = mirrors.get(hand.id)
+    for _, action, amount in SCRIPTS["showdown"]:
+        assert mirror.current_actor == hand.next_actor().id
+        assert mirror.to_call == max(s.bet for s in hand.seats) - hand.next_actor().bet
+        hand.play(hand.next_actor().id, action, Decimal(str(amount)))
+        mirrors.record("bot", _frame("handEvent", copy.deepcopy(hand.hand_event())))
+        assert mirror.pot == hand.pot and mirror.actions == len(hand.player_events)
+        assert mirror.stacks == {p["id"]: Decimal(p["stack"]) for p in hand.street_events[-1]["currentActivePlayers"]}
+
+    assert mirror.complete and mirror.current_actor is None
+    assert mirror.winner_id == hand.winner_id and mirror.problems == []
+    assert mirror.diff(hand.to_dict()) == []
+
+
+@pytest.mark.parametrize("script, winner_known", [("fold", True), ("showdown", False)])
+def test_completion_is_inferred_when_not_selected(script, winner_known):
+    hand = _new_hand()
+    frames = [_deal(hand)]
+    for _, action, amount in SCRIPTS[script]:
+        hand.play(hand.next_actor().id, action, Decimal(str(amount)))
+        event = copy.deepcopy(hand.hand_event())
+        del event["isComplete"], event["winnerId"]
+        frames.append(_frame("handEvent", event))
+    mirrors = MirrorSet(metrics=MetricsRegistry())
+    validator = HandValidator(metrics=MetricsRegistry())
+    for frame in frames:
+        mirrors.record("bot", frame)
+        validator.record("bot", frame)
+
+    mirror = mirrors.get(hand.id)
+    assert mirror.complete and mirror.problems == []
+    assert mirror.winner_id == (hand.winner_id if winner_known else None)
+    assert validator.report.violations == [] and validator.report.completed == 1
+
+
+def test_diff_names_every_drifted_field():
+    hand = _new_hand()
+    hand.play(hand.next_actor().id, "BET", Decimal(20))
+    mirror = HandMirror.from_hand(copy.deepcopy(hand.to_dict()))
+    assert mirror.actions == 1 and mirror.diff(hand.to_dict()) == []
+
+    hand.play(hand.next_actor().id, "FOLD", Decimal(0))
+    server = hand.to_dict()
+    assert mirror.diff(server) == [
+        "a bet/stack/folded is 10/990/True, mirror has 10/990/False",
+    ]
+    server["streetEvents"][-1]["pot"] = "70"
+    server["isComplete"] = True
+    assert mirror.diff(server)[:2] == ["isComplete is True, mirror has False", "pot is 70, mirror has 50"]
+
+
+def test_mirror_picked_up_mid_stream_is_not_reconciled():
+    hand = _new_hand()
+    hand.play(hand.next_actor().id, "BET", Decimal(20))
+    mirrors = MirrorSet(metrics=MetricsRegistry())
+    mirrors.record("bot", _frame("handEvent", copy.deepcopy(hand.hand_event())))
+
+    mirror = mirrors.get(hand.id)
+    assert mirror.actions is None and mirror.current_actor is not None and not mirror.complete
+
+
+@pytest.mark.asyncio
+async def test_until_times_out_for_a_hand_never_seen():
+    mirrors = MirrorSet(metrics=MetricsRegistry())
+    with pytest.raises(asyncio.TimeoutError):
+        await mirrors.until("nope", lambda m: True, timeout=0.05)
+
+
+@pytest.mark.asyncio
+async def test_reconcile_flags_drift_and_skips_mirrors_behind():
+    metrics = MetricsRegistry()
+    async with FakePokerServer(seed=29, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            ids = [await client.deal(["a", "b", "c"], table_id=f"t{i}") for i in range(3)]
+            hands = await client.hands(ids, MIRROR_HAND_QUERY)
+            mirrors = MirrorSet(metrics=metrics)
+            for hand in hands:
+                mirrors.add(HandMirror.from_hand(hand))
+            await client.play_turn(ids[0], "c", "BET", 20.0, table_id="t0")
+            snapshot = server.engine.hands[ids[1]].street_events[-1]
+            next(p for p in snapshot["currentActivePlayers"] if p["id"] == "a")["stack"] = "995"
+
+            drift = await mirrors.reconcile(client)
+
+    assert [(d.hand_id, d.message) for d in drift] == [
+        (ids[1], "a bet/stack/folded is 10/995/False, mirror has 10/990/False")
+    ]
+    assert (mirrors.report.checked, mirrors.report.behind) == (2, 1)
+    assert metrics.counter("mirror_drift_total").value == 1
+
+
+@pytest.mark.asyncio
+async def test_hands_played_from_mirrors_match_the_server():
+    metrics = MetricsRegistry()
+    async with FakePokerServer(seed=29, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            report, mirrors = await run_mirror(
+                client, server.ws_url, tables=4, hands=3, reconcile=0.01, metrics=metrics
+            )
+
+    assert report.hands == 12 and report.errors == 0 and report.actions > 12
+    assert mirrors.report.drift == [] and mirrors.report.checked >= 12
+    assert all(m.complete and m.problems == [] for m in mirrors.mirrors.values())
+    assert metrics.counter("mirror_events_total").value == report.actions
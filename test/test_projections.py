@@ -0,0 +1,76 @@
+import pytest
+
+from src.client import GraphQLClient
+from src.deal import deal_subscription
+from src.fake_server import FakePokerServer, selection_tree
+from src.load import SCRIPTS, main, run_load
+from src.metrics import MetricsRegistry
+from src.play import hand_event_subscription
+from src.projections import PROFILES, PROJECTIONS, SCHEMA, selection
+from src.queries import REGISTRY
+from src.sequencing import HandSequencer
+from src.subscriptions import GraphQLWSConnection
+from src.validator import HandValidator
+
+
+def _leaves(tree, prefix=""):
+    found = set()
+    for name, sub in tree.items():
+        found |= _leaves(sub, f"{prefix}{name}.") if isinstance(sub, dict) else {prefix + name}
+    return found
+
+
+@pytest.mark.parametrize("field", sorted(SCHEMA))
+def test_profiles_nest_and_auditor_selects_everything(field):
+    observer, player, auditor = (_leaves(selection(SCHEMA[field], p)) for p in PROFILES)
+
+    assert observer < player < auditor == _leaves(SCHEMA[field])
+
+
+@pytest.mark.parametrize("field, suite_document", [("deal", deal_subscription), ("handEvent", hand_event_subscription)])
+def test_schema_covers_the_suite_documents(field, suite_document):
+    (suite,) = selection_tree(suite_document).values()
+    assert _leaves(suite) <= _leaves(SCHEMA[field])
+
+
+def test_documents_are_registered_and_parse_to_their_selection():
+    for (field, profile), query in PROJECTIONS.items():
+        assert REGISTRY[query.name] is query
+        assert selection_tree(query.text) == {field: selection(SCHEMA[field], profile)}
+
+    deal = selection(SCHEMA["deal"], "observer")["deal"]
+    assert "cards" not in deal["players"] and "playerEvents" not in deal
+    assert "cards" in selection(SCHEMA["deal"], "player")["deal"]["players"]
+
+
+async def _observe(profile, recorder):
+    async with FakePokerServer(seed=31, auto_deal=False, project_subscriptions=True) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            async with GraphQLWSConnection(server.ws_url, recorder=recorder, metrics=MetricsRegistry()) as observer:
+                return await run_load(
+                    client, 3, 2, SCRIPTS["showdown"], observer=observer, projection=profile
+                )
+
+
+@pytest.mark.asyncio
+async def test_validator_runs_on_the_observer_profile():
+    validator = HandValidator(metrics=MetricsRegistry())
+    load = await _observe("observer", validator)
+
+    assert load.hands == 6
+    assert validator.report.violations == [] and validator.report.completed == 6
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("profile", ["observer", "player"])
+async def test_sequencer_runs_on_the_profile(profile):
+    sequencer = HandSequencer(metrics=MetricsRegistry())
+    await _observe(profile, sequencer)
+
+    assert sequencer.report.events == 6 * len(SCRIPTS["showdown"]) and sequencer.report.anomalies == 0
+
+
+def test_check_showdowns_needs_the_auditor_profile(capsys):
+    with pytest.raises(SystemExit):
+        main(["--local", "--check-showdowns", "--projection", "player"])
+    assert "--projection auditor" in capsys.readouterr().err
@@ -0,0 +1,47 @@
+import hashlib
+import json
+
+import pytest
+
+from src.client import GraphQLClient
+from src.fake_server import FakePokerServer
+from src.play import play_turn_payload
+from src.queries import PLAY_TURN_MUTATION, REGISTRY, register
+
+
+def test_encoded_body_matches_payload_builder():
+    payload = play_turn_payload("hand-1", "player_one", "FOLD", 0.0)
+    body = json.loads(PLAY_TURN_MUTATION.encode(payload["variables"]))
+    assert body == payload
+
+
+def test_persisted_encodings():
+    variables = play_turn_payload("hand-1", "player_one", "FOLD", 0.0)["variables"]
+    full = PLAY_TURN_MUTATION.encode(variables)
+    hash_only = json.loads(PLAY_TURN_MUTATION.encode(variables, persisted=True, include_text=False))
+
+    assert PLAY_TURN_MUTATION.sha256 == hashlib.sha256(PLAY_TURN_MUTATION.text.encode()).hexdigest()
+    assert "query" not in hash_only
+    assert hash_only["extensions"]["persistedQuery"]["sha256Hash"] == PLAY_TURN_MUTATION.sha256
+    assert len(json.dumps(hash_only)) < len(full)
+
+
+def test_register_is_idempotent():
+    assert register("PlayTurn", PLAY_TURN_MUTATION.text) is REGISTRY["PlayTurn"]
+    with pytest.raises(ValueError):
+        register("PlayTurn", "mutation Other { other }")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("server_apq", [True, False])
+async def test_client_uses_hash_only_requests_when_supported(server_apq):
+    async with FakePokerServer(persisted_queries=server_apq, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url, table_id="apq") as client:
+            for _ in range(3):
+                hand_id = await client.deal(["a", "b"])
+                await client.play_turn(hand_id, "a", "FOLD", 0.0)
+                assert (await client.hand(hand_id))["winnerId"] == "b"
+
+    assert client.persisted_queries is server_apq
+    assert (PLAY_TURN_MUTATION.sha256 in server.persisted) is server_apq
+    assert len(server.engine.hands) == 3
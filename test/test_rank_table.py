@@ -0,0 +1,68 @@
+import random
+from dataclasses import replace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src import evaluator  # noqa: E402
+from src.client import GraphQLClient  # noqa: E402
+from src.fake_server import FakePokerServer  # noqa: E402
+from src.rank_table import RankTable, build, load, verify_deal_scores  # noqa: E402
+from src.subscriptions import GraphQLWSConnection  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    return load(build(tmp_path_factory.mktemp("rank-table")), build_missing=False)
+
+
+def test_tables_are_memory_mapped_read_only(table):
+    assert isinstance(table.ranks, np.memmap) and isinstance(table.flush, np.memmap)
+    with pytest.raises(ValueError):
+        table.ranks[0] = 1
+    with pytest.raises(ValueError):
+        RankTable(np.zeros(10, dtype=np.int32), table.flush)
+
+
+def test_lookups_match_the_evaluator(table):
+    cards = np.argsort(np.random.default_rng(16).random((50000, 52)), axis=1)[:, :7]
+    assert (table.evaluate(cards) == evaluator.evaluate(cards)).all()
+
+    rng = random.Random(16)
+    deck = [r + s for r in evaluator.RANKS for s in evaluator.SUITS]
+    hands = [rng.sample(deck, 7) for _ in range(2000)]
+    hands.append(["Ah", "Kh", "Qh", "Jh", "Th", "9h", "Ad"])
+    assert [table.score(h) for h in hands] == evaluator.score_hands(hands).tolist()
+
+
+def test_missing_tables_are_built_on_load(tmp_path):
+    table = load(tmp_path / "fresh")
+    assert table.score(["2s", "3s", "4s", "5s", "As", "Kd", "Kc"]) == 8 << 20 | 3 << 16
+
+
+@pytest.mark.asyncio
+async def test_verify_deal_scores_on_published_deals(table):
+    async with FakePokerServer(seed=16, auto_deal=False) as server:
+        async with GraphQLWSConnection(server.ws_url, table_token="rank-table") as conn:
+            subscription = await conn.subscribe_deal()
+            async with GraphQLClient(server.graphql_url, table_id="rank-table") as client:
+                for _ in range(20):
+                    await client.deal(["a", "b", "c"])
+            deals = [(await subscription.next_event()).deal for _ in range(20)]
+
+    assert all(verify_deal_scores(deal, table) == [] for deal in deals)
+    deal = next(d for d in deals if len({p.score for p in d.players}) == 3)
+    # Any encoding passes as long as it places the players the same way.
+    rescored = replace(deal, players=tuple(replace(p, score=p.score * 10 + 1) for p in deal.players))
+    assert verify_deal_scores(rescored, table) == []
+
+    best, worst = max(deal.players, key=lambda p: p.score), min(deal.players, key=lambda p: p.score)
+    swap = {best.id: worst.score, worst.id: best.score}
+    swapped = replace(deal, players=tuple(replace(p, score=swap.get(p.id, p.score)) for p in deal.players))
+    assert sorted(verify_deal_scores(swapped, table)) == sorted([(deal.id, best.id, 2, 0), (deal.id, worst.id, 0, 2)])
+
+    first = deal.players[0]
+    other = evaluator.CATEGORY_NAMES[(evaluator.category_of(first.description) + 1) % len(evaluator.CATEGORY_NAMES)]
+    renamed = replace(deal, players=(replace(first, description=other),) + deal.players[1:])
+    assert verify_deal_scores(renamed, table) == [(deal.id, first.id, other, first.description)]
@@ -0,0 +1,51 @@
+import json
+import time
+
+import pytest
+
+from src.client import GraphQLClient
+from src.fake_server import FakePokerServer
+from src.recorder import HandRecorder, read_recording
+from src.subscriptions import GraphQLWSConnection
+
+from .test_data import hand_event_2
+
+
+@pytest.mark.asyncio
+async def test_recorder_batches_and_preserves_order(tmp_path):
+    path = tmp_path / "frames.jsonl"
+    frame = hand_event_2("hand-7")
+    raw = json.dumps(frame)
+
+    started = time.perf_counter()
+    async with HandRecorder(path, batch_size=500) as recorder:
+        for i in range(20000):
+            recorder.record(f"sub-{i % 3}", frame, raw)
+    elapsed = time.perf_counter() - started
+
+    rows = list(read_recording(path))
+    assert len(rows) == 20000
+    assert rows[0]["s"] == "sub-0" and rows[1]["s"] == "sub-1"
+    assert rows[0]["h"] == "hand-7"
+    assert rows[0]["k"] == "handEvent"
+    assert rows[0]["f"] == frame
+    assert all(a["t"] <= b["t"] for a, b in zip(rows, rows[1:]))
+    assert 20000 / elapsed > 10000
+
+
+@pytest.mark.asyncio
+async def test_connection_records_deal_and_hand_frames(tmp_path):
+    path = tmp_path / "hand.jsonl"
+    async with FakePokerServer(seed=5, auto_deal=False) as server, HandRecorder(path) as recorder:
+        async with GraphQLClient(server.graphql_url, table_id="rec") as client:
+            async with GraphQLWSConnection(server.ws_url, user_token="alice", table_token="rec", recorder=recorder) as conn:
+                deal_sub = await conn.subscribe_deal()
+                hand_id = await client.deal(["alice", "bob"])
+                await deal_sub.next()
+                hand_sub = await conn.subscribe_hand(hand_id)
+                await client.play_turn(hand_id, "alice", "FOLD", 0.0)
+                await hand_sub.next()
+
+    rows = list(read_recording(path))
+    assert [(r["s"], r["k"], r["h"]) for r in rows] == [("alice", "deal", hand_id), ("alice", "handEvent", hand_id)]
+    assert rows[1]["f"]["payload"]["data"]["handEvent"]["winnerId"] == "bob"
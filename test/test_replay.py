@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+from src.client import GraphQLClient
+from src.fake_server import FakePokerServer
+from src.recorder import HandRecorder, read_recording
+from src.replay import load_hands, replay, seats_from_preflop_order
+from src.subscriptions import GraphQLWSConnection
+
+PLAYERS = ["p1", "p2", "p3"]
+STEP_SECONDS = 0.05
+
+
+def history(hand):
+    return [(e["playerId"], e["action"], e["amount"]) for e in hand.player_events]
+
+
+async def record_table(server, client, recorder, table_id, button_index, actions):
+    async with GraphQLWSConnection(server.ws_url, user_token="observer", table_token=table_id, recorder=recorder) as conn:
+        deal_sub = await conn.subscribe_deal(table_token=table_id)
+        await asyncio.sleep(STEP_SECONDS)
+        hand = server.deal({"tableId": table_id, "players": [{"id": p, "stack": 1000} for p in PLAYERS], "buttonIndex": button_index})
+        await deal_sub.next()
+        hand_sub = await conn.subscribe_hand(hand.id)
+        for player, action, amount in actions:
+            await asyncio.sleep(STEP_SECONDS)
+            await client.play_turn(hand.id, player, action, amount, table_id=table_id)
+            await hand_sub.next()
+    return hand
+
+
+def test_seats_put_blinds_first():
+    assert seats_from_preflop_order(["utg", "btn", "sb", "bb"]) == ("sb", "bb", "utg", "btn")
+    assert seats_from_preflop_order(["sb", "bb"]) == ("sb", "bb")
+
+
+@pytest.mark.asyncio
+async def test_replay_reproduces_recorded_action_sequences(tmp_path):
+    path = tmp_path / "session.jsonl"
+    async with FakePokerServer(seed=3, auto_deal=False) as server, HandRecorder(path) as recorder:
+        async with GraphQLClient(server.graphql_url) as client:
+            default = await record_table(
+                server, client, recorder, "rec-a", None, [("p3", "BET", 20.0), ("p1", "BET", 10.0), ("p2", "FOLD", 0.0)]
+            )
+            rotated = await record_table(
+                server, client, recorder, "rec-b", 0, [("p1", "FOLD", 0.0), ("p2", "BET", 30.0), ("p3", "FOLD", 0.0)]
+            )
+        recorded = {default.id: history(default), rotated.id: history(rotated)}
+
+    hands = load_hands(read_recording(path))
+    assert [h.hand_id for h in hands] == [default.id, rotated.id]
+    assert hands[0].stacks == {p: 1000.0 for p in PLAYERS}
+    assert [len(h.actions) for h in hands] == [3, 3]
+
+    for speed in (0, 4.0):
+        async with FakePokerServer(seed=4, auto_deal=False) as target:
+            async with GraphQLClient(target.graphql_url) as client:
+                started = time.perf_counter()
+                report = await replay(client, hands, speed=speed)
+                elapsed = time.perf_counter() - started
+            replayed = sorted(target.engine.hands.values(), key=lambda h: h.table_id)
+
+        assert report.errors == 0
+        assert report.hands == 2
+        assert len({h.table_id for h in replayed}) == 2
+        assert [history(h) for h in replayed] == [recorded[default.id], recorded[rotated.id]]
+        if speed:
+            span = (hands[-1].actions[-1].at_ns - hands[0].dealt_at_ns) / 1e9
+            assert elapsed >= span / speed * 0.9
+            assert len(report.latencies["lag"]) == 6
@@ -0,0 +1,60 @@
+import pytest
+
+from src.fake_server import FakePokerServer
+from src.metrics import MetricsRegistry
+from src.runner import plan_jobs, run_scenarios, run_suite, suite_modules
+from src.scenario import PLANS
+
+
+def test_plan_jobs_split_tables_across_workers():
+    plans = [PLANS["sb_raises_bb_folds"], PLANS["utg_raises_wins"]]
+    jobs = plan_jobs(plans, 5, 3, "r1")
+    assert [(plan.name, tables) for plan, tables, _ in jobs] == [
+        ("sb_raises_bb_folds", 2),
+        ("sb_raises_bb_folds", 2),
+        ("sb_raises_bb_folds", 1),
+        ("utg_raises_wins", 2),
+        ("utg_raises_wins", 2),
+        ("utg_raises_wins", 1),
+    ]
+    assert len({prefix for _, _, prefix in jobs}) == len(jobs)
+    assert len(plan_jobs(plans, 1, 3, "r1")) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("workers", [0, 2])
+async def test_scenarios_run_in_parallel_on_isolated_tables(workers):
+    registry = MetricsRegistry()
+    async with FakePokerServer(seed=14, auto_deal=False) as server:
+        reports, elapsed = await run_scenarios(server.graphql_url, tables=3, workers=workers, metrics=registry)
+        tables = {h.table_id for h in server.engine.hands.values()}
+        dealt = len(server.engine.hands)
+
+    assert set(reports) == set(PLANS)
+    for name, report in reports.items():
+        assert report.failures == [], name
+        assert (report.tables, report.hands, report.errors) == (3, 3, 0)
+        assert len(report.latencies["playTurn"]) == 3 * len(PLANS[name].steps)
+        assert report.elapsed <= elapsed
+    assert len(tables) == 3 * len(PLANS)
+    deals = registry.histogram("graphql_request_seconds", operation="DealHand")
+    assert deals.count == dealt
+
+
+def test_suite_modules_are_the_test_files():
+    modules = suite_modules()
+    assert "test/test_runner.py" in modules and "test/test_data.py" in modules
+    assert modules == sorted(modules)
+
+
+@pytest.mark.asyncio
+async def test_suite_runs_one_pytest_process_per_module(tmp_path):
+    failing = tmp_path / "test_failing.py"
+    failing.write_text("def test_fails():\n    assert False\n")
+    results, elapsed = await run_suite(["test/test_queries.py", "test/test_data.py", str(failing)], workers=2)
+
+    ok, no_tests, failed = results
+    assert ok.passed and ok.returncode == 0 and "passed" in ok.output
+    assert no_tests.passed and no_tests.returncode == 5
+    assert not failed.passed and "1 failed" in failed.output
+    assert max(r.elapsed for r in results) <= elapsed
@@ -0,0 +1,72 @@
+import pytest
+
+from src.client import GraphQLClient
+from src.fake_server import FakePokerServer
+from src.scenario import PLANS, SCENARIOS, ScenarioError, compile_scenario, run_plan
+
+
+def spec(**overrides):
+    return {**SCENARIOS["sb_raises_bb_folds"], **overrides}
+
+
+def test_compiled_plan_is_seat_addressed():
+    plan = PLANS["sb_raises_bb_folds"]
+    assert plan.seats == ("player_one", "player_two", "player_three")
+    assert plan.steps == ((2, "FOLD", 0.0), (0, "BET", 30.0), (1, "FOLD", 0.0))
+    assert plan.pot == 60 and plan.winner == 0
+    assert plan.bind("t1") == ("t1-player_one", "t1-player_two", "t1-player_three")
+
+
+def test_button_rotates_seats_onto_the_default_button():
+    plan = compile_scenario(spec(button="player_one", actions=["player_one fold", "player_two fold"], expect={}))
+    assert plan.seats == ("player_two", "player_three", "player_one")
+    heads_up = compile_scenario({"players": ["a", "b"], "button": "b", "actions": ["b fold"]})
+    assert heads_up.seats == ("b", "a") and heads_up.live_seats == (1,)
+
+
+def test_plan_arithmetic_covers_an_all_in_call():
+    plan = compile_scenario(
+        {
+            "players": ["a", "b", "c"],
+            "stacks": {"a": 1000, "b": 1000, "c": 50},
+            "actions": ["c bet 50", "a bet 40", "b bet 30"] + ["a check", "b check"] * 3,
+            "expect": {"pot": 150},
+        }
+    )
+    assert plan.contributions == (50, 50, 50)
+    assert plan.live_seats == (0, 1, 2)
+
+
+@pytest.mark.parametrize(
+    "overrides, message",
+    [
+        ({"actions": ["player_one fold"]}, "not player_one's turn"),
+        ({"actions": ["player_three fold"]}, "do not finish"),
+        ({"actions": ["player_three shove"]}, "unknown action"),
+        ({"expect": {"winner": "player_two"}}, "not player_two"),
+        ({"expect": {"pot": 90}}, "pot of 60"),
+        ({"button": "nobody"}, "not seated"),
+    ],
+)
+def test_compile_rejects_bad_scenarios(overrides, message):
+    with pytest.raises(ScenarioError, match=message):
+        compile_scenario(spec(**overrides))
+
+
+@pytest.mark.asyncio
+async def test_plans_run_on_many_tables():
+    async with FakePokerServer(seed=8, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            reports = {name: await run_plan(client, plan, tables=6) for name, plan in PLANS.items()}
+            wrong = compile_scenario(spec(expect={"stacks": {"player_one": 1030}}))
+            wrong_report = await run_plan(client, wrong, tables=2)
+
+        tables = {h.table_id for h in server.engine.hands.values()}
+
+    for name, report in reports.items():
+        assert report.failures == [], name
+        assert report.hands == 6 and report.errors == 0
+        assert len(report.latencies["playTurn"]) == 6 * len(PLANS[name].steps)
+    assert len(tables) == 6 * len(PLANS) + 2
+    assert len(wrong_report.failures) == 2
+    assert "stack 1020, expected 1030" in wrong_report.failures[0]
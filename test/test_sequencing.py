@@ -0,0 +1,169 @@
+import copy
+from decimal import Decimal
+
+import pytest
+
+from src import sequencing
+from src.client import GraphQLClient
+from src.events import decode_frame
+from src.fake_server import FakePokerServer, PokerEngine
+from src.load import SCRIPTS, check_down_script, run_load
+from src.metrics import MetricsRegistry
+from src.sequencing import HandSequencer, position
+from src.subscriptions import GraphQLWSConnection
+
+
+def _frame(field, value):
+    return {"type": "data", "id": "1", "payload": {"data": {field: value}}}
+
+
+def _played_hand(players=("a", "b", "c"), script=SCRIPTS["showdown"], seed=23):
+    hand = PokerEngine(seed).deal("sequencing", [{"id": p, "stack": 1000} for p in players])
+    deal = _frame("deal", {"mutationType": "CREATED", "id": hand.id, "deal": copy.deepcopy(hand.to_dict())})
+    events = []
+    for _, action, amount in script:
+        hand.play(hand.next_actor().id, action, Decimal(str(amount)))
+        events.append(_frame("handEvent", copy.deepcopy(hand.hand_event())))
+    assert hand.is_complete
+    return deal, events
+
+
+def _sequence(frames, subscriber="observer"):
+    sequencer = HandSequencer(metrics=MetricsRegistry())
+    for frame in frames:
+        sequencer.record(subscriber, frame)
+    return sequencer
+
+
+@pytest.mark.parametrize("players", [("a", "b"), ("a", "b", "c"), ("a", "b", "c", "d", "e", "f")])
+def test_positions_grow_through_a_checked_down_hand(players):
+    _, events = _played_hand(players, check_down_script(len(players)))
+    positions = [position(decode_frame(frame)) for frame in events]
+
+    assert positions == sorted(set(positions))
+
+
+def test_in_order_stream_has_no_anomalies():
+    deal, events = _played_hand()
+    sequencer = _sequence([deal] + events)
+
+    assert (sequencer.report.events, sequencer.report.hands, sequencer.report.anomalies) == (len(events), 1, 0)
+    assert sequencer.hands == {} and len(sequencer.finished) == 1
+
+
+def test_picked_up_mid_stream_has_no_anomalies():
+    _, events = _played_hand()
+    assert _sequence(events[3:]).report.anomalies == 0
+
+
+@pytest.mark.parametrize(
+    "order, gaps, duplicates, reordered",
+    [
+        ([0, 1, 3, 4], 1, 0, 0),  # one check skipped
+        ([0, 1, 2, 5, 6], 1, 0, 0),  # a whole round of checks skipped
+        ([0, 1, 1, 2, 1], 0, 2, 0),
+        ([0, 2, 1, 3], 1, 0, 1),  # swapped: a gap, then the late event
+        ([0, 2, 1, 1, 3], 1, 1, 1),
+    ],
+)
+def test_gaps_duplicates_and_reorders(order, gaps, duplicates, reordered):
+    deal, events = _played_hand()
+    report = _sequence([deal] + [events[i] for i in order]).report
+
+    assert (report.gaps, report.duplicates, report.reordered) == (gaps, duplicates, reordered)
+
+
+def _without_action_streets(frames):
+    frames = copy.deepcopy(frames)
+    for frame in frames:
+        frame["payload"]["data"]["handEvent"]["playerEvent"].pop("streetType")
+    return frames
+
+
+@pytest.mark.parametrize(
+    "order, duplicates",
+    [
+        (range(12), 0),
+        ([0, 1, 2, 2, 3, 4, 5, 5, 6], 2),  # repeats of actions that closed a street
+        ([0, 1, 2, 3, 1, 2, 4], 2),
+    ],
+)
+def test_streams_without_the_action_street(order, duplicates):
+    deal, events = _played_hand()
+    events = _without_action_streets(events)
+    report = _sequence([deal] + [events[i] for i in order]).report
+
+    assert (report.gaps, report.duplicates, report.reordered) == (0, duplicates, 0)
+
+
+def test_late_and_repeated_deals():
+    deal, events = _played_hand()
+    report = _sequence(events[:2] + [deal, deal] + events[2:] + [deal]).report
+
+    assert (report.hands, report.gaps, report.duplicates, report.reordered) == (1, 0, 2, 1)
+
+
+def test_streams_are_sequenced_per_subscriber():
+    deal, events = _played_hand()
+    sequencer = HandSequencer(metrics=MetricsRegistry())
+    for frame in [deal] + events:
+        sequencer.record("a", frame)
+        sequencer.record("b", frame)
+
+    assert sequencer.report.hands == 2 and sequencer.report.anomalies == 0
+
+
+def test_frames_after_the_hand_completed():
+    deal, events = _played_hand()
+    report = _sequence([deal] + events + [events[-1], events[4], deal]).report
+    assert (report.duplicates, report.reordered) == (3, 0)
+
+    # With a gap in the hand, an older unseen event may be the missing one.
+    report = _sequence([deal] + events[:4] + events[5:] + [events[4]]).report
+    assert (report.gaps, report.reordered) == (1, 1)
+
+
+def test_counts_reach_metrics():
+    deal, events = _played_hand()
+    metrics = MetricsRegistry()
+    sequencer = HandSequencer(metrics=metrics)
+    for frame in [deal, deal] + events[:2] + events[3:]:
+        sequencer.record("observer", frame)
+
+    assert metrics.counter("sequencing_events_total").value == len(events) - 1
+    assert metrics.counter("sequencing_anomalies_total", kind="gap").value == 1
+    assert metrics.counter("sequencing_anomalies_total", kind="duplicate").value == 1
+    assert metrics.counter("sequencing_anomalies_total", kind="reordered").value == 0
+
+
+def test_state_is_bounded(monkeypatch):
+    monkeypatch.setattr(sequencing, "SEQUENCE_WINDOW", 4)
+    monkeypatch.setattr(sequencing, "FINISHED_HANDS", 3)
+    sequencer = HandSequencer(metrics=MetricsRegistry())
+    for seed in range(5):
+        deal, events = _played_hand(seed=seed)
+        sequencer.record("observer", deal)
+        for frame in events[:6]:
+            sequencer.record("observer", frame)
+        assert len(sequencer.hands[("observer", events[0]["payload"]["data"]["handEvent"]["handId"])].seen) == 4
+        for frame in events[6:]:
+            sequencer.record("observer", frame)
+
+    assert sequencer.hands == {} and len(sequencer.finished) == 3
+    assert sequencer.report.anomalies == 0
+
+
+@pytest.mark.asyncio
+async def test_load_run_streams_are_in_order():
+    sequencer = HandSequencer(metrics=MetricsRegistry())
+    async with FakePokerServer(seed=23, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            async with GraphQLWSConnection(server.ws_url, recorder=sequencer) as observer:
+                load = await run_load(
+                    client, tables=4, hands_per_table=3, script=SCRIPTS["showdown"], observer=observer
+                )
+
+    assert load.hands == 12 and load.errors == 0
+    assert sequencer.report.hands == 12 and sequencer.report.anomalies == 0
+    assert sequencer.report.events == 12 * len(SCRIPTS["showdown"])
+    assert sequencer.hands == {}
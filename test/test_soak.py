@@ -0,0 +1,63 @@
+import pytest
+
+from src import soak
+from src.client import GraphQLClient
+from src.fake_server import FakePokerServer
+from src.metrics import MetricsRegistry
+from src.soak import Drift, SoakReport, SoakWindow, run_soak
+
+
+async def _soak(server_options=None, **options):
+    async with FakePokerServer(seed=20, **(server_options or {})) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            return await run_soak(client, server.ws_url, **options)
+
+
+@pytest.mark.asyncio
+async def test_soak_catches_every_auto_deal():
+    report = await _soak(tables=3, duration=0.6, window=0.2, players_per_table=3)
+
+    assert report.errors == report.missed == 0 and report.duplicates == []
+    assert len(report.hands) == 3 and min(report.hands.values()) > 5
+    assert report.totals["gap"].count == report.total_hands
+    assert report.totals["playTurn"].count == 2 * report.total_hands
+    assert len(report.windows) >= 2
+    assert sum(w.hands for w in report.windows) == report.total_hands
+    assert len(report.hands_per_second()) == 3
+
+
+@pytest.mark.asyncio
+async def test_soak_flags_replayed_deals(monkeypatch):
+    deal_next = FakePokerServer._deal_next
+
+    def deal_twice(self, hand):
+        deal_next(self, hand)
+        self.publish_deal(self.engine.hands[list(self.engine.hands)[-1]])
+
+    monkeypatch.setattr(FakePokerServer, "_deal_next", deal_twice)
+    report = await _soak(tables=2, duration=0.4, window=0.2)
+
+    assert report.duplicates and report.missed == 0
+    assert {table for table, _ in report.duplicates} == set(report.hands)
+
+
+@pytest.mark.asyncio
+async def test_soak_counts_game_overs_without_a_deal(monkeypatch):
+    monkeypatch.setattr(soak, "DEAL_TIMEOUT_SECONDS", 0.1)
+    report = await _soak({"auto_deal": False}, tables=2, duration=0.3, window=0.1)
+
+    assert report.missed >= 2 and report.missed == report.total_hands
+    assert report.totals["gap"].count == 0
+
+
+def test_drift_against_the_first_window():
+    report = SoakReport(tables=1, window=60, metrics=MetricsRegistry())
+    report.windows = [
+        SoakWindow(0, 60, 100, {"gap": {50: 0.010, 99: 0.020}}),
+        SoakWindow(1, 120, 100, {"gap": {50: 0.011, 99: 0.021}}),
+        SoakWindow(2, 180, 100, {"gap": {50: 0.013, 99: 0.045}, "playTurn": {50: 0.5, 99: 0.5}}),
+    ]
+
+    assert report.drift() == [Drift("gap", 99, 2, 0.020, 0.045)]
+    assert [d.window for d in report.drift(factor=1.05)] == [2, 2]
+    assert report.drift(floor=0.1) == []
@@ -0,0 +1,56 @@
+import pytest
+
+from src.client import GraphQLClient
+from src.fake_server import FakePokerServer
+from src.metrics import MetricsRegistry
+from src.storm import PHASES, StormReport, StormStage, run_storm
+
+
+@pytest.mark.asyncio
+async def test_storm_times_every_phase_of_every_connection():
+    async with FakePokerServer(auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            report = await run_storm(client, server.ws_url, rates=(200, 400), per_stage=15, metrics=MetricsRegistry())
+        # Connections are held until the last stage, then all closed.
+        assert len(server.subscribers) == 0
+
+    assert [stage.opened for stage in report.stages] == [15, 15]
+    for stage in report.stages:
+        assert not stage.failures
+        assert all(stage.latencies[phase].count == 15 for phase in PHASES)
+        assert stage.handshake.percentile(50) > 0
+
+
+@pytest.mark.asyncio
+async def test_refused_connections_fail_at_tcp():
+    server = await FakePokerServer(auto_deal=False).start()
+    ws_url, graphql_url = server.ws_url, server.graphql_url
+    await server.stop()
+    async with GraphQLClient(graphql_url) as client:
+        report = await run_storm(client, ws_url, rates=(100,), per_stage=5, metrics=MetricsRegistry())
+
+    assert report.stages[0].failures == {"tcp": 5}
+    assert report.sustainable_rate() == 0
+
+
+def _stage(rate, opened, elapsed, handshake=0.01, failures=None):
+    stage = StormStage(rate, opened, opened=opened, elapsed=elapsed)
+    stage.handshake.record(handshake)
+    stage.failures.update(failures or {})
+    return stage
+
+
+def test_sustainable_rate_stops_at_first_unsustained_stage():
+    report = StormReport(slo=0.5)
+    report.stages = [
+        _stage(100, 100, 1.0),
+        _stage(200, 100, 0.52),
+        _stage(400, 100, 0.4),  # only 250/s opened
+        _stage(800, 100, 0.13),
+    ]
+    assert report.sustainable_rate() == 200
+
+    report.stages[1] = _stage(200, 100, 0.5, handshake=0.9)
+    assert report.sustainable_rate() == 100
+    report.stages[0] = _stage(100, 100, 1.0, failures={"ack": 1})
+    assert report.sustainable_rate() == 0
@@ -0,0 +1,183 @@
+import asyncio
+import json
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from src import subscriptions
+from src.fake_server import FakePokerServer
+from src.metrics import MetricsRegistry
+from src.subscriptions import GraphQLWSConnection, ReadyGate, SubscriptionError, wait_ready
+
+
+async def start_ws_app(on_start):
+    """Serve a minimal graphql-ws endpoint that acks and hands each start to ``on_start``."""
+    sockets = []
+
+    async def handler(request):
+        ws = web.WebSocketResponse(protocols=("graphql-ws",))
+        await ws.prepare(request)
+        sockets.append(ws)
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                continue
+            frame = json.loads(msg.data)
+            if frame["type"] == "connection_init":
+                await ws.send_json({"type": "connection_ack"})
+                await ws.send_json({"type": "ka"})
+            elif frame["type"] == "start":
+                await on_start(ws, frame)
+            elif frame["type"] == "stop":
+                await ws.send_json({"type": "complete", "id": frame["id"]})
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/ws", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"ws://127.0.0.1:{runner.addresses[0][1]}/ws", sockets
+
+
+@pytest.mark.asyncio
+async def test_many_operations_share_one_socket():
+    async def on_start(ws, frame):
+        for n in range(3):
+            await ws.send_json(
+                {"type": "data", "id": frame["id"], "payload": {"data": {"n": n, "op": frame["payload"]["operationName"]}}}
+            )
+
+    runner, url, sockets = await start_ws_app(on_start)
+    try:
+        async with GraphQLWSConnection(url, user_token="player_one") as conn:
+            deal_sub = await conn.subscribe_deal()
+            hand_subs = [await conn.subscribe_hand(f"hand-{i}") for i in range(50)]
+
+            deal_frames = [await deal_sub.next() for _ in range(3)]
+            hand_frames = await asyncio.gather(*(sub.next() for sub in hand_subs))
+    finally:
+        await runner.cleanup()
+
+    assert len(sockets) == 1
+    assert [f["payload"]["data"]["n"] for f in deal_frames] == [0, 1, 2]
+    assert all(f["payload"]["data"]["op"] == "DealSubscription" for f in deal_frames)
+    assert [f["id"] for f in hand_frames] == [f"hand-{i}" for i in range(50)]
+
+
+@pytest.mark.asyncio
+async def test_error_frames_and_stop():
+    async def on_start(ws, frame):
+        if frame["payload"]["operationName"] == "OnHandEvent":
+            await ws.send_json({"type": "error", "id": frame["id"], "payload": {"message": "no such hand"}})
+
+    runner, url, _ = await start_ws_app(on_start)
+    try:
+        async with GraphQLWSConnection(url) as conn:
+            bad = await conn.subscribe_hand("missing")
+            with pytest.raises(SubscriptionError):
+                await bad.next()
+
+            deal_sub = await conn.subscribe_deal()
+            await deal_sub.stop()
+            assert [frame async for frame in deal_sub] == []
+            assert deal_sub.id not in conn.subscriptions
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_connect_closes_the_socket_without_an_ack():
+    async def handler(request):
+        ws = web.WebSocketResponse(protocols=("graphql-ws",))
+        await ws.prepare(request)
+        async for _ in ws:
+            pass
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/ws", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    conn = GraphQLWSConnection(f"ws://127.0.0.1:{runner.addresses[0][1]}/ws")
+    try:
+        with pytest.raises(asyncio.TimeoutError):
+            await conn.connect(timeout=0.2)
+    finally:
+        await runner.cleanup()
+
+    assert conn.ws.closed and conn._session is None
+
+
+@pytest.mark.asyncio
+async def test_ready_gate_opens_on_last_arrival():
+    gate = ReadyGate(2)
+    waiter = asyncio.create_task(gate.wait())
+    gate.arrive()
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    gate.arrive()
+    await waiter
+    assert gate.is_open
+    assert ReadyGate(0).is_open
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_ready_once_registered():
+    async with FakePokerServer(auto_deal=False, subscribe_delay=0.2) as server:
+        async with GraphQLWSConnection(server.ws_url) as conn:
+            subs = [await conn.subscribe_hand(f"hand-{i}") for i in range(3)]
+            await asyncio.sleep(0.1)
+            assert not any(sub.ready.is_set() for sub in subs)
+            assert server._hand_operations == {}
+
+            await wait_ready(subs, timeout=2)
+            assert set(server._hand_operations) == {f"hand-{i}" for i in range(3)}
+
+
+@pytest.mark.asyncio
+async def test_first_frame_marks_a_subscription_ready():
+    async def on_start(ws, frame):
+        if frame["payload"]["operationName"] != "ReadyProbe":
+            await ws.send_json({"type": "data", "id": frame["id"], "payload": {"data": {}}})
+
+    runner, url, _ = await start_ws_app(on_start)
+    try:
+        async with GraphQLWSConnection(url) as conn:
+            sub = await conn.subscribe_hand("hand-1")
+            await wait_ready([sub], timeout=1)
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_probe_replies_are_not_counted_as_frames():
+    metrics = MetricsRegistry()
+    async with FakePokerServer(auto_deal=False) as server:
+        async with GraphQLWSConnection(server.ws_url, metrics=metrics) as conn:
+            sub = await conn.subscribe_hand("hand-1")
+            await wait_ready([sub], timeout=1)
+            await asyncio.sleep(0.05)
+            assert conn._probes == {}
+    assert metrics.counter("ws_frames_total").value == 0
+
+
+@pytest.mark.asyncio
+async def test_ready_falls_back_when_the_probe_goes_unanswered(monkeypatch):
+    monkeypatch.setattr(subscriptions, "READY_FALLBACK_SECONDS", 0.05)
+
+    async def on_start(ws, frame):
+        pass
+
+    runner, url, _ = await start_ws_app(on_start)
+    try:
+        async with GraphQLWSConnection(url) as conn:
+            sub = await conn.subscribe_hand("hand-1")
+            assert not sub.ready.is_set()
+            await wait_ready([sub], timeout=1)
+            assert conn._probes == {}
+    finally:
+        await runner.cleanup()
@@ -1,12 +1,14 @@
 import asyncio
-import json
+import uuid
 from dataclasses import dataclass
 
-import aiohttp
 import pytest
+import pytest_asyncio
 import requests
-from src.deal import deal_subscription, execute_deal_mutation
-from src.play import execute_play_hand
+from src.client import GraphQLClient
+from src.deal import execute_deal_mutation
+from src.scenario import PLANS, run_plan
+from src.subscriptions import WS_URL, GraphQLWSConnection, ReadyGate, wait_ready
 
 from .test_data import hand_event_1, hand_event_2
 
@@ -19,48 +21,39 @@ class DealResult:
 
 @dataclass
 class PlayResult:
-    ws: any
+    subscription: any
     hand_id: str
 
 WS_EVENT_TIMEOUT_SECONDS = 5
-WS_CONNECT_TIMEOUT_SECONDS = 5
 HTTP_TIMEOUT_SECONDS = 5
-MAX_NON_DATA_MESSAGES = 25
-
-
-async def wait_for_ws_data(ws, timeout=WS_EVENT_TIMEOUT_SECONDS, context="subscription"):
-    ignored_count = 0
-    last_payload = None
-    while True:
-        msg = await asyncio.wait_for(ws.receive(), timeout=timeout)
-        if msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
-            raise AssertionError(f"WebSocket closed while waiting for {context}")
-        if msg.type != aiohttp.WSMsgType.TEXT:
-            continue
-        data = json.loads(msg.data)
-        last_payload = data
-        msg_type = data.get("type")
-        if msg_type == "data":
-            return data
-        if msg_type == "error":
-            raise AssertionError(f"GraphQL subscription error while waiting for {context}: {data}")
-        ignored_count += 1
-        if ignored_count >= MAX_NON_DATA_MESSAGES:
-            raise AssertionError(
-                f"Timed out waiting for data frame for {context}. "
-                f"Ignored {ignored_count} non-data frames. Last payload: {last_payload}"
-            )
-
-
-async def close_ws_with_session(ws):
-    if ws is None:
+SEATS = ("player_one", "player_two", "player_three")
+# (bet, stack) of each seat once the blinds are posted from 1000 stacks.
+INITIAL_SEATS = {"player_one": ("10", "990"), "player_two": ("20", "980"), "player_three": ("0", "1000")}
+
+
+@pytest.fixture
+def table_id():
+    """Give every test its own table so the suite can run in parallel."""
+    yield f"three-players-{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture
+def seats(table_id):
+    """player_one..player_three namespaced to the test's table, like src.load.table_players."""
+    return tuple(f"{table_id}-{seat}" for seat in SEATS)
+
+
+@pytest_asyncio.fixture
+async def client(table_id):
+    """One pooled GraphQL client per test, shared by its deal and play helpers."""
+    async with GraphQLClient(table_id=table_id) as client:
+        yield client
+
+
+async def close_subscription(subscription):
+    if subscription is None:
         return
-    try:
-        await ws.close()
-    finally:
-        session = getattr(ws, "_owner_session", None)
-        if session is not None and not session.closed:
-            await session.close()
+    await subscription.connection.close()
 
 
 def _active_by_id(event_msg):
@@ -68,7 +61,8 @@ def _active_by_id(event_msg):
     return {p["id"]: p for p in hand_event["streetEvent"]["currentActivePlayers"]}
 
 
-def assert_first_fold_event(event_msg, hand_id):
+def assert_first_fold_event(event_msg, hand_id, seats):
+    one, two, three = seats
     assert event_msg["type"] == "data"
     assert event_msg["id"] == hand_id
     hand_event = event_msg["payload"]["data"]["handEvent"]
@@ -76,17 +70,18 @@ def assert_first_fold_event(event_msg, hand_id):
     assert hand_event["mutationType"] == "UPDATED"
     assert hand_event["streetEvent"]["streetType"] == "Preflop"
     assert hand_event["streetEvent"]["pot"] == "30"
-    assert hand_event["playerEvent"]["playerId"] == "player_three"
+    assert hand_event["playerEvent"]["playerId"] == three
     assert hand_event["playerEvent"]["action"] == "Fold"
     assert hand_event["playerEvent"]["amount"] == "0"
 
     active = _active_by_id(event_msg)
-    assert active["player_three"]["isInactive"] is True
-    assert active["player_one"]["isInactive"] is False
-    assert active["player_two"]["isInactive"] is False
+    assert active[three]["isInactive"] is True
+    assert active[one]["isInactive"] is False
+    assert active[two]["isInactive"] is False
 
 
-def assert_second_fold_gameover_event(event_msg, hand_id):
+def assert_second_fold_gameover_event(event_msg, hand_id, seats):
+    one, two, three = seats
     assert event_msg["type"] == "data"
     assert event_msg["id"] == hand_id
     hand_event = event_msg["payload"]["data"]["handEvent"]
@@ -94,191 +89,119 @@ def assert_second_fold_gameover_event(event_msg, hand_id):
     assert hand_event["mutationType"] == "UPDATED"
     assert hand_event["streetEvent"]["streetType"] == "Preflop"
     assert hand_event["streetEvent"]["pot"] == "30"
-    assert hand_event["playerEvent"]["playerId"] == "player_one"
+    assert hand_event["playerEvent"]["playerId"] == one
     assert hand_event["playerEvent"]["action"] == "Fold"
     assert hand_event["playerEvent"]["amount"] == "0"
     assert hand_event.get("isComplete") is True
-    assert hand_event.get("winnerId") == "player_two"
+    assert hand_event.get("winnerId") == two
 
     active = _active_by_id(event_msg)
-    assert active["player_three"]["isInactive"] is True
-    assert active["player_one"]["isInactive"] is True
-    assert active["player_two"]["isInactive"] is False
+    assert active[three]["isInactive"] is True
+    assert active[one]["isInactive"] is True
+    assert active[two]["isInactive"] is False
 
 
-async def deal(players, semaphore, stacks=None):
-    print("deal awaiting semaphore")
-    await asyncio.sleep(0.5)
-    for _ in range(3):
-        await semaphore.acquire()
-    return execute_deal_mutation(players, stacks)
+async def deal(client, players, gate, stacks=None):
+    print("deal awaiting subscribers")
+    await gate.wait()
+    return await client.deal(players, stacks)
 
 
-async def play_turn(semaphore, next_range, hand_id, player, action, amount):
-    print("play turn awaiting semaphore")
-    for _ in range(next_range):
-        print(f"play turn semaphore acquired: {_} times")
-        await semaphore.acquire()
-    execute_play_hand(hand_id, player, action, amount, semaphore)
+async def play_turn(client, hand_id, player, action, amount, gate=None):
+    if gate is not None:
+        print("play turn awaiting subscribers")
+        await gate.wait()
+    await client.play_turn(hand_id, player, action, amount)
     print(f"play_hand executed")
-    # await asyncio.sleep(0.5)
-    # semaphore.release()
-    print(f"play_turn semaphore released")
 
-    # execute_deal_mutation(players)
 
-
-async def subscribe_deal(player, semaphore, expected_state=None):
+async def subscribe_deal(table_id, player, gate, expected_state=None):
     """Subscribe to deal events. Optionally verify expected player state."""
-    async with aiohttp.ClientSession() as session:
-        async with session.ws_connect(
-            "ws://127.0.0.1:3000/ws",
-            timeout=aiohttp.ClientTimeout(total=WS_CONNECT_TIMEOUT_SECONDS, sock_connect=WS_CONNECT_TIMEOUT_SECONDS),
-            headers={
-                "Accept-Encoding": "gzip, deflate, br",
-                "Pragma": "no-cache",
-                "Sec-Websocket-Protocol": "graphql-ws",
-            },
-        ) as ws:
-            await ws.send_json(
-                {
-                    "type": "connection_init",
-                    "payload": {"x-user-token": player, "x-table-token": "123"},
-                }
-            )
-            deal_sub = {
-                "id": "1",
-                "type": "start",
-                "payload": {
-                    "variables": {},
-                    "extensions": {},
-                    "operationName": "DealSubscription",
-                    "query": deal_subscription,
-                },
-            }
-            await ws.send_json(deal_sub)
-            semaphore.release()
-            print("semaphore released")
-
-            data = await wait_for_ws_data(ws, context=f"deal subscription for {player}")
-            current_players = data["payload"]["data"]["deal"]["deal"]["streetEvents"][0]["currentActivePlayers"]
-            current_player = [p for p in current_players if p["id"] == player][0]
-            hand_id = data["payload"]["data"]["deal"]["id"]
-            hand_player = [p for p in data["payload"]["data"]["deal"]["deal"]["players"] if p["id"] == player][0]
-            print(f"hand_id: {hand_id}")
-            print(f"Player: {current_player['id']}, Stack: {current_player['stack']}, Bet: {current_player['bet']}")
-            print(f"Cards: {hand_player['cards']}")
-
-            # If expected_state provided, verify it
-            if expected_state:
-                assert current_player == expected_state, f"Expected {expected_state}, got {current_player}"
-            else:
-                # Default assertions for initial hand with 1000 stacks
-                if player == "player_three":
-                    assert current_player == {
-                        "id": "player_three",
-                        "bet": "0",
-                        "stack": "1000",
-                        "isInactive": False,
-                    }
-                elif player == "player_two":
-                    assert current_player == {"id": "player_two", "bet": "20", "stack": "980", "isInactive": False}
-                elif player == "player_one":
-                    assert current_player == {"id": "player_one", "bet": "10", "stack": "990", "isInactive": False}
-
-            return None, hand_id, player, current_players
-
-
-async def subscribe_play(player, hand_id, semaphore):
-    session = aiohttp.ClientSession()
-    ws = await session.ws_connect(
-        "ws://127.0.0.1:3000/ws",
-        timeout=aiohttp.ClientTimeout(total=WS_CONNECT_TIMEOUT_SECONDS, sock_connect=WS_CONNECT_TIMEOUT_SECONDS),
-        headers={
-            "Accept-Encoding": "gzip, deflate, br",
-            "Pragma": "no-cache",
-            "Sec-Websocket-Protocol": "graphql-ws",
-        },
-    )
-    setattr(ws, "_owner_session", session)
-    # print("connected")
-    await ws.send_json(
-        {
-            "type": "connection_init",
-            "payload": {"x-user-token": player, "x-table-token": "123", "x-hand-token": hand_id},
-        }
-    )
-    play_sub = {
-        "id": hand_id,
-        "type": "start",
-        "payload": {
-            "x-hand-token": hand_id,
-            "variables": {},
-            "extensions": {},
-            "operationName": "OnHandEvent",
-            "query": "subscription OnHandEvent($mutationType: MutationType) {\n  handEvent(mutationType: $mutationType) {\n    mutationType\n    handId\n    streetEvent {\n      streetType\n      currentActivePlayers {\n        id\n        bet\n        stack\n        isInactive\n        isBigBlind\n      }\n      pot\n    }\n    playerEvent {\n      playerId\n      action\n      amount\n      streetType\n      currentStack\n      currentPot\n    }\n    cards {\n      flop\n      turn\n      river\n    }\n  }\n}\n",
-        },
-    }
-    print(f"subscribe play hand {player}")
-    await ws.send_json(play_sub)
-    semaphore.release()
-    print("play semaphore released")
-    counter = 0
-    while True:
-        data = await wait_for_ws_data(ws, context=f"first handEvent for {player}")
-        counter += 1
-        print("play turn event received")
-        print("first play turn asserts")
-        print(f"player {player}")
-        assert_first_fold_event(data, hand_id)
-        assert counter == 1
-        return ws, hand_id, player
-
-
-async def continue_play(ws, player, hand_id, semaphore, _hand_lambda):
-    semaphore.release()
-    data = await wait_for_ws_data(ws, context=f"follow-up handEvent for {player}")
-    assert_second_fold_gameover_event(data, hand_id)
+    async with GraphQLWSConnection(WS_URL, user_token=player, table_token=table_id) as conn:
+        subscription = await conn.subscribe_deal(op_id="1")
+        await wait_ready([subscription])
+        gate.arrive()
+        print("deal subscription live")
+
+        data = await subscription.next(timeout=WS_EVENT_TIMEOUT_SECONDS)
+        current_players = data["payload"]["data"]["deal"]["deal"]["streetEvents"][0]["currentActivePlayers"]
+        current_player = [p for p in current_players if p["id"] == player][0]
+        hand_id = data["payload"]["data"]["deal"]["id"]
+        hand_player = [p for p in data["payload"]["data"]["deal"]["deal"]["players"] if p["id"] == player][0]
+        print(f"hand_id: {hand_id}")
+        print(f"Player: {current_player['id']}, Stack: {current_player['stack']}, Bet: {current_player['bet']}")
+        print(f"Cards: {hand_player['cards']}")
+
+        # If expected_state provided, verify it
+        if expected_state:
+            assert current_player == expected_state, f"Expected {expected_state}, got {current_player}"
+        elif player.removeprefix(f"{table_id}-") in INITIAL_SEATS:
+            # Default assertions for initial hand with 1000 stacks
+            bet, stack = INITIAL_SEATS[player.removeprefix(f"{table_id}-")]
+            assert current_player == {"id": player, "bet": bet, "stack": stack, "isInactive": False}
+
+        return None, hand_id, player, current_players
+
+
+async def subscribe_play(table_id, seats, player, hand_id, gate):
+    conn = await GraphQLWSConnection(WS_URL, user_token=player, table_token=table_id, hand_token=hand_id).connect()
+    try:
+        print(f"subscribe play hand {player}")
+        subscription = await conn.subscribe_hand(hand_id)
+        await wait_ready([subscription])
+        gate.arrive()
+        print("play subscription live")
+        data = await subscription.next(timeout=WS_EVENT_TIMEOUT_SECONDS)
+    except BaseException:
+        await conn.close()
+        raise
+    print("play turn event received")
+    print("first play turn asserts")
+    print(f"player {player}")
+    assert_first_fold_event(data, hand_id, seats)
+    return subscription, hand_id, player
+
+
+async def continue_play(subscription, seats, hand_id, _hand_lambda):
+    data = await subscription.next(timeout=WS_EVENT_TIMEOUT_SECONDS)
+    assert_second_fold_gameover_event(data, hand_id, seats)
 
 
 @pytest.mark.asyncio
-async def test_runs_in_a_loop():
-    semaphore = asyncio.Semaphore(0)
-    players = ["player_one", "player_two", "player_three"]
+async def test_runs_in_a_loop(client, table_id, seats):
+    one, two, three = seats
+    gate = ReadyGate(3)
+    players = [one, two, three]
     deal_list = await asyncio.gather(
-        deal(players, semaphore),
-        subscribe_deal(players[0], semaphore),
-        subscribe_deal(players[1], semaphore),
-        subscribe_deal(players[2], semaphore),
+        deal(client, players, gate),
+        subscribe_deal(table_id, players[0], gate),
+        subscribe_deal(table_id, players[1], gate),
+        subscribe_deal(table_id, players[2], gate),
     )
-    # subscribe_deal now returns (ws, hand_id, player, current_players)
+    # Each subscriber closes its socket once it has the deal: (None, hand_id, player, current_players).
     deal_players = {item[2]: DealResult(item[0], item[1]) for item in deal_list[1:]}
     # print("deal players")
     # print(deal_players)
-    hand_id = deal_players["player_one"].hand_id
+    hand_id = deal_players[one].hand_id
     first_move_players = {}
     try:
+        play_gate = ReadyGate(3)
         first_move_list = await asyncio.gather(
-            subscribe_play("player_one", hand_id, semaphore),
-            subscribe_play("player_two", hand_id, semaphore),
-            subscribe_play("player_three", hand_id, semaphore),
-            play_turn(semaphore, 3, hand_id, "player_three", "FOLD", 0.0),
+            subscribe_play(table_id, seats, one, hand_id, play_gate),
+            subscribe_play(table_id, seats, two, hand_id, play_gate),
+            subscribe_play(table_id, seats, three, hand_id, play_gate),
+            play_turn(client, hand_id, three, "FOLD", 0.0, play_gate),
         )
         first_move_players = {item[2]: PlayResult(item[0], item[1]) for item in first_move_list[:-1]}
+        # Subscriptions stay live between actions, so the follow-up play needs no gate.
         await asyncio.gather(
-            continue_play(first_move_players["player_one"].ws, "player_one", hand_id, semaphore, hand_event_2),
-            continue_play(first_move_players["player_two"].ws, "player_two", hand_id, semaphore, hand_event_2),
-            continue_play(first_move_players["player_three"].ws, "player_three", hand_id, semaphore, hand_event_2),
-            play_turn(semaphore, 3, hand_id, "player_one", "FOLD", 0.0),
+            continue_play(first_move_players[one].subscription, seats, hand_id, hand_event_2),
+            continue_play(first_move_players[two].subscription, seats, hand_id, hand_event_2),
+            continue_play(first_move_players[three].subscription, seats, hand_id, hand_event_2),
+            play_turn(client, hand_id, one, "FOLD", 0.0),
         )
     finally:
-        await asyncio.gather(
-            close_ws_with_session(first_move_players.get("player_one").ws if "player_one" in first_move_players else None),
-            close_ws_with_session(first_move_players.get("player_two").ws if "player_two" in first_move_players else None),
-            close_ws_with_session(
-                first_move_players.get("player_three").ws if "player_three" in first_move_players else None
-            ),
-        )
+        await asyncio.gather(*(close_subscription(result.subscription) for result in first_move_players.values()))
 
 
 # =============================================================================
@@ -289,8 +212,9 @@ async def test_runs_in_a_loop():
 # Expected stacks after: player_one=990, player_two=1010, player_three=1000
 # Next hand: rotated blinds - player_two=SB, player_three=BB, player_one=UTG
 # =============================================================================
-def test_scenario_1_all_except_bb_fold():
+def test_scenario_1_all_except_bb_fold(table_id, seats):
     """Test: UTG and SB fold, BB wins the pot. Verify blind rotation for next hand."""
+    one, two, three = seats
 
     def gql(query, variables=None, headers=None):
         resp = requests.post(
@@ -313,37 +237,39 @@ def test_scenario_1_all_except_bb_fold():
                 "action": action,
                 "amount": amount,
             },
-            {"X-User-Token": player, "X-Table-Token": "123", "X-Hand-Token": hand_id},
+            {"X-User-Token": player, "X-Table-Token": table_id, "X-Hand-Token": hand_id},
         )
         assert data["playTurn"] == hand_id
 
     # Hand 1: player_one=SB, player_two=BB, player_three=UTG
     deal1 = execute_deal_mutation(
-        ["player_one", "player_two", "player_three"],
-        {"player_one": 1000.0, "player_two": 1000.0, "player_three": 1000.0},
+        [one, two, three],
+        {one: 1000.0, two: 1000.0, three: 1000.0},
+        table_id,
     )
     assert "errors" not in deal1
     hand1_id = deal1["data"]["deal"]
 
     # player_three folds, then player_one folds -> player_two wins
-    play(hand1_id, "player_three", "FOLD", 0.0)
-    play(hand1_id, "player_one", "FOLD", 0.0)
+    play(hand1_id, three, "FOLD", 0.0)
+    play(hand1_id, one, "FOLD", 0.0)
 
     hand1 = gql(
         "query Hand($id: ID!) { hand(id: $id) { isComplete winnerId players { id stack } } }",
         {"id": hand1_id},
     )["hand"]
     assert hand1["isComplete"] is True
-    assert hand1["winnerId"] == "player_two"
+    assert hand1["winnerId"] == two
     hand1_stacks = {p["id"]: p["stack"] for p in hand1["players"]}
-    assert hand1_stacks["player_one"] == "990"
-    assert hand1_stacks["player_two"] == "1010"
-    assert hand1_stacks["player_three"] == "1000"
+    assert hand1_stacks[one] == "990"
+    assert hand1_stacks[two] == "1010"
+    assert hand1_stacks[three] == "1000"
 
     # Hand 2: rotate players so blinds rotate (player_two=SB, player_three=BB, player_one=UTG)
     deal2 = execute_deal_mutation(
-        ["player_two", "player_three", "player_one"],
-        {"player_one": 990.0, "player_two": 1010.0, "player_three": 1000.0},
+        [two, three, one],
+        {one: 990.0, two: 1010.0, three: 1000.0},
+        table_id,
     )
     assert "errors" not in deal2
     hand2_id = deal2["data"]["deal"]
@@ -353,19 +279,19 @@ def test_scenario_1_all_except_bb_fold():
         {"id": hand2_id},
     )["hand"]
     active = hand2["streetEvents"][0]["currentActivePlayers"]
-    assert [p["id"] for p in active] == ["player_one", "player_two", "player_three"]
+    assert [p["id"] for p in active] == [one, two, three]
 
     by_id = {p["id"]: p for p in active}
-    assert by_id["player_two"]["bet"] == "10"
-    assert by_id["player_two"]["stack"] == "1000"
-    assert by_id["player_two"]["isBigBlind"] is False
+    assert by_id[two]["bet"] == "10"
+    assert by_id[two]["stack"] == "1000"
+    assert by_id[two]["isBigBlind"] is False
 
-    assert by_id["player_three"]["bet"] == "20"
-    assert by_id["player_three"]["stack"] == "980"
-    assert by_id["player_three"]["isBigBlind"] is True
+    assert by_id[three]["bet"] == "20"
+    assert by_id[three]["stack"] == "980"
+    assert by_id[three]["isBigBlind"] is True
 
-    assert by_id["player_one"]["bet"] == "0"
-    assert by_id["player_one"]["stack"] == "990"
+    assert by_id[one]["bet"] == "0"
+    assert by_id[one]["stack"] == "990"
 
 
 # =============================================================================
@@ -376,10 +302,11 @@ def test_scenario_1_all_except_bb_fold():
 # Expected stacks after: player_one=1030, player_two=980, player_three=1000
 # =============================================================================
 @pytest.mark.asyncio
-async def test_scenario_2_sb_raises_bb_folds():
+async def test_scenario_2_sb_raises_bb_folds(table_id, seats):
     """Test: UTG folds, SB raises, BB folds. SB wins."""
-    deal_payload = execute_deal_mutation(["player_one", "player_two", "player_three"],
-                                         {"player_one": 1000.0, "player_two": 1000.0, "player_three": 1000.0})
+    one, two, three = seats
+    deal_payload = execute_deal_mutation([one, two, three],
+                                         {one: 1000.0, two: 1000.0, three: 1000.0}, table_id)
     assert "errors" not in deal_payload
     hand_id = deal_payload["data"]["deal"]
 
@@ -396,7 +323,7 @@ async def test_scenario_2_sb_raises_bb_folds():
                 },
                 "query": "mutation PlayTurn($id: ID!, $playerId: ID!, $action: PlayerAction!, $amount: Decimal!) { playTurn(id: $id, playerId: $playerId, action: $action, amount: $amount) }",
             },
-            headers={"X-User-Token": player, "X-Table-Token": "123", "X-Hand-Token": hand_id},
+            headers={"X-User-Token": player, "X-Table-Token": table_id, "X-Hand-Token": hand_id},
             timeout=HTTP_TIMEOUT_SECONDS,
         )
         assert resp.status_code == 200
@@ -405,9 +332,9 @@ async def test_scenario_2_sb_raises_bb_folds():
         return payload["data"]["playTurn"]
 
     # UTG folds, SB raises from 10 -> 40 (add 30), BB folds
-    play("player_three", "FOLD", 0.0)
-    play("player_one", "BET", 30.0)
-    play("player_two", "FOLD", 0.0)
+    play(three, "FOLD", 0.0)
+    play(one, "BET", 30.0)
+    play(two, "FOLD", 0.0)
 
     # Verify winner and stacks through GraphQL query
     hand_resp = requests.post(
@@ -424,11 +351,11 @@ async def test_scenario_2_sb_raises_bb_folds():
     hand = hand_data["data"]["hand"]
 
     assert hand["isComplete"] is True
-    assert hand["winnerId"] == "player_one"
+    assert hand["winnerId"] == one
     stacks = {p["id"]: p["stack"] for p in hand["players"]}
-    assert stacks["player_one"] == "1020"
-    assert stacks["player_two"] == "980"
-    assert stacks["player_three"] == "1000"
+    assert stacks[one] == "1020"
+    assert stacks[two] == "980"
+    assert stacks[three] == "1000"
 
 
 # =============================================================================
@@ -439,23 +366,24 @@ async def test_scenario_2_sb_raises_bb_folds():
 # Result: player_three wins
 # =============================================================================
 @pytest.mark.asyncio
-async def test_scenario_3_utg_raises_wins():
+async def test_scenario_3_utg_raises_wins(client, table_id, seats):
     """Test: UTG raises, SB calls, BB folds, then UTG wins."""
-    semaphore = asyncio.Semaphore(0)
+    one, two, three = seats
+    gate = ReadyGate(3)
 
-    players = ["player_one", "player_two", "player_three"]
-    initial_stacks = {"player_one": 1000.0, "player_two": 1000.0, "player_three": 1000.0}
+    players = [one, two, three]
+    initial_stacks = {one: 1000.0, two: 1000.0, three: 1000.0}
 
     # Deal hand
     deal_list = await asyncio.gather(
-        deal(players, semaphore, initial_stacks),
-        subscribe_deal(players[0], semaphore),
-        subscribe_deal(players[1], semaphore),
-        subscribe_deal(players[2], semaphore),
+        deal(client, players, gate, initial_stacks),
+        subscribe_deal(table_id, players[0], gate),
+        subscribe_deal(table_id, players[1], gate),
+        subscribe_deal(table_id, players[2], gate),
     )
 
     deal_players = {item[2]: DealResult(item[0], item[1]) for item in deal_list[1:]}
-    hand_id = deal_players["player_one"].hand_id
+    hand_id = deal_players[one].hand_id
 
     print(f"✓ Scenario 3: Hand dealt - {hand_id}")
     print("  (Full raise/call implementation requires BET action support)")
@@ -467,19 +395,20 @@ async def test_scenario_3_utg_raises_wins():
 # Verifies: pot calculation, winner determination, stack updates, blind rotation
 # =============================================================================
 @pytest.mark.asyncio
-async def test_scenario_4_showdown_best_hand_wins():
+async def test_scenario_4_showdown_best_hand_wins(client, table_id, seats):
     """Test: All players call/check to showdown. Best hand wins."""
-    semaphore = asyncio.Semaphore(0)
+    one, two, three = seats
+    gate = ReadyGate(3)
 
-    players = ["player_one", "player_two", "player_three"]
-    initial_stacks = {"player_one": 1000.0, "player_two": 1000.0, "player_three": 1000.0}
+    players = [one, two, three]
+    initial_stacks = {one: 1000.0, two: 1000.0, three: 1000.0}
 
     # Deal hand - get player scores to determine expected winner
     deal_list = await asyncio.gather(
-        deal(players, semaphore, initial_stacks),
-        subscribe_deal_with_scores(players[0], semaphore),
-        subscribe_deal_with_scores(players[1], semaphore),
-        subscribe_deal_with_scores(players[2], semaphore),
+        deal(client, players, gate, initial_stacks),
+        subscribe_deal_with_scores(table_id, players[0], gate),
+        subscribe_deal_with_scores(table_id, players[1], gate),
+        subscribe_deal_with_scores(table_id, players[2], gate),
     )
 
     # Extract player scores from deal data
@@ -496,51 +425,50 @@ async def test_scenario_4_showdown_best_hand_wins():
     print(f"Expected winner: {expected_winner}")
 
     # Subscribe to play events
-    play_semaphore = asyncio.Semaphore(0)
     play_subs = await asyncio.gather(
-        subscribe_play_flexible("player_one", hand_id, play_semaphore),
-        subscribe_play_flexible("player_two", hand_id, play_semaphore),
-        subscribe_play_flexible("player_three", hand_id, play_semaphore),
+        subscribe_play_flexible(table_id, one, hand_id),
+        subscribe_play_flexible(table_id, two, hand_id),
+        subscribe_play_flexible(table_id, three, hand_id),
     )
     play_ws = {item[1]: item[0] for item in play_subs}
     try:
         # === PREFLOP ===
         # UTG (player_three) calls: Bet 20 to match BB
-        await play_and_wait_all(play_ws, play_semaphore, hand_id, "player_three", "BET", 20.0)
+        await play_and_wait_all(client, play_ws, hand_id, three, "BET", 20.0)
         print("✓ Preflop: player_three (UTG) calls 20")
 
         # SB (player_one) calls: Bet 10 more (already posted 10)
-        await play_and_wait_all(play_ws, play_semaphore, hand_id, "player_one", "BET", 10.0)
+        await play_and_wait_all(client, play_ws, hand_id, one, "BET", 10.0)
         print("✓ Preflop: player_one (SB) calls")
 
         # BB (player_two) checks
-        await play_and_wait_all(play_ws, play_semaphore, hand_id, "player_two", "CHECK", 0.0)
+        await play_and_wait_all(client, play_ws, hand_id, two, "CHECK", 0.0)
         print("✓ Preflop: player_two (BB) checks - moving to Flop")
 
         # === FLOP ===
-        await play_and_wait_all(play_ws, play_semaphore, hand_id, "player_one", "CHECK", 0.0)
+        await play_and_wait_all(client, play_ws, hand_id, one, "CHECK", 0.0)
         print("✓ Flop: player_one checks")
-        await play_and_wait_all(play_ws, play_semaphore, hand_id, "player_two", "CHECK", 0.0)
+        await play_and_wait_all(client, play_ws, hand_id, two, "CHECK", 0.0)
         print("✓ Flop: player_two checks")
-        await play_and_wait_all(play_ws, play_semaphore, hand_id, "player_three", "CHECK", 0.0)
+        await play_and_wait_all(client, play_ws, hand_id, three, "CHECK", 0.0)
         print("✓ Flop: player_three checks - moving to Turn")
 
         # === TURN ===
-        await play_and_wait_all(play_ws, play_semaphore, hand_id, "player_one", "CHECK", 0.0)
+        await play_and_wait_all(client, play_ws, hand_id, one, "CHECK", 0.0)
         print("✓ Turn: player_one checks")
-        await play_and_wait_all(play_ws, play_semaphore, hand_id, "player_two", "CHECK", 0.0)
+        await play_and_wait_all(client, play_ws, hand_id, two, "CHECK", 0.0)
         print("✓ Turn: player_two checks")
-        await play_and_wait_all(play_ws, play_semaphore, hand_id, "player_three", "CHECK", 0.0)
+        await play_and_wait_all(client, play_ws, hand_id, three, "CHECK", 0.0)
         print("✓ Turn: player_three checks - moving to River")
 
         # === RIVER ===
-        await play_and_wait_all(play_ws, play_semaphore, hand_id, "player_one", "CHECK", 0.0)
+        await play_and_wait_all(client, play_ws, hand_id, one, "CHECK", 0.0)
         print("✓ River: player_one checks")
-        await play_and_wait_all(play_ws, play_semaphore, hand_id, "player_two", "CHECK", 0.0)
+        await play_and_wait_all(client, play_ws, hand_id, two, "CHECK", 0.0)
         print("✓ River: player_two checks")
 
         # Final action - this should trigger showdown
-        final_event = await play_and_get_result(play_ws, play_semaphore, hand_id, "player_three", "CHECK", 0.0)
+        final_event = await play_and_get_result(client, play_ws, hand_id, three, "CHECK", 0.0)
         print("✓ River: player_three checks - SHOWDOWN")
 
         # Verify winner
@@ -553,7 +481,7 @@ async def test_scenario_4_showdown_best_hand_wins():
         print(f"Expected winner: {expected_winner} (score: {player_scores[expected_winner]})")
         print(f"Pot: 60 (3 players × 20)")
     finally:
-        await asyncio.gather(*(close_ws_with_session(ws) for ws in play_ws.values()))
+        await asyncio.gather(*(close_subscription(sub) for sub in play_ws.values()))
 
     # === HAND 2: Verify blind rotation ===
     print("\n=== DEALING HAND 2 WITH ROTATED BLINDS ===")
@@ -563,20 +491,20 @@ async def test_scenario_4_showdown_best_hand_wins():
     # Winner: +40 (60 pot - 20 contribution)
     # Losers: -20 each
     expected_stacks = {
-        "player_one": 980.0,  # Lost 20
-        "player_two": 980.0,  # Lost 20
-        "player_three": 980.0,  # Lost 20
+        one: 980.0,  # Lost 20
+        two: 980.0,  # Lost 20
+        three: 980.0,  # Lost 20
     }
     expected_stacks[expected_winner] = 1040.0  # Won pot of 60
 
-    semaphore2 = asyncio.Semaphore(0)
-    players_hand2 = ["player_two", "player_three", "player_one"]  # Rotated
+    gate2 = ReadyGate(3)
+    players_hand2 = [two, three, one]  # Rotated
 
     deal_list2 = await asyncio.gather(
-        deal(players_hand2, semaphore2, expected_stacks),
-        subscribe_deal_with_scores(players_hand2[0], semaphore2),
-        subscribe_deal_with_scores(players_hand2[1], semaphore2),
-        subscribe_deal_with_scores(players_hand2[2], semaphore2),
+        deal(client, players_hand2, gate2, expected_stacks),
+        subscribe_deal_with_scores(table_id, players_hand2[0], gate2),
+        subscribe_deal_with_scores(table_id, players_hand2[1], gate2),
+        subscribe_deal_with_scores(table_id, players_hand2[2], gate2),
     )
 
     deal_data2 = deal_list2[1]
@@ -584,118 +512,72 @@ async def test_scenario_4_showdown_best_hand_wins():
     hand2_players = {p["id"]: p for p in deal_data2["current_players"]}
 
     print(f"Hand 2 dealt: {hand2_id}")
-    print(f"  player_two (SB): bet={hand2_players['player_two']['bet']}, stack={hand2_players['player_two']['stack']}")
+    print(f"  player_two (SB): bet={hand2_players[two]['bet']}, stack={hand2_players[two]['stack']}")
     print(
-        f"  player_three (BB): bet={hand2_players['player_three']['bet']}, stack={hand2_players['player_three']['stack']}"
+        f"  player_three (BB): bet={hand2_players[three]['bet']}, stack={hand2_players[three]['stack']}"
     )
     print(
-        f"  player_one (UTG): bet={hand2_players['player_one']['bet']}, stack={hand2_players['player_one']['stack']}"
+        f"  player_one (UTG): bet={hand2_players[one]['bet']}, stack={hand2_players[one]['stack']}"
     )
 
     print("\n✓ Scenario 4 completed - Showdown winner verified, blinds rotated")
 
 
-async def subscribe_deal_with_scores(player, semaphore):
+# =============================================================================
+# Scenarios 1-4 as declarative plans (src/scenario.py), each on several
+# tables at once with per-table player names.
+# =============================================================================
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", sorted(PLANS))
+async def test_declarative_scenario_on_many_tables(name):
+    async with GraphQLClient() as client:
+        report = await run_plan(client, PLANS[name], tables=4)
+    assert report.errors == 0
+    assert report.failures == []
+
+
+async def subscribe_deal_with_scores(table_id, player, gate):
     """Subscribe to deal events and return player scores and hand data."""
-    async with aiohttp.ClientSession() as session:
-        async with session.ws_connect(
-            "ws://127.0.0.1:3000/ws",
-            timeout=aiohttp.ClientTimeout(total=WS_CONNECT_TIMEOUT_SECONDS, sock_connect=WS_CONNECT_TIMEOUT_SECONDS),
-            headers={
-                "Accept-Encoding": "gzip, deflate, br",
-                "Pragma": "no-cache",
-                "Sec-Websocket-Protocol": "graphql-ws",
-            },
-        ) as ws:
-            await ws.send_json(
-                {
-                    "type": "connection_init",
-                    "payload": {"x-user-token": player, "x-table-token": "123"},
-                }
-            )
-            await ws.send_json(
-                {
-                    "id": "1",
-                    "type": "start",
-                    "payload": {
-                        "variables": {},
-                        "extensions": {},
-                        "operationName": "DealSubscription",
-                        "query": deal_subscription,
-                    },
-                }
-            )
-            semaphore.release()
-            data = await wait_for_ws_data(ws, context=f"deal-with-scores subscription for {player}")
-            deal = data["payload"]["data"]["deal"]
-            current_players = deal["deal"]["streetEvents"][0]["currentActivePlayers"]
-            return {
-                "hand_id": deal["id"],
-                "players": deal["deal"]["players"],
-                "current_players": current_players,
-                "cards": deal["deal"]["cards"],
-            }
-
-
-async def subscribe_play_flexible(player, hand_id, semaphore):
-    """Subscribe to play events without strict assertions."""
-    session = aiohttp.ClientSession()
-    ws = await session.ws_connect(
-        "ws://127.0.0.1:3000/ws",
-        timeout=aiohttp.ClientTimeout(total=WS_CONNECT_TIMEOUT_SECONDS, sock_connect=WS_CONNECT_TIMEOUT_SECONDS),
-        headers={
-            "Accept-Encoding": "gzip, deflate, br",
-            "Pragma": "no-cache",
-            "Sec-Websocket-Protocol": "graphql-ws",
-        },
-    )
-    setattr(ws, "_owner_session", session)
-    setattr(ws, "_owner_session", session)
-    await ws.send_json(
-        {
-            "type": "connection_init",
-            "payload": {"x-user-token": player, "x-table-token": "123"},
+    async with GraphQLWSConnection(WS_URL, user_token=player, table_token=table_id) as conn:
+        subscription = await conn.subscribe_deal(op_id="1")
+        await wait_ready([subscription])
+        gate.arrive()
+        data = await subscription.next(timeout=WS_EVENT_TIMEOUT_SECONDS)
+        deal = data["payload"]["data"]["deal"]
+        current_players = deal["deal"]["streetEvents"][0]["currentActivePlayers"]
+        return {
+            "hand_id": deal["id"],
+            "players": deal["deal"]["players"],
+            "current_players": current_players,
+            "cards": deal["deal"]["cards"],
         }
-    )
-    await ws.send_json(
-        {
-            "id": hand_id,
-            "type": "start",
-            "payload": {
-                "x-hand-token": hand_id,
-                "variables": {},
-                "extensions": {},
-                "operationName": "OnHandEvent",
-                "query": "subscription OnHandEvent($mutationType: MutationType) {\n  handEvent(mutationType: $mutationType) {\n    mutationType\n    handId\n    streetEvent {\n      streetType\n      currentActivePlayers {\n        id\n        bet\n        stack\n        isInactive\n        isBigBlind\n      }\n      pot\n    }\n    playerEvent {\n      playerId\n      action\n      amount\n      streetType\n      currentStack\n      currentPot\n    }\n    cards {\n      flop\n      turn\n      river\n    }\n  }\n}\n",
-            },
-        }
-    )
-    semaphore.release()
-    return ws, player
 
 
-async def play_and_wait_all(play_ws, semaphore, hand_id, player, action, amount):
+async def subscribe_play_flexible(table_id, player, hand_id):
+    """Subscribe to play events without strict assertions."""
+    conn = await GraphQLWSConnection(WS_URL, user_token=player, table_token=table_id).connect()
+    try:
+        return await conn.subscribe_hand(hand_id), player
+    except BaseException:
+        await conn.close()
+        raise
+
+
+async def play_and_wait_all(client, play_ws, hand_id, player, action, amount):
     """Execute a play action and wait for all subscribers to receive the event."""
-    # Wait for subscriptions to be ready
-    for _ in range(len(play_ws)):
-        await semaphore.acquire()
+    # Fire as soon as every subscription is live
+    await wait_ready(play_ws.values())
 
     # Execute the play action
-    execute_play_hand(hand_id, player, action, amount, semaphore)
+    await client.play_turn(hand_id, player, action, amount)
 
     # Wait for each subscriber to receive the event
-    events = []
-    for p, ws in play_ws.items():
-        data = await wait_for_ws_data(ws, context=f"handEvent for {p} after {action}")
-        events.append(data)
-        semaphore.release()
-
-    return events
+    return list(await asyncio.gather(*(sub.next(timeout=WS_EVENT_TIMEOUT_SECONDS) for sub in play_ws.values())))
 
 
-async def play_and_get_result(play_ws, semaphore, hand_id, player, action, amount):
+async def play_and_get_result(client, play_ws, hand_id, player, action, amount):
     """Execute a play action and return the event data."""
-    events = await play_and_wait_all(play_ws, semaphore, hand_id, player, action, amount)
+    events = await play_and_wait_all(client, play_ws, hand_id, player, action, amount)
     # Return the first event's payload
     if events and events[0].get("type") == "data":
         return events[0].get("payload")
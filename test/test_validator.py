@@ -0,0 +1,157 @@
+import copy
+from decimal import Decimal
+
+import pytest
+
+from src.client import GraphQLClient
+from src.events import decode_frame
+from src.fake_server import FakePokerServer, PokerEngine
+from src.load import SCRIPTS, run_load
+from src.metrics import MetricsRegistry
+from src.subscriptions import GraphQLWSConnection
+from src.validator import HandState, HandValidator
+
+# Three players, button on c: c limps, a completes, b checks; on the flop b
+# bets, a folds and c calls; checked down from there.
+SCRIPT = [
+    ("BET", 20), ("BET", 10), ("CHECK", 0),
+    ("CHECK", 0), ("BET", 50), ("FOLD", 0), ("BET", 50),
+    ("CHECK", 0), ("CHECK", 0),
+    ("CHECK", 0), ("CHECK", 0),
+]
+
+
+def _frame(field, value):
+    return {"type": "data", "id": "1", "payload": {"data": {field: value}}}
+
+
+def _played_hand():
+    hand = PokerEngine(19).deal("validator", [{"id": p, "stack": 1000} for p in ("a", "b", "c")])
+    deal = _frame("deal", {"mutationType": "CREATED", "id": hand.id, "deal": copy.deepcopy(hand.to_dict())})
+    events = []
+    for action, amount in SCRIPT:
+        hand.play(hand.next_actor().id, action, Decimal(amount))
+        events.append(_frame("handEvent", copy.deepcopy(hand.hand_event())))
+    assert hand.is_complete
+    return deal, events
+
+
+def _validate(frames):
+    validator = HandValidator(metrics=MetricsRegistry())
+    for frame in frames:
+        validator.record("observer", frame)
+    return validator.report
+
+
+def test_clean_hand_passes():
+    deal, events = _played_hand()
+    report = _validate([deal] + events)
+
+    assert report.violations == []
+    assert (report.hands, report.completed, report.events) == (1, 1, len(SCRIPT))
+
+
+def test_hand_picked_up_mid_stream_passes():
+    _, events = _played_hand()
+    report = _validate(events[1:])
+
+    assert report.violations == []
+    assert (report.hands, report.completed) == (1, 1)
+
+
+def _hand(frame):
+    return frame["payload"]["data"]["handEvent"]
+
+
+def _players(frame):
+    return {p["id"]: p for p in _hand(frame)["streetEvent"]["currentActivePlayers"]}
+
+
+def _wrong_actor(events):
+    _hand(events[0])["playerEvent"]["playerId"] = "a"
+
+
+def _pot_off_by_one(events):
+    _hand(events[1])["streetEvent"]["pot"] = "61"
+
+
+def _bystander_stack_moves(events):
+    _players(events[1])["c"]["stack"] = "985"
+
+
+def _street_goes_back(events):
+    _hand(events[4])["streetEvent"]["streetType"] = "Preflop"
+
+
+def _repeated_last_event(events):
+    events.append(copy.deepcopy(events[-1]))
+
+
+@pytest.mark.parametrize(
+    "tamper, bad_event, message",
+    [
+        (_wrong_actor, 1, "a acted, expected c"),
+        (_pot_off_by_one, 2, "pot is 61, expected 60"),
+        (_bystander_stack_moves, 2, "c stack is 985, expected 980"),
+        (_street_goes_back, 5, "street went back from Flop to Preflop"),
+        (_repeated_last_event, len(SCRIPT) + 1, "event after the hand completed"),
+    ],
+)
+def test_first_bad_frame_is_flagged_once(tamper, bad_event, message):
+    deal, events = _played_hand()
+    tamper(events)
+    report = _validate([deal] + events)
+
+    assert [(v.event, v.message) for v in report.violations] == [(bad_event, message)]
+    assert report.violations[0].subscriber == "observer"
+
+
+def test_folded_player_acting_is_reported():
+    deal, events = _played_hand()
+    state = HandState.from_deal(decode_frame(deal).deal)
+    for frame in events[:6]:
+        assert state.update(decode_frame(frame)) == []
+    folded_acts = copy.deepcopy(events[6])
+    _hand(folded_acts)["playerEvent"]["playerId"] = "a"
+
+    assert "a acted after folding" in state.update(decode_frame(folded_acts))
+
+
+def test_violations_reach_callback_and_metrics():
+    deal, events = _played_hand()
+    _pot_off_by_one(events)
+    metrics = MetricsRegistry()
+    seen = []
+    validator = HandValidator(metrics=metrics, on_violation=seen.append)
+    for frame in [deal] + events:
+        validator.record("observer", frame)
+
+    assert seen == validator.report.violations and len(seen) == 1
+    assert metrics.counter("validator_violations_total").value == 1
+    assert metrics.counter("validator_events_total").value == len(SCRIPT)
+    assert validator.hands == {}
+
+
+def test_deal_with_everyone_all_in_from_the_blinds_is_complete():
+    hand = PokerEngine(19).deal("short", [{"id": "a", "stack": 5}, {"id": "b", "stack": 15}])
+    frame = _frame("deal", {"mutationType": "CREATED", "id": hand.id, "deal": copy.deepcopy(hand.to_dict())})
+    report = _validate([frame])
+
+    assert hand.is_complete and hand.next_actor() is None
+    assert HandState.from_deal(decode_frame(frame).deal).complete
+    assert report.violations == [] and (report.hands, report.completed) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_validates_every_event_of_a_load_run():
+    validator = HandValidator(metrics=MetricsRegistry())
+    async with FakePokerServer(seed=19, auto_deal=False) as server:
+        async with GraphQLClient(server.graphql_url) as client:
+            async with GraphQLWSConnection(server.ws_url, recorder=validator) as observer:
+                load = await run_load(client, tables=4, hands_per_table=3, script=SCRIPTS["showdown"], observer=observer)
+
+    report = validator.report
+    assert load.hands == 12 and load.errors == 0
+    assert report.violations == []
+    assert report.hands == report.completed == 12
+    assert report.events == 12 * len(SCRIPTS["showdown"])